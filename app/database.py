@@ -0,0 +1,84 @@
+import threading
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import configure_mappers, sessionmaker
+import config
+
+_engines = {}
+_sessions = {}
+_lock = threading.Lock()
+
+
+def _configure_sqlite(engine):
+    """Apply the SQLite performance pragmas and let SQLAlchemy issue BEGIN itself
+    
+    pysqlite only opens transactions before DML, which would autocommit each
+    CREATE TABLE on its own; emitting BEGIN here makes DDL transactional.
+    """
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        # Readers no longer block the writer; NORMAL is durable enough under WAL
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+        dbapi_connection.execute("PRAGMA synchronous=NORMAL")
+        # Wait for a competing writer instead of failing with "database is locked"
+        dbapi_connection.execute(f"PRAGMA busy_timeout={int(config.SQLITE_BUSY_TIMEOUT * 1000)}")
+        dbapi_connection.execute(f"PRAGMA cache_size=-{config.SQLITE_CACHE_SIZE_KB}")
+        dbapi_connection.execute(f"PRAGMA mmap_size={config.SQLITE_MMAP_SIZE}")
+        dbapi_connection.execute("PRAGMA temp_store=MEMORY")
+    
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        # AUTOCOMMIT connections (e.g. for VACUUM) must stay outside a transaction
+        if conn.get_execution_options().get("isolation_level") != "AUTOCOMMIT":
+            conn.exec_driver_sql("BEGIN")
+
+
+def _engine_options(url):
+    """Pool settings for file databases; in-memory SQLite keeps its single-connection pool"""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "pool_size": config.DATABASE_POOL_SIZE,
+        "max_overflow": config.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": config.DATABASE_POOL_TIMEOUT,
+    }
+
+
+def get_engine(database_url=None):
+    """Return the shared engine for a database URL (defaults to config.DATABASE_URL)"""
+    url = database_url or config.DATABASE_URL
+    with _lock:
+        if url not in _engines:
+            engine = create_engine(url, **_engine_options(url))
+            if engine.dialect.name == "sqlite":
+                _configure_sqlite(engine)
+            _engines[url] = engine
+        return _engines[url]
+
+
+def get_session(database_url=None, **options):
+    """Open a new ORM session on the shared engine; options override the session defaults"""
+    url = database_url or config.DATABASE_URL
+    engine = get_engine(url)
+    with _lock:
+        if url not in _sessions:
+            _sessions[url] = sessionmaker(bind=engine)
+        factory = _sessions[url]
+    return factory(**options)
+
+
+def init_schema(database_url=None):
+    """Create or verify the whole schema and apply pending migrations in one transaction
+    
+    Returns the migration versions applied by this call.
+    """
+    from app.models import Base
+    from app.migrations import run_migrations
+    
+    # Resolve every relationship once, before any session uses the mappers
+    configure_mappers()
+    with get_engine(database_url).begin() as conn:
+        Base.metadata.create_all(conn)
+        return run_migrations(conn)
\ No newline at end of file
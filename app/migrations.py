@@ -0,0 +1,92 @@
+import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, insert
+
+# Kept outside Base.metadata so create_all never manages it
+_version_metadata = MetaData()
+schema_version = Table(
+    "schema_version", _version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200)),
+    Column("applied_at", DateTime, default=datetime.datetime.utcnow),
+)
+
+
+def _create_missing_indexes(conn):
+    """Create indexes that create_all skipped on tables from older databases
+    
+    Indexes on columns the table does not have yet are left to the later
+    migration that adds the column.
+    """
+    from app.models import Base
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        columns = {info["name"] for info in inspector.get_columns(table.name)}
+        for index in table.indexes:
+            if all(column.name in columns for column in index.columns):
+                index.create(conn, checkfirst=True)
+
+
+def _add_column(conn, table, column, ddl_type):
+    """Add a column unless create_all already created it"""
+    if column not in [info["name"] for info in inspect(conn).get_columns(table)]:
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}")
+
+
+def _add_analysis_image_path(conn):
+    """Add the image store reference column to plant_analyses"""
+    _add_column(conn, "plant_analyses", "image_path", "VARCHAR(255)")
+
+
+def _add_plant_harvest_yield(conn):
+    """Add the harvested weight column used by the performance summaries"""
+    _add_column(conn, "plants", "harvest_yield", "FLOAT")
+
+
+def _add_schedule_is_active(conn):
+    """Add the flag the irrigation scheduler uses to retire schedules"""
+    _add_column(conn, "irrigation_schedules", "is_active", "BOOLEAN DEFAULT 1")
+
+
+def _add_chat_history_session_id(conn):
+    """Add the anonymous session column to chat_history and its (session_id, timestamp) index"""
+    _add_column(conn, "chat_history", "session_id", "VARCHAR(32)")
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_chat_history_session_timestamp ON chat_history (session_id, timestamp)"
+    )
+
+
+def _index_measurement_time_series(conn):
+    """Replace the plant_id index on plant_measurements with (plant_id, measurement_date)"""
+    _create_missing_indexes(conn)
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_plant_measurements_plant_id")
+
+
+# (version, description, upgrade). Append only; upgrades must be idempotent
+# because a fresh database already has the latest schema from create_all.
+MIGRATIONS = [
+    (1, "Index foreign keys", _create_missing_indexes),
+    (2, "Add plant_analyses.image_path", _add_analysis_image_path),
+    (3, "Index plant_measurements by (plant_id, measurement_date)", _index_measurement_time_series),
+    (4, "Add plants.harvest_yield", _add_plant_harvest_yield),
+    (5, "Add irrigation_schedules.is_active", _add_schedule_is_active),
+    (6, "Add chat_history.session_id", _add_chat_history_session_id),
+]
+
+
+def current_version(conn):
+    """Return the highest applied schema version (0 for an unversioned database)"""
+    schema_version.create(conn, checkfirst=True)
+    versions = conn.execute(select(schema_version.c.version)).scalars().all()
+    return max(versions, default=0)
+
+
+def run_migrations(conn):
+    """Apply pending migrations on an open transaction; returns the applied versions"""
+    version = current_version(conn)
+    applied = []
+    for migration_version, description, upgrade in MIGRATIONS:
+        if migration_version > version:
+            upgrade(conn)
+            conn.execute(insert(schema_version).values(version=migration_version, description=description))
+            applied.append(migration_version)
+    return applied
\ No newline at end of file
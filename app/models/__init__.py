@@ -0,0 +1,8 @@
+from app.models.base import Base
+from app.models.user import User, ChatHistory
+from app.models.media import GrowingMedia
+from app.models.irrigation import IrrigationSystem, IrrigationSchedule, IrrigationRun, NutrientMix, StockTank
+from app.models.plant import Plant, PlantMeasurement, HourlyMeasurementRollup, DailyMeasurementRollup
+from app.models.analysis import PlantAnalysis
+from app.models.alert import Alert, AlertCursor
+from app.models.performance import PlantGrowthSummary, PlantGrowthFit, MediaPerformance, IrrigationPerformance
\ No newline at end of file
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
+from app.models.base import Base
+
+class Alert(Base):
+    __tablename__ = 'alerts'
+    __table_args__ = (
+        Index('ix_alerts_rule_subject', 'rule', 'subject', 'last_seen'),
+    )
+    
+    # One row per firing; repeats within the rule's cooldown update it instead
+    id = Column(Integer, primary_key=True)
+    rule = Column(String(100), nullable=False)
+    metric = Column(String(50), nullable=False)
+    subject = Column(String(100), nullable=False)  # "plant:<id>" or a sensor key such as "ec/NFT"
+    plant_id = Column(Integer, ForeignKey('plants.id'), nullable=True, index=True)
+    severity = Column(String(20), nullable=False)  # Low, Medium, High
+    value = Column(Float)  # reading that last fired the rule
+    first_seen = Column(DateTime, nullable=False)
+    last_seen = Column(DateTime, nullable=False, index=True)
+    occurrences = Column(Integer, nullable=False, default=1)
+    
+    def __repr__(self):
+        return f"<Alert(rule='{self.rule}', subject='{self.subject}', occurrences={self.occurrences})>"
+
+
+class AlertCursor(Base):
+    __tablename__ = 'alert_cursors'
+    
+    # Where the engine stopped reading a source table, so a restart resumes there
+    name = Column(String(50), primary_key=True)  # source table, e.g. "plant_analyses"
+    position = Column(Integer, nullable=False)  # highest id evaluated
+    
+    def __repr__(self):
+        return f"<AlertCursor(name='{self.name}', position={self.position})>"
\ No newline at end of file
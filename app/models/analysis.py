@@ -1,18 +1,16 @@
 from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Boolean, LargeBinary
-from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 import datetime
-
-Base = declarative_base()
+from app.models.base import Base
 
 class PlantAnalysis(Base):
     __tablename__ = 'plant_analyses'
     
     id = Column(Integer, primary_key=True)
-    plant_id = Column(Integer, ForeignKey('plants.id'))
+    plant_id = Column(Integer, ForeignKey('plants.id'), index=True)
     analysis_date = Column(DateTime, default=datetime.datetime.utcnow)
-    image_data = Column(LargeBinary, nullable=True)  # Store the image or a reference
-    image_path = Column(String(255), nullable=True)  # Alternative: store path to image
+    image_data = Column(LargeBinary, nullable=True)  # Legacy inline image, see migrate_images.py
+    image_path = Column(String(255), nullable=True)  # Reference into the image store
     
     # Analysis results
     health_score = Column(Float)  # 0-100 scale
@@ -49,4 +47,21 @@ class PlantAnalysis(Base):
         }
         
         # Filter out None values
-        return {k: v for k, v in statuses.items() if v is not None}
\ No newline at end of file
+        return {k: v for k, v in statuses.items() if v is not None}
+    
+    def set_image(self, image_bytes, store=None):
+        """Save the image to the image store and keep only its reference"""
+        from app.services.image_store import ImageStore
+        
+        store = store or ImageStore()
+        self.image_path = store.put(image_bytes)
+        self.image_data = None
+    
+    def get_image(self, store=None):
+        """Return the image bytes, served through mmap when held in the image store"""
+        from app.services.image_store import ImageStore
+        
+        store = store or ImageStore()
+        if store.is_ref(self.image_path):
+            return store.read(self.image_path)
+        return self.image_data
\ No newline at end of file
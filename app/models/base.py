@@ -0,0 +1,5 @@
+from sqlalchemy.orm import declarative_base
+
+# Single registry and metadata shared by every model, so relationships
+# resolve across modules and the whole schema is created in one pass
+Base = declarative_base()
\ No newline at end of file
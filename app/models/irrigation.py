@@ -1,9 +1,25 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 import datetime
+import re
+from app.models.base import Base
 
-Base = declarative_base()
+
+def frequency_interval(frequency):
+    """Parse a schedule frequency such as "Every 3 hours", "Daily" or "every 2 days"
+    
+    Returns the time between runs as a timedelta, or None if it is not recognised.
+    """
+    text = (frequency or "").strip().lower()
+    if text in ("daily", "every day"):
+        return datetime.timedelta(days=1)
+    if text in ("hourly", "every hour"):
+        return datetime.timedelta(hours=1)
+    
+    match = re.fullmatch(r"every (\d+) (minute|hour|day)s?", text)
+    if not match:
+        return None
+    return datetime.timedelta(**{match.group(2) + "s": int(match.group(1))})
 
 class IrrigationSystem(Base):
     __tablename__ = 'irrigation_systems'
@@ -48,22 +64,47 @@ class IrrigationSchedule(Base):
     __tablename__ = 'irrigation_schedules'
     
     id = Column(Integer, primary_key=True)
-    system_id = Column(Integer, ForeignKey('irrigation_systems.id'))
+    system_id = Column(Integer, ForeignKey('irrigation_systems.id'), index=True)
     start_time = Column(DateTime, nullable=False)
     duration = Column(Integer, nullable=False)  # in minutes
     frequency = Column(String(50))  # daily, every 2 days, etc.
-    nutrient_mix_id = Column(Integer, ForeignKey('nutrient_mixes.id'), nullable=True)
+    nutrient_mix_id = Column(Integer, ForeignKey('nutrient_mixes.id'), nullable=True, index=True)
     ec_target = Column(Float)  # target EC level
     ph_target = Column(Float)  # target pH level
+    is_active = Column(Boolean, default=True)
     
     # Relationships
     system = relationship("IrrigationSystem", back_populates="schedules")
     nutrient_mix = relationship("NutrientMix")
+    runs = relationship("IrrigationRun", back_populates="schedule")
     
     def __repr__(self):
         return f"<IrrigationSchedule(system_id={self.system_id}, start_time='{self.start_time}')>"
 
 
+class IrrigationRun(Base):
+    __tablename__ = 'irrigation_runs'
+    __table_args__ = (
+        # One row per occurrence, so a run is claimed once even across restarts
+        Index('ix_irrigation_runs_schedule_occurrence', 'schedule_id', 'scheduled_for', unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    schedule_id = Column(Integer, ForeignKey('irrigation_schedules.id'), nullable=False)
+    system_id = Column(Integer, ForeignKey('irrigation_systems.id'), index=True)
+    scheduled_for = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, default=datetime.datetime.utcnow)
+    duration = Column(Integer)  # in minutes
+    status = Column(String(20), nullable=False)  # dispatched, failed
+    message = Column(Text)
+    
+    # Relationships
+    schedule = relationship("IrrigationSchedule", back_populates="runs")
+    
+    def __repr__(self):
+        return f"<IrrigationRun(schedule_id={self.schedule_id}, scheduled_for='{self.scheduled_for}', status='{self.status}')>"
+
+
 class NutrientMix(Base):
     __tablename__ = 'nutrient_mixes'
     
@@ -84,4 +125,35 @@ class NutrientMix(Base):
     molybdenum = Column(Float)  # in ppm
     
     def __repr__(self):
-        return f"<NutrientMix(name='{self.name}')>"
\ No newline at end of file
+        return f"<NutrientMix(name='{self.name}')>"
+
+
+class StockTank(Base):
+    __tablename__ = 'stock_tanks'
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    nutrient_mix_id = Column(Integer, ForeignKey('nutrient_mixes.id'), nullable=False, index=True)  # concentrate composition
+    volume = Column(Float)  # liters left in the tank
+    max_dose = Column(Float)  # most mL of stock per liter of irrigation water
+    is_active = Column(Boolean, default=True)
+    
+    # Relationships
+    nutrient_mix = relationship("NutrientMix")
+    
+    def __repr__(self):
+        return f"<StockTank(name='{self.name}', nutrient_mix_id={self.nutrient_mix_id})>"
+    
+    @classmethod
+    def get_default_tanks(cls, session):
+        """Return the stock tanks or create the default concentrates if there are none"""
+        from config import DEFAULT_STOCK_TANKS, DEFAULT_STOCK_TANK_VOLUME
+        
+        existing_tanks = session.query(cls).all()
+        if not existing_tanks:
+            for tank_name, elements in DEFAULT_STOCK_TANKS.items():
+                mix = NutrientMix(name=f"{tank_name} stock", description="Default stock concentrate", **elements)
+                session.add(cls(name=tank_name, nutrient_mix=mix, volume=DEFAULT_STOCK_TANK_VOLUME))
+            session.commit()
+            return session.query(cls).all()
+        return existing_tanks
\ No newline at end of file
@@ -1,9 +1,7 @@
 from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey
-from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 import datetime
-
-Base = declarative_base()
+from app.models.base import Base
 
 class GrowingMedia(Base):
     __tablename__ = 'growing_media'
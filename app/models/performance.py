@@ -0,0 +1,71 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+import datetime
+from app.models.base import Base
+
+class PlantGrowthSummary(Base):
+    __tablename__ = 'plant_growth_summaries'
+    
+    # Maintained incrementally from every measurement batch
+    plant_id = Column(Integer, ForeignKey('plants.id'), primary_key=True)
+    first_measured = Column(DateTime)
+    last_measured = Column(DateTime)
+    min_height = Column(Float)  # in cm
+    max_height = Column(Float)  # in cm
+    readings = Column(Integer, nullable=False, default=0)
+    growth_rate = Column(Float)  # in cm/week
+    
+    def __repr__(self):
+        return f"<PlantGrowthSummary(plant_id={self.plant_id}, growth_rate={self.growth_rate})>"
+
+
+class PlantGrowthFit(Base):
+    __tablename__ = 'plant_growth_fits'
+    
+    # Logistic curve height = max_height / (1 + exp(-rate * (day - midpoint))), days counted from origin
+    plant_id = Column(Integer, ForeignKey('plants.id'), primary_key=True)
+    origin = Column(DateTime, nullable=False)  # planting date, or the first measurement
+    max_height = Column(Float, nullable=False)  # in cm
+    rate = Column(Float, nullable=False)  # per day
+    midpoint = Column(Float, nullable=False)  # in days
+    rmse = Column(Float)  # in cm
+    points = Column(Integer, nullable=False)  # daily means fitted
+    readings = Column(Integer, nullable=False)  # PlantGrowthSummary.readings at fit time
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<PlantGrowthFit(plant_id={self.plant_id}, max_height={self.max_height})>"
+
+
+class MediaPerformance(Base):
+    __tablename__ = 'media_performance'
+    
+    media_id = Column(Integer, ForeignKey('growing_media.id'), primary_key=True)
+    plants = Column(Integer, nullable=False, default=0)
+    measured_plants = Column(Integer, nullable=False, default=0)
+    growth_rate = Column(Float)  # mean cm/week over measured plants
+    harvested_plants = Column(Integer, nullable=False, default=0)
+    avg_yield = Column(Float)  # kg/plant over harvested plants
+    avg_fruit_count = Column(Float)
+    readings = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<MediaPerformance(media_id={self.media_id}, growth_rate={self.growth_rate})>"
+
+
+class IrrigationPerformance(Base):
+    __tablename__ = 'irrigation_performance'
+    
+    irrigation_id = Column(Integer, ForeignKey('irrigation_systems.id'), primary_key=True)
+    plants = Column(Integer, nullable=False, default=0)
+    measured_plants = Column(Integer, nullable=False, default=0)
+    growth_rate = Column(Float)  # mean cm/week over measured plants
+    harvested_plants = Column(Integer, nullable=False, default=0)
+    avg_yield = Column(Float)  # kg/plant over harvested plants
+    water_usage = Column(Float)  # scheduled L/day/plant
+    water_per_kg = Column(Float)  # scheduled L/day per kg of mean yield, lower is more efficient
+    readings = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<IrrigationPerformance(irrigation_id={self.irrigation_id}, water_usage={self.water_usage})>"
\ No newline at end of file
@@ -1,9 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Boolean
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 import datetime
-
-Base = declarative_base()
+from app.models.base import Base
 
 class Plant(Base):
     __tablename__ = 'plants'
@@ -13,11 +11,12 @@ class Plant(Base):
     variety = Column(String(100))
     planting_date = Column(DateTime, default=datetime.datetime.utcnow)
     harvest_date = Column(DateTime, nullable=True)
+    harvest_yield = Column(Float, nullable=True)  # in kg
     
     # Foreign keys
-    media_id = Column(Integer, ForeignKey('growing_media.id'))
-    irrigation_id = Column(Integer, ForeignKey('irrigation_systems.id'))
-    user_id = Column(Integer, ForeignKey('users.id'))
+    media_id = Column(Integer, ForeignKey('growing_media.id'), index=True)
+    irrigation_id = Column(Integer, ForeignKey('irrigation_systems.id'), index=True)
+    user_id = Column(Integer, ForeignKey('users.id'), index=True)
     
     # Plant metrics
     current_height = Column(Float, default=0.0)  # in cm
@@ -55,7 +54,7 @@ class Plant(Base):
             self.leaf_count = leaf_count
         if fruit_count is not None:
             self.fruit_count = fruit_count
-            
+        
         # Create a measurement record
         measurement = PlantMeasurement(
             plant_id=self.id,
@@ -69,6 +68,10 @@ class Plant(Base):
 
 class PlantMeasurement(Base):
     __tablename__ = 'plant_measurements'
+    __table_args__ = (
+        # Time-range scans per plant; also serves as the plant_id foreign key index
+        Index('ix_plant_measurements_plant_date', 'plant_id', 'measurement_date'),
+    )
     
     id = Column(Integer, primary_key=True)
     plant_id = Column(Integer, ForeignKey('plants.id'))
@@ -87,4 +90,57 @@ class PlantMeasurement(Base):
     plant = relationship("Plant", back_populates="measurements")
     
     def __repr__(self):
-        return f"<PlantMeasurement(plant_id={self.plant_id}, date='{self.measurement_date}')>"
\ No newline at end of file
+        return f"<PlantMeasurement(plant_id={self.plant_id}, date='{self.measurement_date}')>"
+
+
+# Metrics summarized by the hourly and daily rollups
+ROLLUP_METRICS = ("height", "temperature", "humidity", "light_level")
+
+
+class MeasurementRollupMixin:
+    """Columns shared by the rollup tables: one row per plant and time bucket
+    
+    Sums and counts are kept instead of means so buckets can be merged
+    incrementally as new readings arrive.
+    """
+    id = Column(Integer, primary_key=True)
+    plant_id = Column(Integer, ForeignKey('plants.id'), nullable=False)
+    bucket_start = Column(DateTime, nullable=False)
+    samples = Column(Integer, nullable=False, default=0)
+    
+    height_count = Column(Integer, nullable=False, default=0)
+    height_sum = Column(Float, nullable=False, default=0.0)
+    height_min = Column(Float)
+    height_max = Column(Float)
+    temperature_count = Column(Integer, nullable=False, default=0)
+    temperature_sum = Column(Float, nullable=False, default=0.0)
+    temperature_min = Column(Float)
+    temperature_max = Column(Float)
+    humidity_count = Column(Integer, nullable=False, default=0)
+    humidity_sum = Column(Float, nullable=False, default=0.0)
+    humidity_min = Column(Float)
+    humidity_max = Column(Float)
+    light_level_count = Column(Integer, nullable=False, default=0)
+    light_level_sum = Column(Float, nullable=False, default=0.0)
+    light_level_min = Column(Float)
+    light_level_max = Column(Float)
+
+
+class HourlyMeasurementRollup(MeasurementRollupMixin, Base):
+    __tablename__ = 'plant_measurement_hourly'
+    __table_args__ = (
+        Index('ix_plant_measurement_hourly_bucket', 'plant_id', 'bucket_start', unique=True),
+    )
+    
+    def __repr__(self):
+        return f"<HourlyMeasurementRollup(plant_id={self.plant_id}, bucket='{self.bucket_start}')>"
+
+
+class DailyMeasurementRollup(MeasurementRollupMixin, Base):
+    __tablename__ = 'plant_measurement_daily'
+    __table_args__ = (
+        Index('ix_plant_measurement_daily_bucket', 'plant_id', 'bucket_start', unique=True),
+    )
+    
+    def __repr__(self):
+        return f"<DailyMeasurementRollup(plant_id={self.plant_id}, bucket='{self.bucket_start}')>"
\ No newline at end of file
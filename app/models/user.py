@@ -1,11 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 import datetime
 import hashlib
 import os
-
-Base = declarative_base()
+from app.models.base import Base
 
 class User(Base):
     __tablename__ = 'users'
@@ -54,9 +52,15 @@ class User(Base):
 
 class ChatHistory(Base):
     __tablename__ = 'chat_history'
+    __table_args__ = (
+        # Serves "latest page for a user" and keyset pagination backwards in time
+        Index('ix_chat_history_user_timestamp', 'user_id', 'timestamp'),
+        Index('ix_chat_history_session_timestamp', 'session_id', 'timestamp'),
+    )
     
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('users.id'))
+    user_id = Column(Integer, ForeignKey('users.id'))  # Indexed by ix_chat_history_user_timestamp
+    session_id = Column(String(32))  # Browser session of an anonymous visitor, when user_id is NULL
     timestamp = Column(DateTime, default=datetime.datetime.utcnow)
     query = Column(Text, nullable=False)
     response = Column(Text, nullable=False)
@@ -0,0 +1,407 @@
+from collections import namedtuple
+import datetime
+import threading
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, func, insert, select, update
+import config
+from app.database import get_engine
+from app.models import Alert, AlertCursor, Plant, PlantAnalysis
+from app.services.data_version import bump_data_version
+from app.services.telemetry import RingBuffer
+
+# kind is "above"/"below" (threshold), "rise"/"fall" (change from the window's
+# lowest/highest reading) or "drift" (distance from the window's mean); window
+# and cooldown are in seconds, cooldown defaulting to ALERT_COOLDOWN
+AlertRule = namedtuple(
+    "AlertRule", ("name", "metric", "kind", "threshold", "severity", "window", "cooldown"), defaults=(None, None)
+)
+
+THRESHOLD_KINDS = {"above": 1.0, "below": -1.0}
+CHANGE_KINDS = ("rise", "fall", "drift")
+
+# PlantAnalysis columns the engine reads
+ANALYSIS_METRICS = ("health_score", "disease_confidence")
+
+DEFAULT_RULES = (
+    AlertRule("Critical health score", "health_score", "below", config.HEALTH_ALERT_THRESHOLD / 2, "High",
+              cooldown=config.ALERT_ANALYSIS_COOLDOWN),
+    AlertRule("Low health score", "health_score", "below", config.HEALTH_ALERT_THRESHOLD, "Medium",
+              cooldown=config.ALERT_ANALYSIS_COOLDOWN),
+    AlertRule("Health score dropping", "health_score", "fall", 20, "Medium", window=7 * 24 * 60 * 60,
+              cooldown=config.ALERT_ANALYSIS_COOLDOWN),
+    AlertRule("Likely disease", "disease_confidence", "above", 0.8, "High", cooldown=config.ALERT_ANALYSIS_COOLDOWN),
+    AlertRule("Disease confidence rising", "disease_confidence", "rise", 0.5, "Medium", window=14 * 24 * 60 * 60,
+              cooldown=config.ALERT_ANALYSIS_COOLDOWN),
+    AlertRule("EC drift", "ec", "drift", config.ALERT_EC_DRIFT, "Medium", window=60 * 60),
+    AlertRule("pH too low", "ph", "below", 5.5, "Medium"),
+    AlertRule("pH too high", "ph", "above", 6.8, "Medium"),
+    AlertRule("Heat stress", "temperature", "above", 35, "Medium"),
+    AlertRule("Cold stress", "temperature", "below", 12, "Medium"),
+    AlertRule("Root zone too warm", "water_temperature", "above", 28, "Medium"),
+)
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+# New readings compared with their history at once by change rules
+_CHUNK_SIZE = 4096
+
+
+def _seconds(dates):
+    """Epoch seconds of an array-like of naive UTC datetimes"""
+    return pd.to_datetime(pd.Series(dates)).to_numpy().astype("datetime64[us]").astype(np.int64) / 1e6
+
+
+def _datetime(seconds):
+    """Naive UTC datetime of epoch seconds"""
+    return _EPOCH + datetime.timedelta(seconds=float(seconds))
+
+
+def compile_rules(rules):
+    """Index rules by metric: metric -> (threshold rules, thresholds, signs, change rules)
+    
+    Threshold rules of a metric become two arrays, so a batch of readings is
+    checked against all of them with one comparison matrix.
+    """
+    grouped = {}
+    for rule in rules:
+        if rule.kind not in THRESHOLD_KINDS and rule.kind not in CHANGE_KINDS:
+            raise ValueError(f"Unknown alert rule kind '{rule.kind}' in '{rule.name}'")
+        grouped.setdefault(rule.metric, []).append(rule)
+    
+    index = {}
+    for metric, metric_rules in grouped.items():
+        thresholds = tuple(rule for rule in metric_rules if rule.kind in THRESHOLD_KINDS)
+        index[metric] = (
+            thresholds,
+            np.array([rule.threshold for rule in thresholds], dtype=float),
+            np.array([THRESHOLD_KINDS[rule.kind] for rule in thresholds]),
+            tuple(rule for rule in metric_rules if rule.kind in CHANGE_KINDS),
+        )
+    return index
+
+
+def change_hits(rules, codes, times, values, targets, lags):
+    """(position, rule) pairs of target readings that fire change rules
+    
+    codes, times and values hold readings sorted by subject code then time;
+    each target position is compared with up to lags earlier readings of
+    its subject inside each rule's window. Targets are checked in chunks
+    against a (targets, lags) matrix of those earlier readings.
+    """
+    hits = []
+    offsets = np.arange(1, lags + 1)
+    for start in range(0, len(targets), _CHUNK_SIZE):
+        chunk = targets[start:start + _CHUNK_SIZE]
+        previous = chunk[:, None] - offsets
+        earlier = previous >= 0
+        previous = np.maximum(previous, 0)
+        earlier &= codes[previous] == codes[chunk, None]
+        past_times, past_values, current = times[previous], values[previous], values[chunk]
+        for rule in rules:
+            inside = earlier if rule.window is None else earlier & (past_times >= times[chunk, None] - rule.window)
+            count = inside.sum(axis=1)
+            if rule.kind == "rise":
+                change = current - np.where(inside, past_values, np.inf).min(axis=1)
+            elif rule.kind == "fall":
+                change = np.where(inside, past_values, -np.inf).max(axis=1) - current
+            else:
+                change = np.abs(current - np.where(inside, past_values, 0.0).sum(axis=1) / np.maximum(count, 1))
+            hits += [(position, rule) for position in chunk[(count > 0) & (change >= rule.threshold)]]
+    return hits
+
+
+class AlertEngine:
+    """Threshold, rate-of-change and drift rules evaluated on incoming readings
+    
+    Rules are compiled into a per-metric index, so a reading only meets the
+    rules of its metric. Change rules compare a reading with the recent
+    history of the same plant or sensor, kept in a small RingBuffer per
+    subject, for a whole batch at once (see change_hits). A rule that
+    fires again for a subject within its cooldown of the last firing
+    updates that alert (last_seen, value, occurrences) rather than adding
+    one; open alerts are cached in memory, so a batch costs one INSERT and
+    one UPDATE executemany at most.
+    """
+    
+    def __init__(self, database_url=None, rules=DEFAULT_RULES):
+        self.engine = get_engine(database_url)
+        self.rules = tuple(rules)
+        self.index = compile_rules(self.rules)
+        self.last_error = None
+        self._history = {}
+        self._open = None
+        self._primed = False
+        self._lock = threading.RLock()
+    
+    def observe(self, metric, subjects, times, values, plant_ids=None):
+        """Evaluate one metric's readings (subjects, epoch seconds, values); returns the number of new alerts"""
+        if metric not in self.index:
+            return 0
+        try:
+            with self._lock:
+                return self._persist(self._evaluate(metric, subjects, times, values, plant_ids))
+        except Exception as e:
+            # Alerting never fails the ingestion that feeds it
+            self.last_error = str(e)
+            return 0
+    
+    def observe_frame(self, frame, date_column):
+        """Evaluate every indexed metric column of a frame of plant rows"""
+        try:
+            with self._lock:
+                return self._persist(self._evaluate_frame(frame, date_column))
+        except Exception as e:
+            self.last_error = str(e)
+            return 0
+    
+    def observe_measurements(self, frame):
+        """Evaluate a batch of PlantMeasurement rows"""
+        return self.observe_frame(frame, "measurement_date")
+    
+    def observe_analyses(self, frame):
+        """Evaluate a batch of PlantAnalysis rows (plant_id, analysis_date and ANALYSIS_METRICS)"""
+        return self.observe_frame(frame, "analysis_date")
+    
+    def scan_analyses(self):
+        """Evaluate analyses stored since the last scan; returns the number of new alerts
+        
+        The highest analysis id evaluated is kept in alert_cursors and moves
+        in the same transaction as the alerts it raised, so analyses stored
+        while no process was scanning are still evaluated, and none twice.
+        A process's first scan loads the recent scores up to the cursor into
+        the change-rule history, so a restart does not lose their trend.
+        """
+        analyses = PlantAnalysis.__table__
+        cursors = AlertCursor.__table__
+        columns = (analyses.c.id, analyses.c.plant_id, analyses.c.analysis_date, *(analyses.c[m] for m in ANALYSIS_METRICS))
+        query = select(*columns).where(analyses.c.plant_id.isnot(None)).order_by(analyses.c.id)
+        windows = [rule.window or 0 for rule in self.rules if rule.metric in ANALYSIS_METRICS and rule.kind in CHANGE_KINDS]
+        try:
+            with self._lock:
+                with self.engine.connect() as conn:
+                    position = conn.execute(select(cursors.c.position).where(cursors.c.name == analyses.name)).scalar()
+                    if not self._primed and position is not None and windows:
+                        since = datetime.datetime.utcnow() - datetime.timedelta(seconds=max(windows))
+                        self._prime(self._read(conn, query.where(analyses.c.id <= position, analyses.c.analysis_date >= since)))
+                    self._primed = True
+                    frame = self._read(conn, query.where(analyses.c.id > (position or 0)))
+                if frame.empty:
+                    return 0
+                return self._persist(self._evaluate_frame(frame, "analysis_date"), (position, int(frame["id"].max())))
+        except Exception as e:
+            self.last_error = str(e)
+            return 0
+    
+    @staticmethod
+    def _read(conn, query):
+        """Run a query and return its rows as a DataFrame"""
+        result = conn.execute(query)
+        return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+    
+    def _prime(self, frame):
+        """Feed past analyses into the change-rule history without firing"""
+        if frame.empty:
+            return
+        times = _seconds(frame["analysis_date"])
+        order = np.argsort(times, kind="stable")
+        for metric in ANALYSIS_METRICS:
+            values = frame[metric].to_numpy(dtype=float)
+            for row in order:
+                if not np.isnan(values[row]):
+                    self._buffer(metric, f"plant:{frame['plant_id'].iat[row]}").append(times[row], values[row])
+    
+    def _buffer(self, metric, subject):
+        """Recent readings of one metric of one subject"""
+        key = (metric, subject)
+        if key not in self._history:
+            self._history[key] = RingBuffer(config.ALERT_HISTORY_SIZE)
+        return self._history[key]
+    
+    def _evaluate_frame(self, frame, date_column):
+        """Firings of every indexed metric column of a frame of plant rows, in time order"""
+        metrics = [metric for metric in self.index if metric in frame.columns]
+        frame = frame[frame["plant_id"].notna()]
+        if frame.empty or not metrics:
+            return []
+        plant_ids = frame["plant_id"].astype("int64").to_numpy()
+        subjects = [f"plant:{plant_id}" for plant_id in plant_ids]
+        times = _seconds(frame[date_column])
+        fired = []
+        for metric in metrics:
+            fired += self._evaluate(metric, subjects, times, frame[metric].to_numpy(dtype=float), plant_ids)
+        fired.sort(key=lambda firing: firing[3])
+        return fired
+    
+    def _evaluate(self, metric, subjects, times, values, plant_ids):
+        """Firings (rule, subject, plant_id, time, value) of one metric's readings, in time order"""
+        thresholds, limits, signs, changes = self.index[metric]
+        times = np.asarray(times, dtype=float)
+        values = np.asarray(values, dtype=float)
+        plant_ids = [None] * len(values) if plant_ids is None else plant_ids
+        fired = []
+        
+        if len(thresholds):
+            # readings x rules: above rules fire on a positive difference, below rules on a negative one
+            with np.errstate(invalid="ignore"):
+                rows, columns = np.nonzero((values[:, None] - limits) * signs > 0)
+            fired += [(thresholds[c], subjects[r], plant_ids[r], times[r], values[r]) for r, c in zip(rows, columns)]
+        
+        rows = np.flatnonzero(~np.isnan(values))
+        if changes and len(rows):
+            codes, names = pd.factorize(pd.Series([subjects[row] for row in rows], dtype=object))
+            buffers = [self._buffer(metric, name) for name in names]
+            history = [buffer.series() for buffer in buffers]
+            # Each subject's kept readings ahead of its new ones; the sort is stable
+            sources = np.concatenate([np.full(sum(len(past) for past, _ in history), -1), rows])
+            all_codes = np.concatenate([np.repeat(np.arange(len(names)), [len(past) for past, _ in history]), codes])
+            all_times = np.concatenate([past for past, _ in history] + [times[rows]])
+            all_values = np.concatenate([past for _, past in history] + [values[rows]])
+            order = np.lexsort((all_times, all_codes))
+            sources, all_codes, all_times, all_values = sources[order], all_codes[order], all_times[order], all_values[order]
+            
+            targets = np.flatnonzero(sources >= 0)
+            for position, rule in change_hits(changes, all_codes, all_times, all_values, targets, config.ALERT_HISTORY_SIZE):
+                row = sources[position]
+                fired.append((rule, subjects[row], plant_ids[row], times[row], values[row]))
+            
+            bounds = np.flatnonzero(np.diff(all_codes[targets])) + 1
+            for group in np.split(targets, bounds):
+                buffers[all_codes[group[0]]].extend(all_times[group], all_values[group])
+        
+        fired.sort(key=lambda firing: firing[3])
+        return fired
+    
+    def _load_open(self, earliest):
+        """Cache each (rule, subject)'s latest alert that readings from earliest on could still update"""
+        longest = max([config.ALERT_COOLDOWN] + [rule.cooldown or 0 for rule in self.rules])
+        since = min(_datetime(earliest), datetime.datetime.utcnow()) - datetime.timedelta(seconds=longest)
+        alerts = Alert.__table__
+        query = select(alerts.c.id, alerts.c.rule, alerts.c.subject, alerts.c.last_seen, alerts.c.occurrences).where(
+            alerts.c.last_seen >= since
+        ).order_by(alerts.c.last_seen)
+        opened = {}
+        with self.engine.connect() as conn:
+            for row in conn.execute(query):
+                opened[(row.rule, row.subject)] = {
+                    "id": row.id,
+                    "last_seen": _seconds([row.last_seen])[0],
+                    "occurrences": row.occurrences,
+                }
+        self._open = opened
+    
+    def _persist(self, fired, cursor=None):
+        """Fold firings into open alerts or new ones and write them; returns the number of new alerts
+        
+        cursor is the (old, new) position of the analyses scan, moved in the
+        same transaction.
+        """
+        if not fired and cursor is None:
+            return 0
+        if self._open is None and fired:
+            self._load_open(fired[0][3])
+        
+        # Folded into a copy that replaces the cache once the write commits,
+        # so a failed write leaves the cache matching the table
+        opened = dict(self._open or {})
+        new, changed = [], {}
+        for rule, subject, plant_id, at, value in fired:
+            key = (rule.name, subject)
+            cooldown = config.ALERT_COOLDOWN if rule.cooldown is None else rule.cooldown
+            alert = opened.get(key)
+            if alert is not None and at - alert["last_seen"] < cooldown:
+                if alert is self._open.get(key):
+                    alert = opened[key] = dict(alert)
+                alert["last_seen"] = max(alert["last_seen"], at)
+                alert["occurrences"] += 1
+                alert["value"] = value
+                if alert["id"] is not None:
+                    changed[alert["id"]] = alert
+            else:
+                alert = {
+                    "id": None, "rule": rule, "subject": subject, "plant_id": plant_id,
+                    "first_seen": at, "last_seen": at, "occurrences": 1, "value": value,
+                }
+                opened[key] = alert
+                new.append(alert)
+        
+        alerts = Alert.__table__
+        with self.engine.begin() as conn:
+            if new:
+                ids = conn.execute(
+                    insert(alerts).returning(alerts.c.id, sort_by_parameter_order=True),
+                    [
+                        {
+                            "rule": alert["rule"].name, "metric": alert["rule"].metric, "subject": alert["subject"],
+                            "plant_id": None if alert["plant_id"] is None else int(alert["plant_id"]),
+                            "severity": alert["rule"].severity, "value": float(alert["value"]),
+                            "first_seen": _datetime(alert["first_seen"]), "last_seen": _datetime(alert["last_seen"]),
+                            "occurrences": alert["occurrences"],
+                        }
+                        for alert in new
+                    ]
+                ).scalars().all()
+                for alert, alert_id in zip(new, ids):
+                    alert["id"] = alert_id
+            if changed:
+                conn.execute(
+                    update(alerts).where(alerts.c.id == bindparam("alert_id")).values(
+                        last_seen=bindparam("seen"), occurrences=bindparam("count"), value=bindparam("reading")
+                    ),
+                    [
+                        {
+                            "alert_id": alert_id, "seen": _datetime(alert["last_seen"]),
+                            "count": alert["occurrences"], "reading": float(alert["value"]),
+                        }
+                        for alert_id, alert in changed.items()
+                    ]
+                )
+            if cursor is not None:
+                cursors = AlertCursor.__table__
+                name = PlantAnalysis.__table__.name
+                if cursor[0] is None:
+                    conn.execute(insert(cursors).values(name=name, position=cursor[1]))
+                else:
+                    moved = conn.execute(
+                        update(cursors).where(cursors.c.name == name, cursors.c.position == cursor[0]).values(position=cursor[1])
+                    )
+                    if moved.rowcount != 1:
+                        # Another process scanned the same analyses; roll back rather than alert twice
+                        raise RuntimeError("Analyses were scanned concurrently")
+        if fired:
+            self._open = opened
+        if new or changed:
+            bump_data_version("alerts")
+        return len(new)
+    
+    def alerts(self, start, end, plant_id=None, limit=None):
+        """Alerts active between start and end, newest first"""
+        alerts = Alert.__table__
+        plants = Plant.__table__
+        query = (
+            select(
+                alerts.c.last_seen, func.coalesce(plants.c.name, alerts.c.subject).label("subject"),
+                alerts.c.rule, alerts.c.severity, alerts.c.value, alerts.c.occurrences, alerts.c.first_seen
+            )
+            .outerjoin(plants, plants.c.id == alerts.c.plant_id)
+            .where(alerts.c.last_seen >= start, alerts.c.first_seen < end)
+            .order_by(alerts.c.last_seen.desc())
+            .limit(limit or config.ALERT_LIST_LIMIT)
+        )
+        if plant_id is not None:
+            query = query.where(alerts.c.plant_id == plant_id)
+        with self.engine.connect() as conn:
+            return self._read(conn, query)
+
+
+_alert_engines = {}
+_alert_engines_lock = threading.Lock()
+
+
+def get_alert_engine(database_url=None):
+    """Return the process-wide alert engine for a database URL"""
+    url = database_url or config.DATABASE_URL
+    with _alert_engines_lock:
+        if url not in _alert_engines:
+            _alert_engines[url] = AlertEngine(url)
+        return _alert_engines[url]
\ No newline at end of file
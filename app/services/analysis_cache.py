@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from PIL import Image
+import config
+
+
+def image_digest(image_data):
+    """Return a SHA-256 hex digest identifying the image content"""
+    digest = hashlib.sha256()
+    if isinstance(image_data, (bytes, bytearray, memoryview)):
+        digest.update(image_data)
+    elif isinstance(image_data, Image.Image):
+        # Decoded images hash their pixels plus the geometry needed to read them
+        digest.update(f"{image_data.mode}:{image_data.size}".encode("utf-8"))
+        digest.update(image_data.tobytes())
+    else:
+        return None
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """Persistent LRU cache of image analysis results keyed by content hash"""
+    
+    def __init__(self, path=None, max_entries=None, ttl=None, clock=time.time):
+        self.path = path or config.ANALYSIS_CACHE_PATH
+        self.max_entries = max_entries or config.ANALYSIS_CACHE_MAX_ENTRIES
+        self.ttl = config.ANALYSIS_CACHE_TTL if ttl is None else ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        # Hits touch last_access, so keep writes cheap
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS analysis_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_analysis_cache_last_access ON analysis_cache (last_access)"
+        )
+        self._conn.commit()
+    
+    @staticmethod
+    def make_key(image_data, prompt=None, model=None):
+        """Build the cache key from the image digest, prompt and model name"""
+        digest = image_digest(image_data)
+        if digest is None:
+            return None
+        parts = [digest, prompt or "", model or ""]
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+    
+    def get(self, key):
+        """Return the cached value for a key, or None on a miss"""
+        if key is None:
+            return None
+        
+        now = self.clock()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+            
+            if row is None:
+                self.misses += 1
+                return None
+            
+            value, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                # Expired entries are dropped on read
+                self._conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            
+            self._conn.execute("UPDATE analysis_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return json.loads(value)
+    
+    def set(self, key, value):
+        """Store a JSON-serializable value and evict the least recently used overflow"""
+        if key is None:
+            return
+        
+        now = self.clock()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            if self.ttl:
+                self._conn.execute("DELETE FROM analysis_cache WHERE created_at < ?", (now - self.ttl,))
+            self._conn.execute(
+                """DELETE FROM analysis_cache WHERE key IN (
+                    SELECT key FROM analysis_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+    
+    def clear(self):
+        """Remove every cached entry and reset the counters"""
+        with self._lock:
+            self._conn.execute("DELETE FROM analysis_cache")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self):
+        """Return hit/miss counters and the current number of entries"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache():
+    """Return the process-wide analysis cache, or None when caching is disabled"""
+    global _cache
+    if not config.ANALYSIS_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnalysisCache()
+        return _cache
\ No newline at end of file
@@ -0,0 +1,152 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import config
+
+# Model labels used across the views: (provider, chat model, vision model)
+MODEL_TARGETS = {
+    "Gemini": ("gemini", None, None),
+    "OpenRouter - Claude": ("openrouter", "anthropic/claude-3-opus", "anthropic/claude-3-opus"),
+    "OpenRouter - GPT-4": ("openrouter", "openai/gpt-4", "openai/gpt-4-vision"),
+}
+
+
+def is_acceptable(response):
+    """Default acceptance check: a non-empty answer that is not an error message"""
+    return bool(response) and not str(response).startswith(("Error", "Unsupported"))
+
+
+class BackgroundEventLoop:
+    """An asyncio event loop running in a daemon thread, shared by sync callers"""
+    
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="ai-event-loop", daemon=True)
+        self._thread.start()
+    
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the shared loop and block until it finishes"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+
+class AsyncAIService:
+    """Asyncio interface over GeminiService/OpenRouterService with connection limits
+    
+    The provider SDK and HTTP client are blocking, so each call runs on a
+    bounded executor while a per-provider semaphore caps requests in flight.
+    """
+    
+    def __init__(self, gemini_service=None, openrouter_service=None, max_concurrency=None, loop_runner=None):
+        self._services = {"gemini": gemini_service, "openrouter": openrouter_service}
+        self.max_concurrency = max_concurrency or config.AI_MAX_CONCURRENCY
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency * len(self._services), thread_name_prefix="ai-call"
+        )
+        self._semaphores = {}
+        self._loop_runner = loop_runner
+    
+    def _service(self, provider):
+        """Return the injected service or the shared instance from the registry"""
+        if self._services[provider] is not None:
+            return self._services[provider]
+        
+        from app.services.registry import get_service_registry
+        return get_service_registry().get(provider)
+    
+    def _semaphore(self, provider):
+        """Return the semaphore limiting concurrent calls to a provider on this loop"""
+        key = (provider, id(asyncio.get_running_loop()))
+        if key not in self._semaphores:
+            self._semaphores[key] = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphores[key]
+    
+    async def _call(self, provider, method, *args, **kwargs):
+        """Run a blocking service method without blocking the event loop"""
+        async with self._semaphore(provider):
+            loop = asyncio.get_running_loop()
+            func = functools.partial(getattr(self._service(provider), method), *args, **kwargs)
+            return await loop.run_in_executor(self._executor, func)
+    
+    async def get_response(self, prompt, target="Gemini"):
+        """Get a text response from the model behind a target label"""
+        provider, chat_model, _ = MODEL_TARGETS[target]
+        if provider == "gemini":
+            return await self._call(provider, "get_response", prompt)
+        return await self._call(provider, "get_response", prompt, model=chat_model)
+    
+    async def analyze_image(self, image_data, prompt=None, target="Gemini"):
+        """Analyze an image with the vision model behind a target label"""
+        provider, _, vision_model = MODEL_TARGETS[target]
+        if provider == "gemini":
+            return await self._call(provider, "analyze_image", image_data, prompt)
+        return await self._call(provider, "analyze_image", image_data, prompt, model=vision_model)
+    
+    async def fan_out(self, prompt, targets=None, first_acceptable=False, accept=is_acceptable, timeout=None):
+        """Query several models concurrently
+        
+        Returns a {target: response} dict with every answer, or with only the
+        first acceptable one when first_acceptable is set. Wall-clock time is
+        that of the slowest (or first acceptable) model, not the sum.
+        """
+        targets = list(targets or MODEL_TARGETS)
+        tasks = {asyncio.ensure_future(self.get_response(prompt, target)): target for target in targets}
+        results = {}
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        pending = set(tasks)
+        try:
+            while pending:
+                remaining = max(0.0, deadline - loop.time()) if deadline else None
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    target = tasks[task]
+                    try:
+                        results[target] = task.result()
+                    except Exception as e:
+                        results[target] = f"Error communicating with {target}: {str(e)}"
+                    if first_acceptable and accept(results[target]):
+                        return {target: results[target]}
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        if first_acceptable:
+            # Nothing acceptable came back; hand over whatever we have
+            return results
+        for task in pending:
+            results.setdefault(tasks[task], f"Error communicating with {tasks[task]}: timed out")
+        return {target: results[target] for target in targets if target in results}
+    
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the shared background loop from synchronous code"""
+        if self._loop_runner is None:
+            self._loop_runner = get_event_loop_runner()
+        return self._loop_runner.run(coro, timeout)
+
+
+_loop_runner = None
+_async_service = None
+_lock = threading.Lock()
+
+
+def get_event_loop_runner():
+    """Return the process-wide background event loop"""
+    global _loop_runner
+    with _lock:
+        if _loop_runner is None:
+            _loop_runner = BackgroundEventLoop()
+        return _loop_runner
+
+
+def get_async_ai_service():
+    """Return the process-wide async AI service"""
+    global _async_service
+    runner = get_event_loop_runner()
+    with _lock:
+        if _async_service is None:
+            _async_service = AsyncAIService(loop_runner=runner)
+        return _async_service
\ No newline at end of file
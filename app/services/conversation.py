@@ -0,0 +1,210 @@
+import datetime
+import math
+import queue
+import re
+import threading
+import time
+from sqlalchemy import and_, insert, or_, select
+import config
+from app.database import get_engine
+from app.models.user import ChatHistory
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English text)"""
+    return math.ceil(len(text or "") / 4)
+
+
+def _first_sentence(text, max_chars=160):
+    """Return the first sentence of a text, clipped to max_chars"""
+    text = " ".join((text or "").split())
+    match = re.match(r"(.+?[.!?])(\s|$)", text)
+    sentence = match.group(1) if match else text
+    if len(sentence) > max_chars:
+        sentence = sentence[:max_chars - 3].rstrip() + "..."
+    return sentence
+
+
+def extractive_summary(summary, evicted_turns, token_budget):
+    """Fold evicted turns into the running summary without another model call
+    
+    Each turn is reduced to its first sentence; the oldest lines are dropped
+    once the summary exceeds its own token budget.
+    """
+    lines = summary.splitlines() if summary else []
+    for turn in evicted_turns:
+        speaker = "Farmer asked" if turn["role"] == "user" else "Assistant advised"
+        lines.append(f"- {speaker}: {_first_sentence(turn['content'])}")
+    
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > token_budget:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class ChatHistoryStore:
+    """Writes chat exchanges to ChatHistory in the background and pages them back"""
+    
+    def __init__(self, database_url=None, asynchronous=True, batch_size=50):
+        self.engine = get_engine(database_url)
+        self.asynchronous = asynchronous
+        self.batch_size = batch_size
+        self.last_error = None
+        self._queue = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+    
+    def save(self, user_id, query, response, model_used=None, session_id=None):
+        """Queue one query/response exchange for writing"""
+        row = {
+            "user_id": user_id,
+            "session_id": session_id,
+            "timestamp": datetime.datetime.utcnow(),
+            "query": query,
+            "response": response,
+            "model_used": model_used
+        }
+        if not self.asynchronous:
+            self._write([row])
+            return
+        
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="chat-history-writer", daemon=True)
+                self._writer.start()
+        self._queue.put(row)
+    
+    def flush(self):
+        """Block until every queued exchange has been written"""
+        self._queue.join()
+    
+    def _run(self):
+        """Writer loop: drain the queue and insert rows in batches
+        
+        A batch that fails to write is retried, topped up with newer rows,
+        up to CHAT_HISTORY_WRITE_RETRIES times before it is dropped; flush
+        waits for those retries.
+        """
+        retry, failures = [], 0
+        while True:
+            batch = retry or [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                self.last_error = str(e)
+                failures += 1
+                if failures <= config.CHAT_HISTORY_WRITE_RETRIES:
+                    retry = batch
+                    time.sleep(config.CHAT_HISTORY_RETRY_DELAY)
+                    continue
+            retry, failures = [], 0
+            for _ in batch:
+                self._queue.task_done()
+    
+    def _write(self, rows):
+        """Insert rows in one transaction"""
+        with self.engine.begin() as conn:
+            conn.execute(insert(ChatHistory.__table__), rows)
+    
+    def fetch_page(self, user_id, cursor=None, limit=None, session_id=None):
+        """Return (exchanges oldest first, cursor for the next older page)
+        
+        A signed-in user's history is keyed by user_id; without one, only the
+        exchanges of the same anonymous session_id are returned, and nothing
+        without either. Keyset pagination on (timestamp, id): each page is an
+        index range scan, so deep history costs the same as the first page.
+        """
+        table = ChatHistory.__table__
+        limit = limit or config.CHAT_HISTORY_PAGE_SIZE
+        
+        if user_id is not None:
+            owner = table.c.user_id == user_id
+        elif session_id is not None:
+            owner = and_(table.c.user_id.is_(None), table.c.session_id == session_id)
+        else:
+            return [], None
+        query = select(table).where(owner)
+        if cursor is not None:
+            timestamp, row_id = cursor
+            query = query.where(or_(
+                table.c.timestamp < timestamp,
+                and_(table.c.timestamp == timestamp, table.c.id < row_id)
+            ))
+        query = query.order_by(table.c.timestamp.desc(), table.c.id.desc()).limit(limit)
+        
+        with self.engine.connect() as conn:
+            rows = [dict(row._mapping) for row in conn.execute(query)]
+        
+        next_cursor = (rows[-1]["timestamp"], rows[-1]["id"]) if len(rows) == limit else None
+        return list(reversed(rows)), next_cursor
+
+
+class ConversationManager:
+    """Token-budgeted sliding window over a chat with a compact memory of older turns"""
+    
+    def __init__(self, user_id=None, token_budget=None, summary_budget=None, summarizer=None, store=None, session_id=None):
+        self.user_id = user_id
+        self.session_id = session_id
+        self.token_budget = token_budget or config.CHAT_CONTEXT_TOKEN_BUDGET
+        self.summary_budget = summary_budget or config.CHAT_SUMMARY_TOKEN_BUDGET
+        self.summarizer = summarizer or extractive_summary
+        self.store = store
+        self.turns = []
+        self.summary = ""
+        self.persist_error = None
+    
+    @property
+    def window_tokens(self):
+        """Tokens currently held in the window"""
+        return sum(estimate_tokens(turn["content"]) for turn in self.turns)
+    
+    def add_exchange(self, query, response, model_used=None):
+        """Record a query/response pair, persist it and keep the window within budget"""
+        self.turns.append({"role": "user", "content": query})
+        self.turns.append({"role": "assistant", "content": response})
+        
+        # A failed write must not break the consultation itself
+        if self.store is not None:
+            try:
+                self.store.save(self.user_id, query, response, model_used, self.session_id)
+            except Exception as e:
+                self.persist_error = str(e)
+        
+        self._compact()
+    
+    def _compact(self):
+        """Move the oldest exchanges into the summary until the window fits the budget"""
+        evicted = []
+        # Always keep the latest exchange verbatim
+        while len(self.turns) > 2 and self.window_tokens > self.token_budget:
+            evicted.extend(self.turns[:2])
+            del self.turns[:2]
+        
+        if evicted:
+            self.summary = self.summarizer(self.summary, evicted, self.summary_budget)
+    
+    def context_messages(self):
+        """Return OpenRouter-style messages: memory first, then the recent window"""
+        messages = []
+        if self.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"})
+        return messages + [dict(turn) for turn in self.turns]
+    
+    def gemini_history(self, system_prompt):
+        """Return Gemini chat history primed with the system prompt and memory"""
+        primer = system_prompt
+        if self.summary:
+            primer += f"\n\nSummary of the earlier conversation:\n{self.summary}"
+        
+        history = [
+            {"role": "user", "parts": [primer]},
+            {"role": "model", "parts": ["Understood. How can I help with your melons?"]}
+        ]
+        for turn in self.turns:
+            role = "user" if turn["role"] == "user" else "model"
+            history.append({"role": role, "parts": [turn["content"]]})
+        return history
\ No newline at end of file
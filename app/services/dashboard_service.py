@@ -0,0 +1,145 @@
+import datetime
+import pandas as pd
+from sqlalchemy import func, select
+from app.database import get_engine
+from app.models import DailyMeasurementRollup, HourlyMeasurementRollup, Plant, PlantAnalysis
+from app.services.alert_engine import get_alert_engine
+from app.services.performance_summary import PerformanceSummary
+from app.services.yield_model import get_yield_model
+
+
+class DashboardService:
+    """SQL aggregates behind the dashboard charts
+    
+    Everything is computed in the database; raw measurements are only read
+    through the rollups and the materialized performance summaries, so each
+    call returns a small DataFrame or dict regardless of how many readings
+    are stored.
+    """
+    
+    def __init__(self, database_url=None):
+        self.engine = get_engine(database_url)
+        self.summary = PerformanceSummary(database_url)
+        self.yield_model = get_yield_model(database_url)
+        self.alert_engine = get_alert_engine(database_url)
+    
+    def _frame(self, query, columns=None):
+        """Run a query and return its rows as a DataFrame"""
+        with self.engine.connect() as conn:
+            result = conn.execute(query)
+            return pd.DataFrame(result.fetchall(), columns=columns or list(result.keys()))
+    
+    def _scalar(self, query):
+        """Run a query returning a single value"""
+        with self.engine.connect() as conn:
+            return conn.execute(query).scalar()
+    
+    def overview(self, now=None):
+        """Headline metrics with their change over the previous period"""
+        now = now or datetime.datetime.utcnow()
+        plants = Plant.__table__
+        analyses = PlantAnalysis.__table__
+        hourly = HourlyMeasurementRollup.__table__
+        
+        def average_health(start, end):
+            return self._scalar(select(func.avg(analyses.c.health_score)).where(
+                analyses.c.analysis_date >= start, analyses.c.analysis_date < end
+            ))
+        
+        def readings(start, end):
+            return self._scalar(select(func.coalesce(func.sum(hourly.c.samples), 0)).where(
+                hourly.c.bucket_start >= start, hourly.c.bucket_start < end
+            ))
+        
+        month, day, week = datetime.timedelta(days=30), datetime.timedelta(days=1), datetime.timedelta(days=7)
+        return {
+            "active_plants": self._scalar(select(func.count()).where(plants.c.is_active.is_(True))),
+            "new_plants": self._scalar(select(func.count()).where(plants.c.planting_date >= now - week)),
+            "avg_health": average_health(now - month, now),
+            "previous_avg_health": average_health(now - 2 * month, now - month),
+            "readings_24h": readings(now - day, now),
+            "previous_readings_24h": readings(now - 2 * day, now - day),
+            "analyses_7d": self._scalar(select(func.count()).where(analyses.c.analysis_date >= now - week)),
+        }
+    
+    def recent_activities(self, limit=10):
+        """Latest plantings, harvests and detected diseases, newest first"""
+        plants = Plant.__table__
+        analyses = PlantAnalysis.__table__
+        activities = []
+        
+        with self.engine.connect() as conn:
+            for row in conn.execute(
+                select(plants.c.planting_date, plants.c.name, plants.c.variety)
+                .where(plants.c.planting_date.isnot(None))
+                .order_by(plants.c.planting_date.desc()).limit(limit)
+            ):
+                activities.append((row.planting_date, f"Planted {row.name} (Variety: {row.variety})", "Plant"))
+            
+            for row in conn.execute(
+                select(plants.c.harvest_date, plants.c.name)
+                .where(plants.c.harvest_date.isnot(None))
+                .order_by(plants.c.harvest_date.desc()).limit(limit)
+            ):
+                activities.append((row.harvest_date, f"Harvested {row.name}", "Harvest"))
+            
+            for row in conn.execute(
+                select(analyses.c.analysis_date, analyses.c.disease_name, plants.c.name)
+                .join(plants, plants.c.id == analyses.c.plant_id)
+                .where(analyses.c.disease_detected.is_(True))
+                .order_by(analyses.c.analysis_date.desc()).limit(limit)
+            ):
+                disease = row.disease_name or "a disease"
+                activities.append((row.analysis_date, f"Detected {disease} in {row.name}", "Health"))
+        
+        frame = pd.DataFrame(activities, columns=["date", "activity", "type"])
+        return frame.sort_values("date", ascending=False).head(limit).reset_index(drop=True)
+    
+    def plants(self):
+        """Active plants for selection widgets"""
+        plants = Plant.__table__
+        return self._frame(
+            select(plants.c.id, plants.c.name, plants.c.variety)
+            .where(plants.c.is_active.is_(True))
+            .order_by(plants.c.name)
+        )
+    
+    def daily_conditions(self, start, end, plant_id=None):
+        """Mean height, temperature and humidity per day, from the daily rollup"""
+        daily = DailyMeasurementRollup.__table__
+        columns = [daily.c.bucket_start.label("date")]
+        for metric in ("height", "temperature", "humidity"):
+            total, count = func.sum(daily.c[f"{metric}_sum"]), func.sum(daily.c[f"{metric}_count"])
+            columns.append((total / func.nullif(count, 0)).label(metric))
+        
+        query = select(*columns).where(daily.c.bucket_start >= start, daily.c.bucket_start < end)
+        if plant_id is not None:
+            query = query.where(daily.c.plant_id == plant_id)
+        return self._frame(query.group_by(daily.c.bucket_start).order_by(daily.c.bucket_start))
+    
+    def health_trend(self, start, end, plant_id=None):
+        """Mean analysis health score per day"""
+        analyses = PlantAnalysis.__table__
+        day = func.date(analyses.c.analysis_date)
+        query = select(day.label("date"), func.avg(analyses.c.health_score).label("health_score")).where(
+            analyses.c.analysis_date >= start, analyses.c.analysis_date < end, analyses.c.health_score.isnot(None)
+        )
+        if plant_id is not None:
+            query = query.where(analyses.c.plant_id == plant_id)
+        return self._frame(query.group_by(day).order_by(day))
+    
+    def health_alerts(self, start, end, plant_id=None):
+        """Rule engine alerts active between start and end"""
+        return self.alert_engine.alerts(start, end, plant_id)
+    
+    def media_performance(self):
+        """Growth rate, yield and fruit count per growing medium (materialized)"""
+        return self.summary.media_summary()
+    
+    def irrigation_usage(self):
+        """Water use, water per kg of yield and growth rate per irrigation system (materialized)"""
+        return self.summary.irrigation_summary()
+    
+    def yield_predictions(self):
+        """Predicted yield for every variety x growing medium x irrigation system"""
+        return self.yield_model.yield_grid()
\ No newline at end of file
@@ -0,0 +1,17 @@
+import threading
+
+_versions = {}
+_lock = threading.Lock()
+
+
+def get_data_version(name):
+    """Return the change counter for a data set (e.g. "measurements")"""
+    with _lock:
+        return _versions.get(name, 0)
+
+
+def bump_data_version(name):
+    """Mark a data set as changed so cached aggregates over it are recomputed"""
+    with _lock:
+        _versions[name] = _versions.get(name, 0) + 1
+        return _versions[name]
\ No newline at end of file
@@ -2,13 +2,18 @@ import google.generativeai as genai
 import config
 from PIL import Image
 import io
+from app.services.analysis_cache import AnalysisCache, get_analysis_cache
 
 class GeminiService:
-    def __init__(self):
+    def __init__(self, cache=None):
         self.api_key = config.GEMINI_API_KEY
         genai.configure(api_key=self.api_key)
         self.model = genai.GenerativeModel('gemini-pro')
-        self.vision_model = genai.GenerativeModel('gemini-pro-vision')
+        self.vision_model_name = 'gemini-pro-vision'
+        self.vision_model = genai.GenerativeModel(self.vision_model_name)
+        
+        # Shared cache of vision results keyed by image hash, prompt and model
+        self.cache = cache if cache is not None else get_analysis_cache()
         
         # Set up a default system prompt for melon cultivation expertise
         self.system_prompt = """
@@ -22,25 +27,37 @@ class GeminiService:
     def get_response(self, prompt, chat_history=None):
         """Get a text response from Gemini"""
         try:
-            if not chat_history:
-                chat = self.model.start_chat(history=[])
-                chat.send_message(self.system_prompt)
-            else:
-                chat = self.model.start_chat(history=chat_history)
+            chat = self._start_chat(chat_history)
             
             response = chat.send_message(prompt)
             return response.text
         except Exception as e:
             return f"Error communicating with Gemini API: {str(e)}"
     
+    def stream_response(self, prompt, chat_history=None):
+        """Yield a text response from Gemini chunk by chunk as it is generated"""
+        try:
+            chat = self._start_chat(chat_history)
+            
+            response = chat.send_message(prompt, stream=True)
+            for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+        except Exception as e:
+            yield f"Error communicating with Gemini API: {str(e)}"
+    
+    def _start_chat(self, chat_history=None):
+        """Start a chat session primed with the system prompt or the given history"""
+        if not chat_history:
+            chat = self.model.start_chat(history=[])
+            chat.send_message(self.system_prompt)
+        else:
+            chat = self.model.start_chat(history=chat_history)
+        return chat
+    
     def analyze_image(self, image_data, prompt=None):
         """Analyze an image using Gemini Vision"""
         try:
-            if isinstance(image_data, bytes):
-                image = Image.open(io.BytesIO(image_data))
-            else:
-                image = image_data
-                
             if not prompt:
                 prompt = """
                 Analyze this melon plant image. Identify:
@@ -50,7 +67,20 @@ class GeminiService:
                 4. Recommendations for the farmer
                 """
             
+            cache_key = AnalysisCache.make_key(image_data, prompt, self.vision_model_name) if self.cache else None
+            if cache_key:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return cached
+            
+            if isinstance(image_data, bytes):
+                image = Image.open(io.BytesIO(image_data))
+            else:
+                image = image_data
+            
             response = self.vision_model.generate_content([prompt, image])
+            if cache_key:
+                self.cache.set(cache_key, response.text)
             return response.text
         except Exception as e:
             return f"Error analyzing image: {str(e)}"
\ No newline at end of file
@@ -0,0 +1,251 @@
+import datetime
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, func, or_, select
+import config
+from app.database import get_engine
+from app.models import DailyMeasurementRollup, Plant, PlantGrowthFit, PlantGrowthSummary
+
+DAY = datetime.timedelta(days=1)
+
+
+def logistic(days, params):
+    """Heights of logistic curves; params is (plants, 3) of max_height, rate, midpoint"""
+    max_height, rate, midpoint = (params[:, i:i + 1] for i in range(3))
+    return max_height / (1.0 + np.exp(np.clip(-rate * (days - midpoint), -50.0, 50.0)))
+
+
+def initial_params(days, heights, mask):
+    """Starting curves from a straight-line fit of the logit of height against day"""
+    max_height = np.where(mask, heights, 0.0).max(axis=1) * 1.25 + 1e-3
+    ratio = np.clip(heights / max_height[:, None], 1e-3, 1 - 1e-3)
+    logit = np.log(ratio / (1.0 - ratio))
+    
+    weight = mask.astype(float)
+    count = np.maximum(weight.sum(axis=1), 1.0)
+    mean_day = (weight * days).sum(axis=1) / count
+    mean_logit = (weight * logit).sum(axis=1) / count
+    spread = (weight * (days - mean_day[:, None]) ** 2).sum(axis=1)
+    slope = (weight * (days - mean_day[:, None]) * (logit - mean_logit[:, None])).sum(axis=1) / np.maximum(spread, 1e-9)
+    
+    # Flat or shrinking series get a gentle curve centred on their data
+    rate = np.where(slope > 1e-3, slope, 0.05)
+    midpoint = np.where(slope > 1e-3, mean_day - mean_logit / rate, mean_day)
+    return np.column_stack([max_height, rate, midpoint])
+
+
+def fit_logistic(days, heights, mask, initial=None, iterations=None):
+    """Batched Levenberg-Marquardt fit of one logistic curve per row
+    
+    days, heights and mask are (plants, points) arrays padded to the longest
+    series; padded points have mask False. Returns the (plants, 3) parameters
+    and the RMSE of each fit.
+    """
+    iterations = iterations or config.GROWTH_FIT_ITERATIONS
+    params = initial_params(days, heights, mask) if initial is None else initial.copy()
+    weight = mask.astype(float)
+    lower = np.array([1e-3, 1e-4, -np.inf])
+    upper = np.array([config.GROWTH_FIT_MAX_HEIGHT, 5.0, np.inf])
+    
+    def sse(candidate):
+        return ((logistic(days, candidate) - heights) ** 2 * weight).sum(axis=1)
+    
+    params = np.clip(params, lower, upper)
+    error = sse(params)
+    damping = np.full(len(params), 1e-3)
+    done = np.zeros(len(params), dtype=bool)
+    for _ in range(iterations):
+        max_height, rate, midpoint = (params[:, i:i + 1] for i in range(3))
+        share = logistic(days, params) / max_height
+        slope = max_height * share * (1.0 - share)
+        jacobian = np.stack([share, slope * (days - midpoint), -slope * rate], axis=2) * weight[:, :, None]
+        residual = (max_height * share - heights) * weight
+        
+        normal = np.einsum("ptk,ptl->pkl", jacobian, jacobian)
+        gradient = np.einsum("ptk,pt->pk", jacobian, residual)
+        scale = np.einsum("pkk->pk", normal) + 1e-9
+        system = normal + damping[:, None, None] * scale[:, :, None] * np.eye(3)
+        step = -np.linalg.solve(system, gradient[:, :, None])[:, :, 0]
+        
+        candidate = np.clip(params + step, lower, upper)
+        candidate_error = sse(candidate)
+        better = candidate_error < error
+        params = np.where(better[:, None], candidate, params)
+        improvement = np.where(better, error - candidate_error, 0.0)
+        error = np.where(better, candidate_error, error)
+        damping = np.where(better, damping / 3.0, np.minimum(damping * 4.0, 1e8))
+        # A fit is done once accepted steps stop helping or no step is accepted at any damping
+        done |= (better & (improvement <= 1e-9 * error)) | (damping >= 1e8)
+        if done.all():
+            break
+    
+    return params, np.sqrt(error / np.maximum(weight.sum(axis=1), 1.0))
+
+
+def _pad(frame):
+    """Pad per-plant daily series into (plants, points) arrays"""
+    plant_ids = frame["plant_id"].unique()
+    row = pd.factorize(frame["plant_id"])[0]
+    column = frame.groupby("plant_id").cumcount().to_numpy()
+    shape = (len(plant_ids), column.max() + 1)
+    days, heights, mask = np.zeros(shape), np.zeros(shape), np.zeros(shape, dtype=bool)
+    days[row, column] = frame["day"].to_numpy(dtype=float)
+    heights[row, column] = frame["height"].to_numpy(dtype=float)
+    mask[row, column] = True
+    # Padding repeats each series' last day so it adds nothing to the fit
+    days = np.where(mask, days, np.take_along_axis(days, (mask.sum(axis=1) - 1)[:, None], axis=1))
+    return plant_ids, days, heights, mask
+
+
+class GrowthForecaster:
+    """Per-plant logistic growth curves fitted from the daily measurement rollups
+    
+    A fit is stored with the reading count it saw, so update() only refits
+    plants that received measurements since, warm-started from their previous
+    curve. All plants are fitted and forecast together as NumPy batches.
+    """
+    
+    def __init__(self, database_url=None):
+        self.engine = get_engine(database_url)
+    
+    def _frame(self, query):
+        """Run a query and return its rows as a DataFrame"""
+        with self.engine.connect() as conn:
+            result = conn.execute(query)
+            return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+    
+    def update(self, plant_ids=None):
+        """Refit the plants whose measurements changed since their last fit; returns how many were fitted"""
+        plants = Plant.__table__
+        summary = PlantGrowthSummary.__table__
+        fits = PlantGrowthFit.__table__
+        daily = DailyMeasurementRollup.__table__
+        
+        stale = (
+            select(
+                summary.c.plant_id, summary.c.readings,
+                func.coalesce(plants.c.planting_date, summary.c.first_measured).label("origin"),
+                fits.c.max_height, fits.c.rate, fits.c.midpoint
+            )
+            .join(plants, plants.c.id == summary.c.plant_id)
+            .outerjoin(fits, fits.c.plant_id == summary.c.plant_id)
+            .where(or_(fits.c.readings.is_(None), fits.c.readings != summary.c.readings))
+        )
+        if plant_ids is not None:
+            stale = stale.where(summary.c.plant_id.in_(plant_ids))
+        stale = self._frame(stale)
+        if stale.empty:
+            return 0
+        
+        series = self._frame(
+            select(daily.c.plant_id, daily.c.bucket_start, (daily.c.height_sum / daily.c.height_count).label("height"))
+            .where(daily.c.plant_id.in_(stale["plant_id"].tolist()), daily.c.height_count > 0)
+            .order_by(daily.c.plant_id, daily.c.bucket_start)
+        )
+        stale = stale.set_index("plant_id")
+        if not series.empty:
+            points = series.groupby("plant_id")["height"].transform("size")
+            series = series[points >= config.GROWTH_FIT_MIN_POINTS].copy()
+        
+        if series.empty:
+            return 0
+        
+        origins = pd.to_datetime(stale.loc[series["plant_id"], "origin"]).to_numpy()
+        # Daily buckets are timestamped at midnight; count from the middle of the day
+        series["day"] = (pd.to_datetime(series["bucket_start"]).to_numpy() - origins) / np.timedelta64(1, "D") + 0.5
+        plant_ids, days, heights, mask = _pad(series)
+        
+        previous = stale.loc[plant_ids, ["max_height", "rate", "midpoint"]].to_numpy(dtype=float)
+        initial = initial_params(days, heights, mask)
+        warm = ~np.isnan(previous).any(axis=1)
+        initial[warm] = previous[warm]
+        params, rmse = fit_logistic(days, heights, mask, initial)
+        
+        now = datetime.datetime.utcnow()
+        with self.engine.begin() as conn:
+            conn.execute(delete(fits).where(fits.c.plant_id.in_([int(plant_id) for plant_id in plant_ids])))
+            conn.execute(fits.insert(), [
+                {
+                    "plant_id": int(plant_id), "origin": pd.Timestamp(stale.at[plant_id, "origin"]).to_pydatetime(),
+                    "max_height": float(curve[0]), "rate": float(curve[1]), "midpoint": float(curve[2]),
+                    "rmse": float(error), "points": int(count), "readings": int(stale.at[plant_id, "readings"]),
+                    "updated_at": now
+                }
+                for plant_id, curve, error, count in zip(plant_ids, params, rmse, mask.sum(axis=1))
+            ])
+        return len(plant_ids)
+    
+    def fits(self, active_only=True):
+        """Current curves with plant names, refitting stale plants first"""
+        self.update()
+        plants = Plant.__table__
+        fits = PlantGrowthFit.__table__
+        query = (
+            select(plants.c.name, plants.c.variety, fits)
+            .join(plants, plants.c.id == fits.c.plant_id)
+            .order_by(plants.c.name)
+        )
+        if active_only:
+            query = query.where(plants.c.is_active.is_(True))
+        return self._frame(query)
+    
+    def forecast(self, days=None, now=None):
+        """Daily forecast heights of every active plant, as one long DataFrame"""
+        days = config.GROWTH_FORECAST_DAYS if days is None else days
+        fits = self.fits()
+        if fits.empty:
+            return pd.DataFrame(columns=["plant_id", "name", "date", "height"])
+        
+        today = pd.Timestamp(now or datetime.datetime.utcnow()).normalize()
+        dates = today + pd.to_timedelta(np.arange(days + 1), unit="D")
+        offset = (today - pd.to_datetime(fits["origin"])) / DAY
+        heights = logistic(offset.to_numpy()[:, None] + np.arange(days + 1), fits[["max_height", "rate", "midpoint"]].to_numpy())
+        return pd.DataFrame({
+            "plant_id": np.repeat(fits["plant_id"].to_numpy(), days + 1),
+            "name": np.repeat(fits["name"].to_numpy(), days + 1),
+            "date": np.tile(dates, len(fits)),
+            "height": heights.ravel(),
+        })
+    
+    def farm_summary(self, days=None, now=None):
+        """Per-plant current and forecast height and days left until 90% of mature height"""
+        days = config.GROWTH_FORECAST_DAYS if days is None else days
+        fits = self.fits()
+        if fits.empty:
+            return pd.DataFrame(columns=["plant_id", "name", "variety", "height", "forecast", "max_height", "days_to_90"])
+        
+        params = fits[["max_height", "rate", "midpoint"]].to_numpy()
+        today = pd.Timestamp(now or datetime.datetime.utcnow()).normalize()
+        offset = ((today - pd.to_datetime(fits["origin"])) / DAY).to_numpy()
+        heights = logistic(np.column_stack([offset, offset + days]), params)
+        return pd.DataFrame({
+            "plant_id": fits["plant_id"],
+            "name": fits["name"],
+            "variety": fits["variety"],
+            "height": heights[:, 0],
+            "forecast": heights[:, 1],
+            "max_height": fits["max_height"],
+            "days_to_90": np.maximum(fits["midpoint"] + np.log(9.0) / fits["rate"] - offset, 0.0),
+        })
+    
+    def plant_curve(self, plant_id, days=None, now=None):
+        """Measured daily mean heights of a plant and its fitted curve through the forecast window"""
+        days = config.GROWTH_FORECAST_DAYS if days is None else days
+        self.update([plant_id])
+        daily = DailyMeasurementRollup.__table__
+        fits = PlantGrowthFit.__table__
+        measured = self._frame(
+            select(daily.c.bucket_start.label("date"), (daily.c.height_sum / daily.c.height_count).label("height"))
+            .where(daily.c.plant_id == plant_id, daily.c.height_count > 0)
+            .order_by(daily.c.bucket_start)
+        )
+        fit = self._frame(select(fits).where(fits.c.plant_id == plant_id))
+        if fit.empty:
+            return measured, None
+        
+        origin = pd.Timestamp(fit.at[0, "origin"])
+        start = pd.to_datetime(measured["date"]).min() if not measured.empty else origin
+        end = pd.Timestamp(now or datetime.datetime.utcnow()).normalize() + days * DAY
+        dates = pd.date_range(start.normalize(), end, freq="D")
+        heights = logistic(((dates - origin) / DAY).to_numpy()[None, :], fit[["max_height", "rate", "midpoint"]].to_numpy())
+        return measured, pd.DataFrame({"date": dates, "height": heights[0]})
\ No newline at end of file
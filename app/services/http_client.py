@@ -0,0 +1,145 @@
+import email.utils
+import threading
+import time
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+import config
+
+# Statuses worth retrying: rate limiting and transient server failures
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class LatencyMetrics:
+    """Thread-safe rolling latency samples per endpoint"""
+    
+    def __init__(self, max_samples=500):
+        self.max_samples = max_samples
+        self._samples = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+    
+    def record(self, name, elapsed, status=None, attempts=1, error=None):
+        """Record one logical call (including its retries)"""
+        with self._lock:
+            samples = self._samples.setdefault(name, deque(maxlen=self.max_samples))
+            samples.append(elapsed)
+            counters = self._counters.setdefault(name, {"calls": 0, "errors": 0, "retries": 0, "last_status": None})
+            counters["calls"] += 1
+            counters["retries"] += attempts - 1
+            counters["last_status"] = status
+            if error is not None or (status is not None and status >= 400):
+                counters["errors"] += 1
+    
+    def summary(self):
+        """Return call counts and latency percentiles (ms) per endpoint"""
+        with self._lock:
+            result = {}
+            for name, samples in self._samples.items():
+                ordered = sorted(samples)
+                result[name] = dict(
+                    self._counters[name],
+                    mean_ms=sum(ordered) / len(ordered) * 1000,
+                    p50_ms=ordered[len(ordered) // 2] * 1000,
+                    p95_ms=ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                    max_ms=ordered[-1] * 1000,
+                )
+            return result
+    
+    def reset(self):
+        """Drop every recorded sample"""
+        with self._lock:
+            self._samples.clear()
+            self._counters.clear()
+
+
+class HttpClient:
+    """Pooled keep-alive HTTP session with timeouts and backoff retries"""
+    
+    def __init__(self, connect_timeout=None, read_timeout=None, max_retries=None,
+                 backoff_factor=None, max_backoff=None, pool_maxsize=None, sleep=time.sleep):
+        self.connect_timeout = connect_timeout or config.HTTP_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or config.HTTP_READ_TIMEOUT
+        self.max_retries = config.HTTP_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_factor = config.HTTP_BACKOFF_FACTOR if backoff_factor is None else backoff_factor
+        self.max_backoff = max_backoff or config.HTTP_MAX_BACKOFF
+        self.sleep = sleep
+        self.metrics = LatencyMetrics()
+        
+        # Retries are handled below so Retry-After and metrics see every attempt
+        pool_maxsize = pool_maxsize or config.HTTP_POOL_MAXSIZE
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+    
+    def post(self, url, metric=None, **kwargs):
+        """Send a POST request, see request()"""
+        return self.request("POST", url, metric=metric, **kwargs)
+    
+    def request(self, method, url, metric=None, **kwargs):
+        """Send a request, retrying connection errors, timeouts, 429 and 5xx responses
+        
+        The final response is returned even when its status is an error, so
+        callers keep using raise_for_status() as before.
+        """
+        kwargs.setdefault("timeout", (self.connect_timeout, self.read_timeout))
+        metric = metric or f"{method} {url}"
+        
+        attempt = 0
+        start = time.perf_counter()
+        while True:
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    self.metrics.record(metric, time.perf_counter() - start, attempts=attempt + 1, error=e)
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    self.metrics.record(metric, time.perf_counter() - start, response.status_code, attempt + 1)
+                    return response
+                delay = self._retry_after(response)
+                if delay is None:
+                    delay = self._backoff(attempt)
+                response.close()
+            
+            attempt += 1
+            self.sleep(delay)
+    
+    def _backoff(self, attempt):
+        """Exponential backoff delay in seconds for the given attempt"""
+        return min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+    
+    def _retry_after(self, response):
+        """Parse a Retry-After header (seconds or HTTP date) into a delay"""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                retry_at = email.utils.parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return None
+            delay = retry_at.timestamp() - time.time()
+        return min(self.max_backoff, max(0.0, delay))
+    
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """Return the process-wide pooled HTTP client"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
\ No newline at end of file
@@ -2,25 +2,56 @@ import cv2
 import numpy as np
 from PIL import Image
 import io
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import config
-from app.services.gemini_service import GeminiService
-from app.services.openrouter_service import OpenRouterService
+from app.services.analysis_cache import AnalysisCache, get_analysis_cache
+from app.services.registry import get_service_registry
+
+
+def _decode_image(image_data):
+    """Decode raw bytes or a pixel array into a BGR OpenCV image"""
+    if isinstance(image_data, bytes):
+        nparr = np.frombuffer(image_data, np.uint8)
+        return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    if isinstance(image_data, np.ndarray):
+        # RGB pixels shipped from the parent process (see analyze_batch)
+        return cv2.cvtColor(image_data, cv2.COLOR_RGB2BGR)
+    return None
+
+
+def _run_cv_pipeline(image_data):
+    """Decode, preprocess and extract features; runs inside a worker process"""
+    img = _decode_image(image_data)
+    if img is None:
+        return {"error": "Unsupported image format"}
+    processed_img = ImageAnalysisService._preprocess_image(img)
+    return {"features": ImageAnalysisService._extract_features(processed_img)}
+
 
 class ImageAnalysisService:
-    def __init__(self, ai_service=None):
+    def __init__(self, ai_service=None, cache=None):
         self.threshold = config.IMAGE_ANALYSIS_THRESHOLD
+        self.cache = cache if cache is not None else get_analysis_cache()
         
-        # Use the specified AI service or default to Gemini
+        # Use the specified AI service or the shared default (Gemini unless configured otherwise)
         if ai_service:
             self.ai_service = ai_service
         elif config.DEFAULT_AI_MODEL.lower() == "gemini":
-            self.ai_service = GeminiService()
+            self.ai_service = get_service_registry().gemini()
         else:
-            self.ai_service = OpenRouterService()
+            self.ai_service = get_service_registry().openrouter()
     
     def analyze_plant_image(self, image_data, prompt=None):
         """Analyze a plant image using computer vision and AI"""
         try:
+            # Repeat uploads of the same photo skip OpenCV and the AI call
+            cache_key = self._cache_key(image_data, prompt)
+            if cache_key:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return cached
+            
             # Convert to OpenCV format if needed
             if isinstance(image_data, bytes):
                 nparr = np.frombuffer(image_data, np.uint8)
@@ -36,9 +67,108 @@ class ImageAnalysisService:
             # Extract features (color analysis, etc.)
             features = self._extract_features(processed_img)
             
-            # Get AI analysis
-            if not prompt:
-                prompt = f"""
+            return self._analyze_with_ai(image_data, features, prompt, cache_key)
+        
+        except Exception as e:
+            return {"error": f"Error analyzing image: {str(e)}"}
+    
+    def analyze_batch(self, images, prompt=None, max_workers=None, max_concurrent_ai=None):
+        """Analyze many plant images, yielding (index, result) pairs as they finish
+        
+        The OpenCV stages run in a process pool so throughput scales with cores,
+        while the AI calls overlap in a thread pool bounded by max_concurrent_ai.
+        """
+        images = list(images)
+        if not images:
+            return
+        
+        max_workers = max_workers or config.IMAGE_ANALYSIS_WORKERS or os.cpu_count() or 1
+        max_concurrent_ai = max_concurrent_ai or config.IMAGE_ANALYSIS_AI_CONCURRENCY
+        
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(images))) as cv_pool, \
+                ThreadPoolExecutor(max_workers=max_concurrent_ai) as ai_pool:
+            cv_futures = {}
+            cache_keys = {}
+            for index, image_data in enumerate(images):
+                cache_key = self._cache_key(image_data, prompt)
+                if cache_key:
+                    cached = self.cache.get(cache_key)
+                    if cached is not None:
+                        yield index, cached
+                        continue
+                    cache_keys[index] = cache_key
+                
+                # PIL images are not cheap to pickle, ship the raw pixels instead
+                if isinstance(image_data, Image.Image):
+                    payload = np.asarray(image_data.convert("RGB"))
+                else:
+                    payload = image_data
+                cv_futures[cv_pool.submit(_run_cv_pipeline, payload)] = index
+            
+            ai_futures = {}
+            for future in as_completed(cv_futures):
+                index = cv_futures[future]
+                try:
+                    cv_result = future.result()
+                except Exception as e:
+                    yield index, {"error": f"Error analyzing image: {str(e)}"}
+                    continue
+                
+                if "error" in cv_result:
+                    yield index, cv_result
+                    continue
+                
+                ai_future = ai_pool.submit(
+                    self._analyze_with_ai, images[index], cv_result["features"], prompt, cache_keys.get(index)
+                )
+                ai_futures[ai_future] = index
+                
+                # Hand back any AI results that are already done without
+                # waiting for the remaining OpenCV work
+                for done in [f for f in ai_futures if f.done()]:
+                    yield ai_futures.pop(done), self._collect(done)
+            
+            for future in as_completed(ai_futures):
+                yield ai_futures[future], self._collect(future)
+    
+    def _collect(self, future):
+        """Unwrap an AI future into a result dictionary"""
+        try:
+            return future.result()
+        except Exception as e:
+            return {"error": f"Error analyzing image: {str(e)}"}
+    
+    def _cache_key(self, image_data, prompt=None):
+        """Return the result cache key for an image, or None when caching is off"""
+        if not self.cache:
+            return None
+        model = getattr(self.ai_service, "vision_model_name", type(self.ai_service).__name__)
+        return AnalysisCache.make_key(image_data, prompt, f"image_analysis/{model}")
+    
+    def _analyze_with_ai(self, image_data, features, prompt=None, cache_key=None):
+        """Run the AI analysis and combine it with the extracted features"""
+        # Get AI analysis
+        if not prompt:
+            prompt = self._build_prompt(features)
+        
+        # Get AI analysis from the selected service
+        ai_analysis = self.ai_service.analyze_image(image_data, prompt)
+        
+        # Combine computer vision results with AI analysis
+        result = {
+            "features": features,
+            "ai_analysis": ai_analysis
+        }
+        
+        # The AI services report failures as "Error ..." strings; never cache those
+        if cache_key and not str(ai_analysis).startswith(("Error", "Unsupported")):
+            self.cache.set(cache_key, result)
+        
+        return result
+    
+    def _build_prompt(self, features):
+        """Build the default analysis prompt from extracted features"""
+        return f"""
                 Analyze this melon plant image. Consider these extracted features:
                 - Green intensity: {features['green_intensity']:.2f}
                 - Yellow/brown ratio: {features['yellow_brown_ratio']:.2f}
@@ -50,22 +180,9 @@ class ImageAnalysisService:
                 3. Growth stage estimation
                 4. Specific recommendations for the farmer
                 """
-            
-            # Get AI analysis from the selected service
-            ai_analysis = self.ai_service.analyze_image(image_data, prompt)
-            
-            # Combine computer vision results with AI analysis
-            result = {
-                "features": features,
-                "ai_analysis": ai_analysis
-            }
-            
-            return result
-            
-        except Exception as e:
-            return {"error": f"Error analyzing image: {str(e)}"}
     
-    def _preprocess_image(self, img):
+    @staticmethod
+    def _preprocess_image(img):
         """Preprocess image for analysis"""
         # Resize for consistency
         resized = cv2.resize(img, (800, 600))
@@ -78,29 +195,52 @@ class ImageAnalysisService:
         
         return blurred
     
-    def _extract_features(self, img):
+    @staticmethod
+    def _extract_features(img):
         """Extract relevant features from the image"""
-        # Convert back to BGR for some operations
-        bgr = cv2.cvtColor(img, cv2.COLOR_HSV2BGR)
+        return ImageAnalysisService.extract_features_batch(img[np.newaxis])[0]
+    
+    @staticmethod
+    def extract_features_batch(hsv_images):
+        """Extract features from a stacked N x H x W x 3 batch of HSV images
         
-        # Split into channels
-        h, s, v = cv2.split(img)
-        b, g, r = cv2.split(bgr)
+        All frames are converted and thresholded in one OpenCV call over the
+        stacked buffer, and the per-frame channel sums and mask counts are
+        reduced over the whole stack at once, with no per-frame loop.
+        """
+        hsv_images = np.ascontiguousarray(hsv_images, dtype=np.uint8)
+        n, height, width = hsv_images.shape[:3]
+        pixels = height * width
         
-        # Calculate green intensity (higher in healthy plants)
-        green_intensity = np.mean(g) / (np.mean(r) + np.mean(b) + 1e-5)
+        # Treat the stack as one tall image so each OpenCV pass covers the whole tray
+        stacked = hsv_images.reshape(n * height, width, 3)
+        bgr = cv2.cvtColor(stacked, cv2.COLOR_HSV2BGR)
         
-        # Calculate yellow/brown ratio (higher in stressed plants)
-        # Yellow: high R, high G, low B
+        # Yellow: high R, high G, low B (higher in stressed plants)
         yellow_mask = cv2.inRange(bgr, (0, 100, 100), (50, 255, 255))
-        yellow_ratio = np.sum(yellow_mask) / (img.shape[0] * img.shape[1])
         
-        # Estimate leaf area (green pixels)
-        green_mask = cv2.inRange(img, (35, 40, 40), (85, 255, 255))
-        leaf_area = np.sum(green_mask > 0)
+        # Leaf area (green pixels)
+        green_mask = cv2.inRange(stacked, (35, 40, 40), (85, 255, 255))
+        
+        # Sum each frame's rows first: adding whole rows at a time is the vectorized
+        # direction, leaving an N x W sum per frame. Masks hold 255 per hit.
+        bgr_sums = bgr.reshape(n, height, width * 3).sum(axis=1, dtype=np.uint32).reshape(n, width, 3).sum(axis=1)
+        yellow_sums = yellow_mask.reshape(n, height, width).sum(axis=1, dtype=np.uint32).sum(axis=1)
+        green_sums = green_mask.reshape(n, height, width).sum(axis=1, dtype=np.uint32).sum(axis=1)
+        
+        # Green intensity (higher in healthy plants)
+        means = bgr_sums / pixels
+        green_intensity = means[:, 1] / (means[:, 2] + means[:, 0] + 1e-5)
         
-        return {
-            "green_intensity": float(green_intensity),
-            "yellow_brown_ratio": float(yellow_ratio),
-            "leaf_area_estimate": int(leaf_area)
-        }
\ No newline at end of file
+        # Matches the original np.sum based ratio
+        yellow_ratio = yellow_sums / pixels
+        leaf_area = green_sums // 255
+        
+        return [
+            {
+                "green_intensity": float(green_intensity[i]),
+                "yellow_brown_ratio": float(yellow_ratio[i]),
+                "leaf_area_estimate": int(leaf_area[i])
+            }
+            for i in range(n)
+        ]
\ No newline at end of file
@@ -0,0 +1,83 @@
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+import config
+
+_REF_PATTERN = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}$")
+
+
+class ImageStore:
+    """Content-addressed image files sharded by hash under the upload folder"""
+    
+    def __init__(self, root=None):
+        self.root = root or config.IMAGE_STORE_FOLDER
+    
+    @staticmethod
+    def make_ref(data):
+        """Return the store reference for a blob: <aa>/<bb>/<sha256>"""
+        digest = hashlib.sha256(data).hexdigest()
+        return f"{digest[:2]}/{digest[2:4]}/{digest}"
+    
+    @staticmethod
+    def is_ref(value):
+        """Check whether a value looks like an image store reference"""
+        return bool(value) and bool(_REF_PATTERN.match(value))
+    
+    def path_for(self, ref):
+        """Return the file path backing a reference"""
+        if not self.is_ref(ref):
+            raise ValueError(f"Invalid image reference: {ref!r}")
+        return os.path.join(self.root, *ref.split("/"))
+    
+    def exists(self, ref):
+        """Check whether a referenced image is present in the store"""
+        return os.path.exists(self.path_for(ref))
+    
+    def put(self, data):
+        """Store image bytes once and return their reference"""
+        ref = self.make_ref(data)
+        path = self.path_for(ref)
+        
+        # Identical uploads share one file
+        if os.path.exists(path):
+            return ref
+        
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        
+        # Write to a temporary file first so readers never see a partial image
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        
+        return ref
+    
+    def open(self, ref):
+        """Return a read-only mmap of the referenced image
+        
+        The result supports the buffer protocol, so it can be passed straight
+        to np.frombuffer or sliced, and works as a context manager.
+        """
+        with open(self.path_for(ref), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return memoryview(b"")
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    def read(self, ref):
+        """Return the referenced image as bytes"""
+        with self.open(ref) as buffer:
+            return bytes(buffer)
+    
+    def delete(self, ref):
+        """Remove a referenced image from the store"""
+        path = self.path_for(ref)
+        if os.path.exists(path):
+            os.remove(path)
\ No newline at end of file
@@ -0,0 +1,291 @@
+import datetime
+import threading
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+import config
+from app.database import get_engine
+from app.models import IrrigationSchedule, IrrigationSystem
+from app.models.irrigation import frequency_interval
+
+# Nodes holding at most this many intervals are scanned instead of split further
+_LEAF_SIZE = 32
+
+ScheduleCheck = namedtuple("ScheduleCheck", ("conflicts", "peak_flow", "peak_power", "peak_at", "overloaded"))
+
+
+def _seconds(values):
+    """Datetimes as int64 seconds since the epoch"""
+    return np.asarray(pd.to_datetime(pd.Series(values, dtype=object)), dtype="datetime64[s]").astype(np.int64)
+
+
+def _datetimes(seconds):
+    """int64 seconds since the epoch as naive datetimes"""
+    return pd.to_datetime(np.asarray(seconds, dtype=np.int64), unit="s")
+
+
+def expand_occurrences(starts, intervals, durations, lo, hi):
+    """Every run of several schedules that overlaps [lo, hi), in seconds
+    
+    intervals is 0 for one-off schedules. Returns the schedule position of
+    each run with its start and end, without a Python loop per schedule.
+    """
+    starts, intervals, durations = (np.asarray(a, dtype=np.int64) for a in (starts, intervals, durations))
+    recurring = intervals > 0
+    step = np.where(recurring, intervals, 1)
+    # Runs k with start + k*step + duration > lo and start + k*step < hi
+    first = np.where(recurring, np.maximum((lo - durations - starts) // step + 1, 0), 0)
+    stop = np.where(recurring, np.maximum(-((starts - hi) // step), 0), (starts < hi) & (starts + durations > lo))
+    counts = np.maximum(stop - first, 0)
+    
+    rows = np.repeat(np.arange(len(starts)), counts)
+    k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + first[rows]
+    run_starts = starts[rows] + k * intervals[rows]
+    return rows, run_starts, run_starts + durations[rows]
+
+
+def peak_load(starts, ends, weights, groups=None):
+    """Largest concurrent total of weights per group, found in one sweep
+    
+    Each interval adds its weights over [start, end). weights is (intervals,)
+    or (intervals, columns) and the peak of each column is taken separately.
+    Returns the groups and, per group, the peak and when it is first reached.
+    """
+    weights = np.asarray(weights, dtype=float)
+    weights = weights[:, None] if weights.ndim == 1 else weights
+    groups = np.zeros(len(starts), dtype=np.int64) if groups is None else np.asarray(groups)
+    if len(starts) == 0:
+        return groups[:0], np.zeros((0, weights.shape[1])), np.zeros((0, weights.shape[1]), dtype=np.int64)
+    
+    times = np.concatenate([starts, ends])
+    deltas = np.concatenate([weights, -weights])
+    event_groups = np.concatenate([groups, groups])
+    is_start = np.repeat([True, False], len(starts))
+    # Within a group, events in time order with ends before starts at the same time (half-open runs)
+    order = np.lexsort((is_start, times, event_groups))
+    # Every group's deltas sum to zero, so one cumulative sum restarts at each group
+    running = np.cumsum(deltas[order], axis=0)
+    bounds = np.flatnonzero(np.r_[True, event_groups[order][1:] != event_groups[order][:-1]])
+    peaks = np.maximum.reduceat(running, bounds, axis=0)
+    
+    sorted_times = times[order]
+    at = np.empty(peaks.shape, dtype=np.int64)
+    segment = np.repeat(np.arange(len(bounds)), np.diff(np.r_[bounds, len(order)]))
+    for column in range(running.shape[1]):
+        hit = np.flatnonzero(running[:, column] >= peaks[segment, column] - 1e-9)
+        first_hit = np.unique(segment[hit], return_index=True)[1]
+        at[:, column] = sorted_times[hit[first_hit]]
+    return event_groups[order][bounds], peaks, at
+
+
+class IntervalIndex:
+    """Static centered interval tree over half-open [start, end) intervals
+    
+    Each node keeps the intervals containing its center, sorted by start and
+    by end; the rest go to the left or right subtree. A window query walks one
+    root-to-leaf path per side and reads matches off the sorted lists, so it
+    costs O(log n + k) for k overlapping intervals.
+    """
+    
+    def __init__(self, starts, ends):
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self._nodes = []
+        self._root = self._build(np.arange(len(self.starts)))
+    
+    def __len__(self):
+        return len(self.starts)
+    
+    def _build(self, positions):
+        """Add the subtree for these positions; returns its node number (-1 when empty)"""
+        if len(positions) == 0:
+            return -1
+        starts, ends = self.starts[positions], self.ends[positions]
+        if len(positions) <= _LEAF_SIZE:
+            self._nodes.append((None, -1, -1, positions, None, None, None))
+            return len(self._nodes) - 1
+        
+        # The median midpoint lies inside every interval of positive length around it,
+        # but zero-length intervals can all fall to one side: keep those as a leaf
+        center = float(np.median((starts + ends) / 2.0))
+        left, right = ends <= center, starts > center
+        if left.all() or right.all():
+            self._nodes.append((None, -1, -1, positions, None, None, None))
+            return len(self._nodes) - 1
+        here = positions[~(left | right)]
+        by_start = here[np.argsort(self.starts[here], kind="stable")]
+        by_end = here[np.argsort(-self.ends[here], kind="stable")]
+        node = len(self._nodes)
+        self._nodes.append(None)
+        left_node, right_node = self._build(positions[left]), self._build(positions[right])
+        self._nodes[node] = (center, left_node, right_node, by_start, self.starts[by_start], by_end, -self.ends[by_end])
+        return node
+    
+    def overlapping(self, lo, hi):
+        """Positions of the intervals overlapping [lo, hi)"""
+        found, stack = [], [self._root]
+        while stack:
+            node = stack.pop()
+            if node < 0:
+                continue
+            center, left, right, by_start, starts, by_end, negative_ends = self._nodes[node]
+            if center is None:
+                found.append(by_start[(self.starts[by_start] < hi) & (self.ends[by_start] > lo)])
+            elif hi <= center:
+                # Intervals here end after the window; those starting before it ends overlap
+                found.append(by_start[:np.searchsorted(starts, hi, side="left")])
+                stack.append(left)
+            elif lo >= center:
+                # Intervals here start before the window; those ending after it starts overlap
+                found.append(by_end[:np.searchsorted(negative_ends, -lo, side="left")])
+                stack.append(right)
+            else:
+                found.append(by_start)
+                stack.extend((left, right))
+        return np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+
+
+class IrrigationPlanner:
+    """Conflict and pump load checks over the runs of every active schedule
+    
+    The active schedules are expanded into their runs over twice the
+    planning horizon, so checks during the next horizon reuse them. Each
+    system's runs get an IntervalIndex, built the first time that system is
+    checked, and the farm's peak flow and hydraulic power come from one sweep
+    over all runs.
+    """
+    
+    def __init__(self, database_url=None, horizon=None):
+        self.engine = get_engine(database_url)
+        self.horizon = datetime.timedelta(days=config.IRRIGATION_PLANNING_HORIZON_DAYS if horizon is None else horizon)
+        self._lock = threading.Lock()
+        self._window = None
+    
+    def invalidate(self):
+        """Forget the expanded runs after schedules change"""
+        with self._lock:
+            self._window = None
+    
+    def _load(self, now):
+        """Expand the active schedules into runs starting at now (caller holds the lock)"""
+        schedules = IrrigationSchedule.__table__
+        systems = IrrigationSystem.__table__
+        with self.engine.connect() as conn:
+            result = conn.execute(select(systems.c.id, systems.c.name, systems.c.flow_rate, systems.c.pressure))
+            self.systems = pd.DataFrame(result.fetchall(), columns=list(result.keys())).set_index("id")
+            rows = conn.execute(
+                select(schedules.c.id, schedules.c.system_id, schedules.c.start_time, schedules.c.duration, schedules.c.frequency)
+                .where(schedules.c.is_active.isnot(False))
+            ).all()
+        self.systems[["flow_rate", "pressure"]] = self.systems[["flow_rate", "pressure"]].astype(float).fillna(0.0)
+        
+        lo = int(_seconds([now])[0])
+        hi = lo + 2 * int(self.horizon.total_seconds())
+        schedule_ids = np.array([row.id for row in rows], dtype=np.int64)
+        intervals = [frequency_interval(row.frequency) for row in rows]
+        positions, starts, ends = expand_occurrences(
+            _seconds([row.start_time for row in rows]),
+            [int(interval.total_seconds()) if interval else 0 for interval in intervals],
+            [row.duration * 60 for row in rows], lo, hi
+        )
+        self.runs = {
+            "schedule_id": schedule_ids[positions],
+            "system_id": np.array([row.system_id or 0 for row in rows], dtype=np.int64)[positions],
+            "start": starts,
+            "end": ends,
+        }
+        self._indexes = {}
+        self._window = (lo, hi)
+    
+    def _ensure_loaded(self, now):
+        """Load unless the expanded runs cover the horizon from now (caller holds the lock)"""
+        lo = int(_seconds([now])[0])
+        if self._window is None or lo < self._window[0] or lo + self.horizon.total_seconds() > self._window[1]:
+            self._load(now)
+        return lo
+    
+    def _index(self, system_id):
+        """The interval index of one system's runs, built on first use"""
+        if system_id not in self._indexes:
+            positions = np.flatnonzero(self.runs["system_id"] == system_id)
+            self._indexes[system_id] = (positions, IntervalIndex(self.runs["start"][positions], self.runs["end"][positions]))
+        return self._indexes[system_id]
+    
+    def _candidate(self, start_time, duration, frequency, lo):
+        """Runs of a proposed schedule within the horizon from lo"""
+        interval = frequency_interval(frequency)
+        _, starts, ends = expand_occurrences(
+            _seconds([start_time]), [int(interval.total_seconds()) if interval else 0], [duration * 60],
+            lo, lo + int(self.horizon.total_seconds())
+        )
+        return starts, ends
+    
+    def conflicts(self, system_id, start_time, duration, frequency=None, now=None):
+        """Runs of existing schedules on the system that a proposed schedule would overlap"""
+        now = now or datetime.datetime.utcnow()
+        with self._lock:
+            lo = self._ensure_loaded(now)
+            starts, ends = self._candidate(start_time, duration, frequency, lo)
+            positions, index = self._index(system_id)
+            matches = [(position, start) for start, end in zip(starts, ends) for position in index.overlapping(start, end)]
+            hits = positions[np.array([position for position, _ in matches], dtype=np.int64)]
+            return pd.DataFrame({
+                "schedule_id": self.runs["schedule_id"][hits],
+                "start": _datetimes(self.runs["start"][hits]),
+                "end": _datetimes(self.runs["end"][hits]),
+                "proposed_start": _datetimes([start for _, start in matches]),
+            })
+    
+    def _farm_peak(self, lo, extra=None):
+        """Peak concurrent flow (L/h) and hydraulic power (W) over the horizon, optionally with extra runs"""
+        hi = lo + int(self.horizon.total_seconds())
+        in_window = (self.runs["start"] < hi) & (self.runs["end"] > lo)
+        system_ids, starts, ends = (self.runs[key][in_window] for key in ("system_id", "start", "end"))
+        if extra is not None:
+            system_ids, starts, ends = (np.concatenate([a, b]) for a, b in zip((system_ids, starts, ends), extra))
+        flow = self.systems["flow_rate"].reindex(system_ids).fillna(0.0).to_numpy()
+        pressure = self.systems["pressure"].reindex(system_ids).fillna(0.0).to_numpy()
+        # L/h x kPa to watts: (L/h / 3.6e6) m3/s x (kPa x 1e3) Pa
+        _, peaks, at = peak_load(np.maximum(starts, lo), ends, np.column_stack([flow, flow * pressure / 3600.0]))
+        if not len(peaks):
+            return 0.0, 0.0, None
+        return float(peaks[0, 0]), float(peaks[0, 1]), _datetimes(at[0, :1])[0]
+    
+    def check(self, system_id, start_time, duration, frequency=None, now=None):
+        """Conflicts of a proposed schedule and the farm's pump load once it is added"""
+        conflicts = self.conflicts(system_id, start_time, duration, frequency, now)
+        with self._lock:
+            lo = self._ensure_loaded(now or datetime.datetime.utcnow())
+            starts, ends = self._candidate(start_time, duration, frequency, lo)
+            flow, power, at = self._farm_peak(lo, (np.full(len(starts), system_id, dtype=np.int64), starts, ends))
+        overloaded = flow > config.IRRIGATION_PUMP_MAX_FLOW or power > config.IRRIGATION_PUMP_MAX_POWER
+        return ScheduleCheck(conflicts, flow, power, at, overloaded)
+    
+    def peak_flows(self, now=None):
+        """Per system, the most runs at once over the horizon and the resulting peak flow"""
+        now = now or datetime.datetime.utcnow()
+        with self._lock:
+            lo = self._ensure_loaded(now)
+            hi = lo + int(self.horizon.total_seconds())
+            in_window = (self.runs["start"] < hi) & (self.runs["end"] > lo)
+            system_ids, peaks, at = peak_load(
+                np.maximum(self.runs["start"][in_window], lo), self.runs["end"][in_window],
+                np.ones(in_window.sum()), self.runs["system_id"][in_window]
+            )
+            systems = self.systems.reindex(system_ids)
+            return pd.DataFrame({
+                "system": systems["name"].to_numpy(),
+                "flow_rate": systems["flow_rate"].to_numpy(),
+                "pressure": systems["pressure"].to_numpy(),
+                "peak_runs": peaks[:, 0].astype(int),
+                "peak_flow": peaks[:, 0] * systems["flow_rate"].to_numpy(),
+                "peak_at": _datetimes(at[:, 0]),
+            })
+    
+    def farm_peak(self, now=None):
+        """Peak concurrent flow and hydraulic power of all systems over the horizon, and when it occurs"""
+        now = now or datetime.datetime.utcnow()
+        with self._lock:
+            lo = self._ensure_loaded(now)
+            return self._farm_peak(lo)
\ No newline at end of file
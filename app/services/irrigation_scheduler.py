@@ -0,0 +1,381 @@
+import datetime
+import heapq
+import itertools
+import threading
+import pandas as pd
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+import config
+from app.database import get_engine
+from app.models import IrrigationRun, IrrigationSchedule, IrrigationSystem, Plant
+from app.models.irrigation import frequency_interval
+from app.services.irrigation_planner import IrrigationPlanner
+from app.services.performance_summary import PerformanceSummary
+
+
+# Runs claimed per INSERT; keeps the statement under SQLite's bound-parameter limit
+_CLAIM_BATCH = 1000
+
+
+def next_occurrence(start_time, interval, after):
+    """First run of a schedule strictly after `after` (None once a one-off schedule has passed)"""
+    if start_time > after:
+        return start_time
+    if interval is None:
+        return None
+    return start_time + ((after - start_time) // interval + 1) * interval
+
+
+class TimerHeap:
+    """Min-heap of timers keyed by schedule id
+    
+    push is O(log n); cancel marks the entry dead in O(1) and dead entries
+    are dropped as they reach the top, or in one rebuild once they outnumber
+    the live ones.
+    """
+    
+    def __init__(self):
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def push(self, key, due):
+        """Set (or move) the timer for a key"""
+        self.cancel(key)
+        entry = [due, next(self._counter), key, True]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+    
+    def cancel(self, key):
+        """Remove the timer for a key, if any"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        entry[3] = False
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [entry for entry in self._heap if entry[3]]
+            heapq.heapify(self._heap)
+    
+    def due(self, key):
+        """When the timer for a key fires, or None"""
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+    
+    def peek(self):
+        """The earliest due time, or None when no timer is set"""
+        while self._heap and not self._heap[0][3]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+    
+    def pop_due(self, now):
+        """Remove and return (key, due) for every timer due at or before now, earliest first"""
+        fired = []
+        while self.peek() is not None and self._heap[0][0] <= now:
+            due, _, key, _ = heapq.heappop(self._heap)
+            del self._entries[key]
+            fired.append((key, due))
+        return fired
+
+
+class IrrigationScheduler:
+    """Runs IrrigationSchedule rows from an in-memory timer heap
+    
+    The schedule table is read once by load(); afterwards schedules change
+    through add_schedule() and cancel_schedule(), so ticks never scan it.
+    Only the next occurrence of each recurring schedule is kept in the heap
+    and the following one is computed when it fires. Every run is claimed by
+    inserting its IrrigationRun row first, so an occurrence is dispatched at
+    most once even across restarts or several app processes. Occurrences
+    missed while the app was down collapse into a single catch-up run.
+    """
+    
+    def __init__(self, database_url=None, dispatch=None, clock=datetime.datetime.utcnow):
+        self.database_url = database_url
+        self.engine = get_engine(database_url)
+        self.dispatch = dispatch or (lambda run: None)
+        self.clock = clock
+        self.timers = TimerHeap()
+        self.planner = IrrigationPlanner(database_url)
+        self.last_error = None
+        self._schedules = {}
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopping = False
+    
+    def _track(self, row, last_run=None, now=None):
+        """Keep a schedule and set its timer for the first occurrence still to run"""
+        interval = frequency_interval(row["frequency"])
+        schedule = dict(row, interval=interval)
+        after = last_run if last_run is not None else row["start_time"] - datetime.timedelta(microseconds=1)
+        due = next_occurrence(row["start_time"], interval, after)
+        if due is not None and now is not None and interval is not None and due <= now:
+            # Catch up with the latest missed occurrence only
+            due = next_occurrence(row["start_time"], interval, now) - interval
+        if due is None:
+            self._schedules.pop(row["id"], None)
+            self.timers.cancel(row["id"])
+            return
+        self._schedules[row["id"]] = schedule
+        self.timers.push(row["id"], due)
+    
+    def load(self):
+        """Read every active schedule and the last run of each; returns the number of timers set"""
+        schedules = IrrigationSchedule.__table__
+        runs = IrrigationRun.__table__
+        now = self.clock()
+        with self.engine.connect() as conn:
+            last_runs = dict(conn.execute(
+                select(runs.c.schedule_id, func.max(runs.c.scheduled_for)).group_by(runs.c.schedule_id)
+            ).all())
+            rows = conn.execute(
+                select(
+                    schedules.c.id, schedules.c.system_id, schedules.c.start_time, schedules.c.duration,
+                    schedules.c.frequency, schedules.c.nutrient_mix_id, schedules.c.ec_target, schedules.c.ph_target
+                ).where(schedules.c.is_active.isnot(False))
+            ).mappings().all()
+        with self._condition:
+            for row in rows:
+                self._track(row, last_runs.get(row["id"]), now)
+            self._condition.notify()
+            return len(self.timers)
+    
+    def _refresh_water_usage(self, system_id):
+        """Recompute the scheduled water use of the system's irrigation group"""
+        plants = Plant.__table__
+        with self.engine.connect() as conn:
+            plant_ids = conn.execute(select(plants.c.id).where(plants.c.irrigation_id == system_id)).scalars().all()
+        if plant_ids:
+            PerformanceSummary(self.database_url).refresh(plant_ids)
+    
+    def add_schedule(self, system_id, start_time, duration, frequency=None, nutrient_mix_id=None,
+                     ec_target=None, ph_target=None):
+        """Persist a new schedule and set its timer; returns the schedule id
+        
+        Raises ValueError when its runs would overlap each other or another
+        schedule of the same system within the planning horizon.
+        """
+        interval = frequency_interval(frequency)
+        if interval is not None and datetime.timedelta(minutes=duration) > interval:
+            raise ValueError(f"A {duration} minute run cannot repeat {frequency.lower()}")
+        conflicts = self.planner.conflicts(system_id, start_time, duration, frequency, now=self.clock())
+        if not conflicts.empty:
+            clashing = ", ".join(f"#{schedule_id}" for schedule_id in sorted(set(conflicts["schedule_id"])))
+            raise ValueError(f"Schedule overlaps {len(conflicts)} run(s) of schedule {clashing}")
+        
+        row = {
+            "system_id": system_id, "start_time": start_time, "duration": duration, "frequency": frequency,
+            "nutrient_mix_id": nutrient_mix_id, "ec_target": ec_target, "ph_target": ph_target
+        }
+        with self.engine.begin() as conn:
+            row["id"] = conn.execute(insert(IrrigationSchedule.__table__).values(is_active=True, **row)).inserted_primary_key[0]
+        self.planner.invalidate()
+        with self._condition:
+            self._track(row, now=self.clock())
+            self._condition.notify()
+        self._refresh_water_usage(system_id)
+        return row["id"]
+    
+    def cancel_schedule(self, schedule_id):
+        """Deactivate a schedule and drop its timer"""
+        schedules = IrrigationSchedule.__table__
+        with self.engine.begin() as conn:
+            system_id = conn.execute(
+                update(schedules).where(schedules.c.id == schedule_id).values(is_active=False)
+                .returning(schedules.c.system_id)
+            ).scalar()
+        self.planner.invalidate()
+        with self._condition:
+            self._schedules.pop(schedule_id, None)
+            self.timers.cancel(schedule_id)
+            self._condition.notify()
+        if system_id is not None:
+            self._refresh_water_usage(system_id)
+    
+    def set_targets(self, system_id, ec_target=None, ph_target=None):
+        """Save EC and pH targets on a system's active schedules; returns how many were updated"""
+        values = {name: value for name, value in (("ec_target", ec_target), ("ph_target", ph_target)) if value is not None}
+        if not values:
+            return 0
+        schedules = IrrigationSchedule.__table__
+        with self.engine.begin() as conn:
+            updated = conn.execute(
+                update(schedules)
+                .where(schedules.c.system_id == system_id, schedules.c.is_active.isnot(False))
+                .values(**values)
+                .returning(schedules.c.id)
+            ).scalars().all()
+        # Runs still to come carry the new targets
+        with self._condition:
+            for schedule_id in updated:
+                if schedule_id in self._schedules:
+                    self._schedules[schedule_id].update(values)
+        return len(updated)
+    
+    def run_pending(self, now=None):
+        """Claim, log and dispatch every occurrence due by now; returns the runs dispatched"""
+        now = now or self.clock()
+        with self._condition:
+            fired = []
+            for key, due in self.timers.pop_due(now):
+                schedule = self._schedules[key]
+                following = next_occurrence(schedule["start_time"], schedule["interval"], now)
+                if following is not None and schedule["interval"] is not None:
+                    # Several occurrences overdue (e.g. after a long tick) run once, as the latest
+                    due = max(due, following - schedule["interval"])
+                fired.append((schedule, due, following))
+        if not fired:
+            return []
+        
+        runs = IrrigationRun.__table__
+        # Multi-row INSERT ... ON CONFLICT DO NOTHING RETURNING yields only the occurrences this call claimed
+        won = set()
+        try:
+            with self.engine.begin() as conn:
+                for offset in range(0, len(fired), _CLAIM_BATCH):
+                    rows = [
+                        {"schedule_id": schedule["id"], "system_id": schedule["system_id"], "scheduled_for": due,
+                         "started_at": now, "duration": schedule["duration"], "status": "dispatched"}
+                        for schedule, due, _ in fired[offset:offset + _CLAIM_BATCH]
+                    ]
+                    won.update(conn.execute(
+                        sqlite_insert(runs).values(rows).on_conflict_do_nothing()
+                        .returning(runs.c.schedule_id, runs.c.scheduled_for)
+                    ).tuples())
+        except Exception:
+            # Nothing was claimed: re-arm the same occurrences for the next attempt
+            self._rearm((schedule["id"], due) for schedule, due, _ in fired)
+            raise
+        # Timers advance only once the claim has committed; schedules cancelled meanwhile stay dropped
+        self._rearm((schedule["id"], following) for schedule, _, following in fired)
+        claimed = [dict(schedule, scheduled_for=due) for schedule, due, _ in fired if (schedule["id"], due) in won]
+        
+        failed = []
+        for run in claimed:
+            try:
+                self.dispatch(run)
+            except Exception as e:
+                self.last_error = str(e)
+                failed.append({"schedule_id": run["id"], "scheduled_for": run["scheduled_for"], "message": str(e)})
+        if failed:
+            with self.engine.begin() as conn:
+                for failure in failed:
+                    conn.execute(
+                        update(runs)
+                        .where(runs.c.schedule_id == failure["schedule_id"], runs.c.scheduled_for == failure["scheduled_for"])
+                        .values(status="failed", message=failure["message"])
+                    )
+        return claimed
+    
+    def _rearm(self, timers):
+        """Set the timers of (schedule id, due) pairs popped by run_pending, dropping schedules with no next due"""
+        with self._condition:
+            for key, due in timers:
+                if key not in self._schedules:
+                    continue
+                if due is None:
+                    self._schedules.pop(key)
+                else:
+                    self.timers.push(key, due)
+            self._condition.notify()
+    
+    def _run(self):
+        """Timer thread: sleep until the earliest timer or a schedule change, then run what is due"""
+        while True:
+            with self._condition:
+                while not self._stopping:
+                    due, now = self.timers.peek(), self.clock()
+                    if due is not None and due <= now:
+                        break
+                    # Sleep until the next timer; the cap bounds clock drift
+                    wait = config.IRRIGATION_SCHEDULER_MAX_SLEEP
+                    if due is not None:
+                        wait = min(wait, (due - now).total_seconds())
+                    self._condition.wait(wait)
+                if self._stopping:
+                    return
+            try:
+                self.run_pending()
+            except Exception as e:
+                self.last_error = str(e)
+                # The failed occurrences are due again at once; pause before retrying them
+                with self._condition:
+                    if not self._stopping:
+                        self._condition.wait(config.IRRIGATION_SCHEDULER_RETRY_DELAY)
+                with self._condition:
+                    self._condition.wait(config.IRRIGATION_SCHEDULER_MAX_SLEEP)
+    
+    def start(self):
+        """Load the schedules and start the background timer thread"""
+        self.load()
+        with self._condition:
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="irrigation-scheduler", daemon=True)
+                self._thread.start()
+        return self
+    
+    def stop(self):
+        """Stop the timer thread"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+    
+    def systems(self):
+        """Irrigation systems for selection widgets"""
+        systems = IrrigationSystem.__table__
+        with self.engine.connect() as conn:
+            result = conn.execute(select(systems.c.id, systems.c.name).order_by(systems.c.name))
+            return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+    
+    def schedules(self):
+        """Active schedules with their system names and next run"""
+        schedules = IrrigationSchedule.__table__
+        systems = IrrigationSystem.__table__
+        with self.engine.connect() as conn:
+            result = conn.execute(
+                select(
+                    schedules.c.id, systems.c.name.label("system"), schedules.c.start_time, schedules.c.duration,
+                    schedules.c.frequency, schedules.c.ec_target, schedules.c.ph_target
+                )
+                .join(systems, systems.c.id == schedules.c.system_id)
+                .where(schedules.c.is_active.isnot(False))
+                .order_by(systems.c.name, schedules.c.start_time)
+            )
+            frame = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+        with self._condition:
+            frame["next_run"] = [self.timers.due(schedule_id) for schedule_id in frame["id"]]
+        return frame
+    
+    def recent_runs(self, limit=None):
+        """Latest entries of the execution log"""
+        runs = IrrigationRun.__table__
+        systems = IrrigationSystem.__table__
+        with self.engine.connect() as conn:
+            result = conn.execute(
+                select(
+                    runs.c.scheduled_for, systems.c.name.label("system"), runs.c.duration, runs.c.status, runs.c.message
+                )
+                .outerjoin(systems, systems.c.id == runs.c.system_id)
+                .order_by(runs.c.scheduled_for.desc())
+                .limit(limit or config.IRRIGATION_RUN_HISTORY)
+            )
+            return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_irrigation_scheduler():
+    """Return the process-wide irrigation scheduler, started on first use"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = IrrigationScheduler().start()
+        return _scheduler
\ No newline at end of file
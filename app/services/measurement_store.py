@@ -0,0 +1,211 @@
+import datetime
+import numpy as np
+import pandas as pd
+from sqlalchemy import String, delete, func, select, true, type_coerce
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+import config
+from app.database import get_engine
+from app.services.data_version import bump_data_version
+from app.services.performance_summary import refresh_groups, update_plant_growth
+from app.models.plant import (
+    PlantMeasurement, HourlyMeasurementRollup, DailyMeasurementRollup, ROLLUP_METRICS
+)
+
+# Raw reading columns accepted by the ingestion path
+MEASUREMENT_COLUMNS = (
+    "plant_id", "measurement_date", "height", "stem_diameter", "leaf_count", "fruit_count",
+    "temperature", "humidity", "light_level"
+)
+
+_RAW_INSERT = "INSERT INTO {} ({}) VALUES ({})".format(
+    PlantMeasurement.__tablename__, ", ".join(MEASUREMENT_COLUMNS), ", ".join("?" * len(MEASUREMENT_COLUMNS))
+)
+
+# resolution -> (rollup model, pandas frequency, bucket length, date prefix kept by SQL
+# rebuilds, suffix), coarsest first. SQL rebuilds cut bucket starts from SQLite's
+# "YYYY-MM-DD HH:MM:SS.ffffff" text dates.
+ROLLUPS = {
+    "day": (DailyMeasurementRollup, "D", datetime.timedelta(days=1), 10, " 00:00:00.000000"),
+    "hour": (HourlyMeasurementRollup, "H", datetime.timedelta(hours=1), 13, ":00:00.000000"),
+}
+
+
+def _column_lists(frame, dates_as_text=False):
+    """Return each column as a Python list with NaN/NaT as None
+    
+    With dates_as_text, datetimes are formatted in one vectorized pass in
+    SQLAlchemy's SQLite layout, so raw inserts compare and parse like
+    ORM-written rows.
+    """
+    columns = []
+    for name in frame.columns:
+        series = frame[name]
+        if series.dtype.kind == "M" and dates_as_text:
+            text = np.datetime_as_string(series.to_numpy().astype("datetime64[us]"), unit="us")
+            text.view(np.uint32).reshape(len(text), -1)[:, 10] = ord(" ")
+            values = text.astype(object)
+        elif series.dtype.kind == "M":
+            values = series.dt.to_pydatetime()
+        else:
+            values = series.to_numpy(dtype=object)
+        values[series.isna().to_numpy()] = None
+        columns.append(values.tolist())
+    return columns
+
+
+def _records(frame):
+    """Convert a DataFrame to Core insert parameters"""
+    names = list(frame.columns)
+    return [dict(zip(names, row)) for row in zip(*_column_lists(frame))]
+
+
+def aggregate_rollups(frame, freq):
+    """Aggregate raw readings into per-plant buckets: samples plus count/sum/min/max per metric"""
+    buckets = frame["measurement_date"].dt.floor(freq).rename("bucket_start")
+    grouped = frame.groupby([frame["plant_id"], buckets])
+    aggregated = grouped[list(ROLLUP_METRICS)].agg(["count", "sum", "min", "max"])
+    aggregated.columns = [f"{metric}_{stat}" for metric, stat in aggregated.columns]
+    aggregated["samples"] = grouped.size()
+    return aggregated.reset_index()
+
+
+def _merge_into(table, statement):
+    """Add ON CONFLICT handling that folds statement's rows into existing buckets"""
+    new = statement.excluded
+    merged = {"samples": table.c.samples + new.samples}
+    for metric in ROLLUP_METRICS:
+        for stat in ("count", "sum"):
+            column = f"{metric}_{stat}"
+            merged[column] = table.c[column] + new[column]
+        for stat, combine in (("min", func.min), ("max", func.max)):
+            column = f"{metric}_{stat}"
+            # SQLite's scalar min()/max() return NULL if any argument is NULL
+            merged[column] = combine(
+                func.coalesce(table.c[column], new[column]), func.coalesce(new[column], table.c[column])
+            )
+    return statement.on_conflict_do_update(index_elements=["plant_id", "bucket_start"], set_=merged)
+
+
+def _rebuild_statement(model, prefix, suffix):
+    """Set-based upsert aggregating every raw row into a rollup"""
+    raw = PlantMeasurement.__table__
+    bucket = func.substr(type_coerce(raw.c.measurement_date, String), 1, prefix) + suffix
+    columns = {"plant_id": raw.c.plant_id, "bucket_start": bucket, "samples": func.count()}
+    for metric in ROLLUP_METRICS:
+        columns[f"{metric}_count"] = func.count(raw.c[metric])
+        columns[f"{metric}_sum"] = func.total(raw.c[metric])
+        columns[f"{metric}_min"] = func.min(raw.c[metric])
+        columns[f"{metric}_max"] = func.max(raw.c[metric])
+    # WHERE true avoids SQLite's parsing ambiguity between a join's ON and ON CONFLICT
+    source = select(*[value.label(name) for name, value in columns.items()]).where(true()).group_by(
+        raw.c.plant_id, bucket
+    )
+    return _merge_into(model.__table__, sqlite_insert(model.__table__).from_select(list(columns), source))
+
+
+def pick_resolution(start, end, min_points=None):
+    """Return the coarsest resolution that still gives a chart min_points points"""
+    min_points = min_points or config.MEASUREMENT_CHART_MIN_POINTS
+    for resolution, (_, _, length, _, _) in ROLLUPS.items():
+        if (end - start) / length >= min_points:
+            return resolution
+    return "raw"
+
+
+class MeasurementStore:
+    """Time-series storage for PlantMeasurement with hourly and daily rollups"""
+    
+    def __init__(self, database_url=None):
+        self.database_url = database_url
+        self.engine = get_engine(database_url)
+    
+    def add_measurements(self, readings):
+        """Insert readings and fold them into the rollups in one transaction
+        
+        readings is a DataFrame or an iterable of dicts keyed by
+        MEASUREMENT_COLUMNS; a missing measurement_date means now.
+        Returns the number of rows inserted.
+        """
+        frame = self._frame(readings)
+        if frame.empty:
+            return 0
+        
+        with self.engine.begin() as conn:
+            self._insert(conn, frame)
+        bump_data_version("measurements")
+        self.alerts.observe_measurements(frame)
+        return len(frame)
+    
+    @property
+    def alerts(self):
+        """Alert engine evaluating the stored readings"""
+        # Imported here: the alert engine builds on telemetry, which builds on this module
+        from app.services.alert_engine import get_alert_engine
+        
+        return get_alert_engine(self.database_url)
+    
+    def _frame(self, readings):
+        """Normalize readings to a DataFrame with every measurement column"""
+        frame = readings if isinstance(readings, pd.DataFrame) else pd.DataFrame(list(readings))
+        frame = frame.reindex(columns=list(MEASUREMENT_COLUMNS))
+        frame["measurement_date"] = pd.to_datetime(frame["measurement_date"]).fillna(
+            pd.Timestamp(datetime.datetime.utcnow())
+        )
+        return frame
+    
+    def _insert(self, conn, frame):
+        """Write raw rows and merge them into the rollups and performance summaries
+        
+        Raw rows bypass per-row type processing: values are converted column
+        by column and tuples go straight to the driver's executemany.
+        """
+        rows = zip(*_column_lists(frame[list(MEASUREMENT_COLUMNS)], dates_as_text=True))
+        conn.exec_driver_sql(_RAW_INSERT, list(rows))
+        for model, freq, _, _, _ in ROLLUPS.values():
+            statement = _merge_into(model.__table__, sqlite_insert(model.__table__))
+            conn.execute(statement, _records(aggregate_rollups(frame, freq)))
+        refresh_groups(conn, update_plant_growth(conn, frame))
+    
+    def rebuild_rollups(self):
+        """Recompute every rollup from the raw rows (e.g. after ORM writes that bypassed them)"""
+        with self.engine.begin() as conn:
+            for model, _, _, prefix, suffix in ROLLUPS.values():
+                conn.execute(delete(model.__table__))
+                conn.execute(_rebuild_statement(model, prefix, suffix))
+        bump_data_version("measurements")
+    
+    def history(self, plant_id, start, end, resolution=None):
+        """Return a plant's readings between start and end for charting
+        
+        The frame has a timestamp column plus mean, min and max columns for
+        every rollup metric; resolution defaults to pick_resolution().
+        """
+        resolution = resolution or pick_resolution(start, end)
+        if resolution == "raw":
+            table = PlantMeasurement.__table__
+            columns = [table.c.measurement_date.label("timestamp")]
+            for metric in ROLLUP_METRICS:
+                columns += [
+                    table.c[metric].label(metric),
+                    table.c[metric].label(f"{metric}_min"),
+                    table.c[metric].label(f"{metric}_max"),
+                ]
+            time_column = table.c.measurement_date
+        else:
+            table = ROLLUPS[resolution][0].__table__
+            columns = [table.c.bucket_start.label("timestamp")]
+            for metric in ROLLUP_METRICS:
+                columns += [
+                    (table.c[f"{metric}_sum"] / func.nullif(table.c[f"{metric}_count"], 0)).label(metric),
+                    table.c[f"{metric}_min"],
+                    table.c[f"{metric}_max"],
+                ]
+            time_column = table.c.bucket_start
+        
+        query = (
+            select(*columns)
+            .where(table.c.plant_id == plant_id, time_column >= start, time_column < end)
+            .order_by(time_column)
+        )
+        with self.engine.connect() as conn:
+            return pd.read_sql(query, conn, parse_dates=["timestamp"])
\ No newline at end of file
@@ -0,0 +1,207 @@
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+import config
+from app.database import get_engine
+from app.models import IrrigationSchedule, IrrigationSystem, NutrientMix, StockTank
+
+# NutrientMix columns, in the order of the solver's element vector
+ELEMENTS = (
+    "nitrogen", "phosphorus", "potassium", "calcium", "magnesium", "sulfur",
+    "iron", "manganese", "zinc", "copper", "boron", "molybdenum"
+)
+
+# Element errors are relative to the target, but never to less than this many ppm
+_PPM_FLOOR = 0.05
+
+NutrientPlan = namedtuple("NutrientPlan", ("summary", "doses"))
+
+
+def estimate_ec(ppm):
+    """EC (mS/cm) of irrigation water carrying these element concentrations"""
+    return config.NUTRIENT_WATER_EC + np.asarray(ppm, dtype=float).sum(axis=-1) / config.NUTRIENT_PPM_PER_EC
+
+
+def dosing_matrix(stocks):
+    """(elements + EC, tanks) effect of 1 mL of each stock per liter of water
+    
+    stocks is (tanks, elements) in ppm of the concentrate; the last row is
+    the EC each stock adds.
+    """
+    ppm = np.nan_to_num(np.asarray(stocks, dtype=float)).T / 1000.0
+    return np.vstack([ppm, ppm.sum(axis=0) / config.NUTRIENT_PPM_PER_EC])
+
+
+def solve_doses(stocks, targets, ec_targets=None, max_doses=None, penalty=None, iterations=None):
+    """Batched bounded least-squares dosing of several targets from the same stocks
+    
+    targets is (problems, elements) in ppm with NaN for elements a target
+    leaves free, and ec_targets (problems,) in mS/cm, NaN when unset. Each
+    problem minimizes the relative error of its set elements plus the EC
+    error (weighted like all set elements together) and a small penalty on
+    the total dose, with 0 <= dose <= max_doses.
+    
+    The penalty makes the problem strictly convex, so it is solved through
+    its dual: 13 unknowns per problem however many tanks there are, with the
+    doses given in closed form by clipping. All problems share one
+    semismooth Newton loop. Returns the (problems, tanks) doses in mL/L, the
+    resulting ppm and the estimated EC.
+    """
+    penalty = config.NUTRIENT_DOSE_PENALTY if penalty is None else penalty
+    iterations = iterations or config.NUTRIENT_SOLVER_ITERATIONS
+    matrix = dosing_matrix(stocks)
+    targets = np.atleast_2d(np.asarray(targets, dtype=float))
+    problems, tanks = len(targets), matrix.shape[1]
+    ec_targets = np.full(problems, np.nan) if ec_targets is None else np.asarray(ec_targets, dtype=float)
+    upper = np.broadcast_to(
+        np.asarray(config.NUTRIENT_MAX_DOSE if max_doses is None else max_doses, dtype=float), (tanks,)
+    )
+    
+    goal = np.column_stack([np.nan_to_num(targets), np.nan_to_num(ec_targets - config.NUTRIENT_WATER_EC)])
+    weight = np.column_stack([
+        np.where(np.isnan(targets), 0.0, 1.0 / np.maximum(np.nan_to_num(targets), _PPM_FLOOR) ** 2),
+        np.where(np.isnan(ec_targets), 0.0, np.maximum((~np.isnan(targets)).sum(axis=1), 1))
+        / np.maximum(np.nan_to_num(ec_targets), 0.1) ** 2,
+    ])
+    # Rows scaled by the square root of their weight, so the objective is a plain sum of squares
+    root = np.sqrt(weight)
+    aim = root * goal
+    # Outer product of each tank's column, so every Hessian comes from one matrix product
+    outer = (matrix.T[:, :, None] * matrix.T[:, None, :]).reshape(tanks, -1)
+    
+    def doses_and_dual(rows, multipliers):
+        """Minimizing doses for the multipliers of some problems, and the dual objective there"""
+        pull = (root[rows] * multipliers) @ matrix
+        doses = np.clip(-pull / penalty, 0.0, upper)
+        value = (
+            -0.5 * (multipliers ** 2).sum(axis=1) - (multipliers * aim[rows]).sum(axis=1)
+            + (0.5 * penalty * doses ** 2 + pull * doses).sum(axis=1)
+        )
+        return doses, value
+    
+    everything = np.arange(problems)
+    multipliers = np.zeros_like(aim)
+    doses, value = doses_and_dual(everything, multipliers)
+    tolerance = 1e-9 * (1.0 + np.abs(aim).max(axis=1))
+    gradient = root * (doses @ matrix.T) - aim - multipliers
+    # Problems still iterating; solved ones drop out so stragglers run on small arrays
+    rows = everything[np.abs(gradient).max(axis=1) > tolerance]
+    for _ in range(iterations):
+        if not len(rows):
+            break
+        
+        # Generalized Hessian: only doses strictly inside their bounds respond to the multipliers
+        free = ((doses[rows] > 0) & (doses[rows] < upper)).astype(float)
+        curvature = (free @ outer).reshape(len(rows), len(matrix), len(matrix))
+        hessian = np.eye(len(matrix)) + root[rows, :, None] * curvature * root[rows, None, :] / penalty
+        direction = np.linalg.solve(hessian, gradient[rows, :, None])[:, :, 0]
+        
+        # Backtracking on the (concave) dual objective
+        slope = (gradient[rows] * direction).sum(axis=1)
+        step = np.ones(len(rows))
+        pending = np.ones(len(rows), dtype=bool)
+        for _ in range(30):
+            candidate = multipliers[rows] + step[:, None] * direction
+            candidate_doses, candidate_value = doses_and_dual(rows, candidate)
+            accept = pending & (candidate_value >= value[rows] + 1e-4 * step * slope)
+            accepted = rows[accept]
+            multipliers[accepted], doses[accepted], value[accepted] = (
+                candidate[accept], candidate_doses[accept], candidate_value[accept]
+            )
+            pending &= ~accept
+            if not pending.any():
+                break
+            step = np.where(pending, step / 2.0, step)
+        
+        gradient[rows] = root[rows] * (doses[rows] @ matrix.T) - aim[rows] - multipliers[rows]
+        # Problems with no ascent left along the Newton direction are solved to rounding
+        rows = rows[~pending & (np.abs(gradient[rows]).max(axis=1) > tolerance[rows])]
+    
+    result = doses @ matrix.T
+    return doses, result[:, :-1], config.NUTRIENT_WATER_EC + result[:, -1]
+
+
+class NutrientSolver:
+    """Dosing plans that bring irrigation water to NutrientMix and EC targets from the stock tanks
+    
+    Every active schedule's target is solved in one NumPy batch against the
+    same tank matrix, so a whole farm costs about as much as one schedule.
+    pH is reported but not solved for, as tanks carry no acidity data.
+    """
+    
+    def __init__(self, database_url=None):
+        self.engine = get_engine(database_url)
+    
+    def _frame(self, query):
+        """Run a query and return its rows as a DataFrame"""
+        with self.engine.connect() as conn:
+            result = conn.execute(query)
+            return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+    
+    def stocks(self):
+        """Active stock tanks with their concentrate composition"""
+        tanks = StockTank.__table__
+        mixes = NutrientMix.__table__
+        return self._frame(
+            select(tanks.c.id, tanks.c.name, tanks.c.volume, tanks.c.max_dose, *(mixes.c[element] for element in ELEMENTS))
+            .join(mixes, mixes.c.id == tanks.c.nutrient_mix_id)
+            .where(tanks.c.is_active.isnot(False))
+            .order_by(tanks.c.id)
+        )
+    
+    def targets(self, system_id=None):
+        """Active schedules with the element targets of their nutrient mix"""
+        schedules = IrrigationSchedule.__table__
+        systems = IrrigationSystem.__table__
+        mixes = NutrientMix.__table__
+        query = (
+            select(
+                schedules.c.id.label("schedule_id"), systems.c.name.label("system"),
+                schedules.c.ec_target, schedules.c.ph_target, *(mixes.c[element] for element in ELEMENTS)
+            )
+            .outerjoin(systems, systems.c.id == schedules.c.system_id)
+            .outerjoin(mixes, mixes.c.id == schedules.c.nutrient_mix_id)
+            .where(schedules.c.is_active.isnot(False))
+            .order_by(schedules.c.id)
+        )
+        if system_id is not None:
+            query = query.where(schedules.c.system_id == system_id)
+        return self._frame(query)
+    
+    def plan(self, targets, stocks=None):
+        """Solve a frame of targets (schedule_id, ec_target and ELEMENTS columns) against the stock tanks"""
+        stocks = self.stocks() if stocks is None else stocks
+        element_targets = targets.reindex(columns=ELEMENTS).to_numpy(dtype=float)
+        ec_targets = pd.to_numeric(targets["ec_target"], errors="coerce").to_numpy(dtype=float)
+        if stocks.empty or targets.empty:
+            doses = np.zeros((len(targets), len(stocks)))
+            ppm = np.zeros((len(targets), len(ELEMENTS)))
+            ec = np.full(len(targets), config.NUTRIENT_WATER_EC)
+        else:
+            max_doses = stocks["max_dose"].astype(float).fillna(config.NUTRIENT_MAX_DOSE).to_numpy()
+            # An empty tank cannot dose
+            max_doses = np.where(stocks["volume"].astype(float).fillna(np.inf).to_numpy() > 0, max_doses, 0.0)
+            doses, ppm, ec = solve_doses(stocks[list(ELEMENTS)].to_numpy(dtype=float), element_targets, ec_targets, max_doses)
+        
+        relative = np.abs(ppm - element_targets) / np.maximum(element_targets, _PPM_FLOOR)
+        set_elements = ~np.isnan(element_targets)
+        summary = targets.drop(columns=list(ELEMENTS)).assign(
+            ec=ec,
+            element_error=np.where(set_elements.any(axis=1), np.where(set_elements, relative, 0.0).max(axis=1), np.nan),
+            total_dose=doses.sum(axis=1),
+        )
+        problem, tank = np.nonzero(doses > 1e-6)
+        plan_doses = pd.DataFrame({
+            "schedule_id": targets["schedule_id"].to_numpy()[problem],
+            "tank": stocks["name"].to_numpy()[tank],
+            "ml_per_l": doses[problem, tank],
+        })
+        return NutrientPlan(summary, plan_doses)
+    
+    def solve_schedules(self, system_id=None, ec_target=None):
+        """Dosing plan of every active schedule (of one system), optionally with an EC target overriding theirs"""
+        targets = self.targets(system_id)
+        if ec_target is not None:
+            targets["ec_target"] = ec_target
+        return self.plan(targets)
\ No newline at end of file
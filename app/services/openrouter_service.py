@@ -1,14 +1,19 @@
-import requests
 import json
+import time
 import config
 from PIL import Image
 import base64
 import io
+from app.services.analysis_cache import AnalysisCache, get_analysis_cache
+from app.services.http_client import get_http_client
 
 class OpenRouterService:
-    def __init__(self):
+    def __init__(self, cache=None, http_client=None, base_url=None):
         self.api_key = config.OPENROUTER_API_KEY
-        self.base_url = "https://openrouter.ai/api/v1"
+        self.base_url = base_url or "https://openrouter.ai/api/v1"
+        
+        # Shared keep-alive session with timeouts and retries
+        self.http = http_client or get_http_client()
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
@@ -22,23 +27,17 @@ class OpenRouterService:
         Your responses should be practical, actionable, and based on horticultural science.
         When uncertain, acknowledge limitations and suggest reliable resources.
         """
+        
+        # Shared cache of vision results keyed by image hash, prompt and model
+        self.cache = cache if cache is not None else get_analysis_cache()
     
-    def get_response(self, prompt, model="anthropic/claude-3-opus", temperature=0.7, max_tokens=1000):
+    def get_response(self, prompt, model="anthropic/claude-3-opus", temperature=0.7, max_tokens=1000, history=None):
         """Get a text response from OpenRouter API"""
         try:
             url = f"{self.base_url}/chat/completions"
+            payload = self._chat_payload(prompt, model, temperature, max_tokens, history)
             
-            payload = {
-                "model": model,
-                "messages": [
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": temperature,
-                "max_tokens": max_tokens
-            }
-            
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = self.http.post(url, metric="openrouter.chat", headers=self.headers, json=payload)
             response.raise_for_status()
             
             result = response.json()
@@ -47,6 +46,56 @@ class OpenRouterService:
         except Exception as e:
             return f"Error communicating with OpenRouter API: {str(e)}"
     
+    def stream_response(self, prompt, model="anthropic/claude-3-opus", temperature=0.7, max_tokens=1000, history=None):
+        """Yield a text response from OpenRouter API token by token (server-sent events)"""
+        try:
+            url = f"{self.base_url}/chat/completions"
+            payload = self._chat_payload(prompt, model, temperature, max_tokens, history)
+            payload["stream"] = True
+            
+            start = time.perf_counter()
+            first_token = True
+            response = self.http.post(url, metric="openrouter.stream", headers=self.headers, json=payload, stream=True)
+            with response:
+                response.raise_for_status()
+                
+                for line in response.iter_lines(decode_unicode=True):
+                    # SSE comments (": OPENROUTER PROCESSING") and blank keep-alives carry no data
+                    if not line or not line.startswith("data:"):
+                        continue
+                    
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    
+                    chunk = json.loads(data)
+                    if "error" in chunk:
+                        raise RuntimeError(chunk["error"].get("message", chunk["error"]))
+                    
+                    content = chunk["choices"][0].get("delta", {}).get("content")
+                    if content:
+                        if first_token:
+                            # Time-to-first-token is the latency users actually feel
+                            self.http.metrics.record("openrouter.stream.first_token", time.perf_counter() - start)
+                            first_token = False
+                        yield content
+        
+        except Exception as e:
+            yield f"Error communicating with OpenRouter API: {str(e)}"
+    
+    def _chat_payload(self, prompt, model, temperature, max_tokens, history=None):
+        """Build the chat completion request body, with optional prior messages"""
+        return {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                *(history or []),
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+    
     def analyze_image(self, image_data, prompt=None, model="openai/gpt-4-vision"):
         """Analyze an image using OpenRouter Vision models"""
         try:
@@ -60,7 +109,7 @@ class OpenRouterService:
                 base64_image = base64.b64encode(buffer.getvalue()).decode('utf-8')
             else:
                 return "Unsupported image format"
-                
+            
             if not prompt:
                 prompt = """
                 Analyze this melon plant image. Identify:
@@ -70,6 +119,12 @@ class OpenRouterService:
                 4. Recommendations for the farmer
                 """
             
+            cache_key = AnalysisCache.make_key(image_data, prompt, model) if self.cache else None
+            if cache_key:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return cached
+            
             url = f"{self.base_url}/chat/completions"
             
             payload = {
@@ -83,11 +138,18 @@ class OpenRouterService:
                 ]
             }
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = self.http.post(url, metric="openrouter.vision", headers=self.headers, json=payload)
             response.raise_for_status()
             
             result = response.json()
-            return result["choices"][0]["message"]["content"]
+            content = result["choices"][0]["message"]["content"]
+            if cache_key:
+                self.cache.set(cache_key, content)
+            return content
         
         except Exception as e:
-            return f"Error analyzing image: {str(e)}"
\ No newline at end of file
+            return f"Error analyzing image: {str(e)}"
+    
+    def get_latency_metrics(self):
+        """Return per-endpoint latency metrics for calls made through this service"""
+        return self.http.metrics.summary()
\ No newline at end of file
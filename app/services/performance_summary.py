@@ -0,0 +1,218 @@
+import datetime
+import pandas as pd
+from sqlalchemy import DateTime, case, delete, func, literal, select, true, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.database import get_engine
+from app.models import (
+    GrowingMedia, IrrigationPerformance, IrrigationSchedule, IrrigationSystem, MediaPerformance, Plant,
+    PlantGrowthSummary, PlantMeasurement
+)
+from app.models.irrigation import frequency_interval
+from app.services.data_version import bump_data_version
+from app.services.yield_model import get_yield_model
+
+
+def _parameters(frame):
+    """Convert a small DataFrame to Core parameters with NaN/NaT as None"""
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+
+def _growth_rate(table):
+    """Height gained per week between the first and last measurement"""
+    days = func.julianday(table.c.last_measured) - func.julianday(table.c.first_measured)
+    return case((days > 0, (table.c.max_height - table.c.min_height) * 7.0 / days), else_=None)
+
+
+def update_plant_growth(conn, frame):
+    """Fold a batch of raw measurements into the per-plant growth summaries
+    
+    Returns the ids of the plants the batch touched.
+    """
+    grouped = frame.groupby("plant_id")
+    batch = pd.DataFrame({
+        "first_measured": grouped["measurement_date"].min(),
+        "last_measured": grouped["measurement_date"].max(),
+        "min_height": grouped["height"].min(),
+        "max_height": grouped["height"].max(),
+        "readings": grouped.size(),
+    }).reset_index()
+    
+    table = PlantGrowthSummary.__table__
+    statement = sqlite_insert(table)
+    new = statement.excluded
+    merged = {"readings": table.c.readings + new.readings}
+    for column, combine in (
+        ("first_measured", func.min), ("last_measured", func.max), ("min_height", func.min), ("max_height", func.max)
+    ):
+        # SQLite's scalar min()/max() return NULL if any argument is NULL
+        merged[column] = combine(func.coalesce(table.c[column], new[column]), func.coalesce(new[column], table.c[column]))
+    conn.execute(statement.on_conflict_do_update(index_elements=["plant_id"], set_=merged), _parameters(batch))
+    
+    plant_ids = [int(plant_id) for plant_id in batch["plant_id"]]
+    conn.execute(update(table).where(table.c.plant_id.in_(plant_ids)).values(growth_rate=_growth_rate(table)))
+    return plant_ids
+
+
+def _refresh_group(conn, model, key, plant_key, group_ids, extra=None):
+    """Recompute the summary rows of the given groups from the per-plant summaries"""
+    plants = Plant.__table__
+    growth = PlantGrowthSummary.__table__
+    table = model.__table__
+    columns = {
+        key: plants.c[plant_key],
+        "plants": func.count(plants.c.id),
+        "measured_plants": func.count(growth.c.growth_rate),
+        "growth_rate": func.avg(growth.c.growth_rate),
+        "harvested_plants": func.count(plants.c.harvest_yield),
+        "avg_yield": func.avg(plants.c.harvest_yield),
+        "readings": func.coalesce(func.sum(growth.c.readings), 0),
+        **(extra or {}),
+        "updated_at": literal(datetime.datetime.utcnow(), DateTime()),
+    }
+    group_filter = plants.c[plant_key].in_(group_ids) if group_ids is not None else plants.c[plant_key].isnot(None)
+    source = (
+        select(*[value.label(name) for name, value in columns.items()])
+        .select_from(plants.outerjoin(growth, growth.c.plant_id == plants.c.id))
+        .where(group_filter)
+        .group_by(plants.c[plant_key])
+    )
+    
+    # Delete first so groups that lost all their plants do not keep stale numbers
+    conn.execute(delete(table).where(table.c[key].in_(group_ids) if group_ids is not None else true()))
+    conn.execute(sqlite_insert(table).from_select(list(columns), source))
+
+
+def _refresh_water_usage(conn, irrigation_ids):
+    """Scheduled water use per plant for the given irrigation systems"""
+    systems = IrrigationSystem.__table__
+    schedules = IrrigationSchedule.__table__
+    table = IrrigationPerformance.__table__
+    
+    rows = conn.execute(
+        select(table.c.irrigation_id, table.c.plants, table.c.avg_yield, systems.c.flow_rate)
+        .join(systems, systems.c.id == table.c.irrigation_id)
+        .where(table.c.irrigation_id.in_(irrigation_ids) if irrigation_ids is not None else true())
+    ).all()
+    minutes = {}
+    for system_id, duration, frequency in conn.execute(
+        select(schedules.c.system_id, schedules.c.duration, schedules.c.frequency)
+        .where(schedules.c.system_id.in_([row.irrigation_id for row in rows]), schedules.c.is_active.isnot(False))
+    ):
+        # Frequencies are free text, so runs per day are parsed here
+        interval = frequency_interval(frequency)
+        runs = datetime.timedelta(days=1) / interval if interval else 1.0
+        minutes[system_id] = minutes.get(system_id, 0.0) + (duration or 0) * runs
+    
+    for row in rows:
+        usage = minutes.get(row.irrigation_id, 0.0) / 60.0 * (row.flow_rate or 0.0) / max(row.plants, 1)
+        conn.execute(
+            update(table).where(table.c.irrigation_id == row.irrigation_id).values(
+                water_usage=usage, water_per_kg=usage / row.avg_yield if row.avg_yield else None
+            )
+        )
+
+
+def refresh_groups(conn, plant_ids=None):
+    """Refresh the media and irrigation summaries of the groups these plants belong to (None = all)"""
+    media_ids = irrigation_ids = None
+    if plant_ids is not None:
+        plants = Plant.__table__
+        rows = conn.execute(
+            select(plants.c.media_id, plants.c.irrigation_id).where(plants.c.id.in_(plant_ids)).distinct()
+        ).all()
+        media_ids = sorted({row.media_id for row in rows if row.media_id is not None})
+        irrigation_ids = sorted({row.irrigation_id for row in rows if row.irrigation_id is not None})
+    
+    _refresh_group(
+        conn, MediaPerformance, "media_id", "media_id", media_ids,
+        extra={"avg_fruit_count": func.avg(Plant.__table__.c.fruit_count)}
+    )
+    _refresh_group(conn, IrrigationPerformance, "irrigation_id", "irrigation_id", irrigation_ids)
+    _refresh_water_usage(conn, irrigation_ids)
+
+
+class PerformanceSummary:
+    """Materialized per-media and per-irrigation performance numbers
+    
+    Measurement batches update the per-plant growth summaries and then only
+    the groups those plants belong to, so reads cost O(groups) and writes
+    never rescan the measurement history.
+    """
+    
+    def __init__(self, database_url=None):
+        self.database_url = database_url
+        self.engine = get_engine(database_url)
+    
+    def record_harvest(self, plant_id, harvest_yield, harvest_date=None, fruit_count=None):
+        """Store a plant's harvest and refresh its group summaries and the yield model"""
+        plants = Plant.__table__
+        values = {"harvest_yield": harvest_yield, "harvest_date": harvest_date or datetime.datetime.utcnow()}
+        if fruit_count is not None:
+            values["fruit_count"] = fruit_count
+        
+        with self.engine.begin() as conn:
+            conn.execute(update(plants).where(plants.c.id == plant_id).values(**values))
+            refresh_groups(conn, [plant_id])
+        get_yield_model(self.database_url).update([plant_id])
+        bump_data_version("plants")
+    
+    def refresh(self, plant_ids=None):
+        """Refresh group summaries after plants or irrigation schedules change (None = all groups)"""
+        with self.engine.begin() as conn:
+            refresh_groups(conn, plant_ids)
+        if plant_ids is None:
+            get_yield_model(self.database_url).fit()
+        else:
+            get_yield_model(self.database_url).update(plant_ids)
+        bump_data_version("plants")
+    
+    def rebuild(self):
+        """Recompute every summary from the raw measurements"""
+        raw = PlantMeasurement.__table__
+        table = PlantGrowthSummary.__table__
+        source = select(
+            raw.c.plant_id, func.min(raw.c.measurement_date), func.max(raw.c.measurement_date),
+            func.min(raw.c.height), func.max(raw.c.height), func.count()
+        ).where(raw.c.plant_id.isnot(None)).group_by(raw.c.plant_id)
+        
+        with self.engine.begin() as conn:
+            conn.execute(delete(table))
+            conn.execute(table.insert().from_select(
+                ["plant_id", "first_measured", "last_measured", "min_height", "max_height", "readings"], source
+            ))
+            conn.execute(update(table).values(growth_rate=_growth_rate(table)))
+            refresh_groups(conn)
+        get_yield_model(self.database_url).fit()
+        bump_data_version("plants")
+    
+    def media_summary(self):
+        """Precomputed numbers for every growing medium"""
+        media = GrowingMedia.__table__
+        table = MediaPerformance.__table__
+        query = (
+            select(
+                media.c.name.label("media"), table.c.growth_rate, table.c.avg_yield, table.c.avg_fruit_count,
+                func.coalesce(table.c.plants, 0).label("plants"), table.c.updated_at
+            )
+            .outerjoin(table, table.c.media_id == media.c.id)
+            .order_by(media.c.name)
+        )
+        with self.engine.connect() as conn:
+            result = conn.execute(query)
+            return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+    
+    def irrigation_summary(self):
+        """Precomputed numbers for every irrigation system"""
+        systems = IrrigationSystem.__table__
+        table = IrrigationPerformance.__table__
+        query = (
+            select(
+                systems.c.name.label("system"), table.c.water_usage, table.c.water_per_kg, table.c.growth_rate,
+                table.c.avg_yield, func.coalesce(table.c.plants, 0).label("plants"), table.c.updated_at
+            )
+            .outerjoin(table, table.c.irrigation_id == systems.c.id)
+            .order_by(systems.c.name)
+        )
+        with self.engine.connect() as conn:
+            result = conn.execute(query)
+            return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
\ No newline at end of file
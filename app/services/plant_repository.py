@@ -0,0 +1,126 @@
+import datetime
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, raiseload, selectinload
+from app.database import get_engine, get_session
+from app.models import DailyMeasurementRollup, GrowingMedia, IrrigationSystem, Plant, PlantAnalysis
+from app.services.alert_engine import get_alert_engine
+from app.services.data_version import bump_data_version
+
+
+def _loader_options(strategy):
+    """Eager loading options for "list" (plant tables) or "detail" (one plant's page)
+    
+    Many-to-one relationships are joined into the plant query, collections
+    are fetched with one IN query each, and anything not listed raises
+    instead of lazy loading, so a page of plants costs a fixed number of
+    queries.
+    """
+    many_to_one = [joinedload(Plant.media), joinedload(Plant.irrigation)]
+    if strategy == "list":
+        return many_to_one + [raiseload("*")]
+    if strategy == "detail":
+        return many_to_one + [
+            joinedload(Plant.user), selectinload(Plant.measurements), selectinload(Plant.analyses), raiseload("*")
+        ]
+    raise ValueError(f"Unknown loading strategy: {strategy}")
+
+
+class PlantRepository:
+    """Plant queries with predefined loading strategies"""
+    
+    def __init__(self, database_url=None):
+        self.database_url = database_url
+        self.engine = get_engine(database_url)
+    
+    def get(self, plant_id, strategy="detail"):
+        """Load one plant with its relationships, detached from the session"""
+        with get_session(self.database_url, expire_on_commit=False) as session:
+            return session.scalars(
+                select(Plant).options(*_loader_options(strategy)).where(Plant.id == plant_id)
+            ).unique().one_or_none()
+    
+    def list(self, strategy="list", active_only=True, limit=None, offset=0):
+        """Load plants ordered by name with their relationships, detached from the session"""
+        query = select(Plant).options(*_loader_options(strategy)).order_by(Plant.name, Plant.id)
+        if active_only:
+            query = query.where(Plant.is_active.is_(True))
+        query = query.limit(limit).offset(offset)
+        with get_session(self.database_url, expire_on_commit=False) as session:
+            return session.scalars(query).unique().all()
+    
+    def add_analysis(self, plant_id, image_bytes, store=None, **results):
+        """Record an analysis of a plant, its image saved in the image store; returns the analysis"""
+        analysis = PlantAnalysis(plant_id=plant_id, **results)
+        analysis.set_image(image_bytes, store)
+        with get_session(self.database_url, expire_on_commit=False) as session:
+            session.add(analysis)
+            session.commit()
+        # The plant list shows each plant's latest health score
+        bump_data_version("plants")
+        # Alerts are raised here rather than when the dashboard reads them
+        get_alert_engine(self.database_url).scan_analyses()
+        return analysis
+    
+    def analyses(self, plant_id, limit=None):
+        """A plant's analyses, newest first, detached from the session"""
+        query = (
+            select(PlantAnalysis)
+            .where(PlantAnalysis.plant_id == plant_id)
+            .order_by(PlantAnalysis.analysis_date.desc(), PlantAnalysis.id.desc())
+            .limit(limit)
+        )
+        with get_session(self.database_url, expire_on_commit=False) as session:
+            return session.scalars(query).all()
+    
+    def summaries(self, active_only=True, now=None):
+        """One-query projection of the columns the plant list shows"""
+        now = now or datetime.datetime.utcnow()
+        plants = Plant.__table__
+        media = GrowingMedia.__table__
+        systems = IrrigationSystem.__table__
+        analyses = PlantAnalysis.__table__
+        latest_score = (
+            select(analyses.c.health_score)
+            .where(analyses.c.plant_id == plants.c.id, analyses.c.health_score.isnot(None))
+            .order_by(analyses.c.analysis_date.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        query = (
+            select(
+                plants.c.id, plants.c.name, plants.c.variety, plants.c.planting_date,
+                media.c.name.label("media"), systems.c.name.label("irrigation"),
+                plants.c.health_status.label("health"), latest_score.label("health_score"),
+                plants.c.current_height, plants.c.fruit_count, plants.c.notes
+            )
+            .outerjoin(media, media.c.id == plants.c.media_id)
+            .outerjoin(systems, systems.c.id == plants.c.irrigation_id)
+            .order_by(plants.c.name, plants.c.id)
+        )
+        if active_only:
+            query = query.where(plants.c.is_active.is_(True))
+        
+        with self.engine.connect() as conn:
+            result = conn.execute(query)
+            frame = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+        frame["planting_date"] = pd.to_datetime(frame["planting_date"])
+        frame["age"] = (pd.Timestamp(now) - frame["planting_date"]).dt.days
+        return frame
+    
+    def daily_heights(self, plant_ids, start=None):
+        """Daily mean heights of several plants in one query, from the daily rollup"""
+        daily = DailyMeasurementRollup.__table__
+        query = (
+            select(
+                daily.c.plant_id, daily.c.bucket_start.label("date"),
+                (daily.c.height_sum / daily.c.height_count).label("height")
+            )
+            .where(daily.c.plant_id.in_([int(plant_id) for plant_id in plant_ids]), daily.c.height_count > 0)
+            .order_by(daily.c.plant_id, daily.c.bucket_start)
+        )
+        if start is not None:
+            query = query.where(daily.c.bucket_start >= start)
+        with self.engine.connect() as conn:
+            result = conn.execute(query)
+            return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
\ No newline at end of file
@@ -0,0 +1,88 @@
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+# Columns kept by the snapshot; text columns hold "" for missing values so they sort
+TEXT_COLUMNS = ("name", "variety", "media", "irrigation", "health", "notes")
+NUMBER_COLUMNS = ("health_score", "age", "current_height")
+SORT_COLUMNS = ("name", "variety", "health", "health_score", "age")
+
+PlantRow = namedtuple("PlantRow", ("id", *TEXT_COLUMNS, *NUMBER_COLUMNS, "planting_date"))
+
+
+class PlantSnapshot:
+    """Immutable columnar view of the plant list
+    
+    Columns are NumPy arrays shared by every derived snapshot; filter(),
+    sort() and page() only build a new row index, so narrowing thousands of
+    plants to one page never copies or rebuilds per-plant objects.
+    """
+    
+    __slots__ = ("_columns", "_rows")
+    
+    def __init__(self, columns, rows=None):
+        self._columns = columns
+        self._rows = np.arange(len(columns["id"])) if rows is None else rows
+    
+    @classmethod
+    def from_frame(cls, frame):
+        """Build a snapshot from PlantRepository.summaries()"""
+        columns = {"id": frame["id"].to_numpy(dtype=np.int64)}
+        for name in TEXT_COLUMNS:
+            columns[name] = frame[name].fillna("").astype(str).to_numpy(dtype=object)
+        for name in NUMBER_COLUMNS:
+            columns[name] = pd.to_numeric(frame[name], errors="coerce").to_numpy(dtype=float)
+        columns["planting_date"] = pd.to_datetime(frame["planting_date"]).to_numpy()
+        return cls(columns)
+    
+    def __len__(self):
+        return len(self._rows)
+    
+    def column(self, name):
+        """Values of one column for the rows in this snapshot"""
+        return self._columns[name][self._rows]
+    
+    def distinct(self, name):
+        """Sorted non-empty values of a text column, for filter widgets"""
+        return sorted(value for value in set(self.column(name)) if value)
+    
+    def filter(self, varieties=None, health=None, min_age=None, max_age=None, search=None):
+        """Rows matching every given condition"""
+        keep = np.ones(len(self._rows), dtype=bool)
+        if varieties:
+            keep &= np.isin(self.column("variety"), list(varieties))
+        if health:
+            keep &= np.isin(self.column("health"), list(health))
+        age = self.column("age")
+        if min_age is not None:
+            keep &= age >= min_age
+        if max_age is not None:
+            keep &= age <= max_age
+        if search:
+            needle = search.lower()
+            keep &= np.array([needle in name.lower() for name in self.column("name")], dtype=bool)
+        return PlantSnapshot(self._columns, self._rows[keep])
+    
+    def sort(self, by="name", descending=False):
+        """Rows ordered by one column (stable; missing numbers last)"""
+        if by not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort plants by {by}")
+        values = self.column(by)
+        if values.dtype == object:
+            _, values = np.unique(values, return_inverse=True)
+        else:
+            values = np.where(np.isnan(values), np.inf if not descending else -np.inf, values)
+        order = np.argsort(-values if descending else values, kind="stable")
+        return PlantSnapshot(self._columns, self._rows[order])
+    
+    def page(self, number, size):
+        """The rows of a 0-based page"""
+        return PlantSnapshot(self._columns, self._rows[number * size:(number + 1) * size])
+    
+    def pages(self, size):
+        """Number of pages of the given size (at least one)"""
+        return max(1, -(-len(self._rows) // size))
+    
+    def records(self):
+        """Iterate the rows as PlantRow tuples for rendering"""
+        return map(PlantRow._make, zip(*(self.column(name) for name in PlantRow._fields)))
\ No newline at end of file
@@ -0,0 +1,91 @@
+import threading
+import config
+
+
+def _build_gemini(registry):
+    from app.services.gemini_service import GeminiService
+    return GeminiService()
+
+
+def _build_openrouter(registry):
+    from app.services.openrouter_service import OpenRouterService
+    return OpenRouterService()
+
+
+def _build_image_analysis(registry):
+    from app.services.image_analysis_service import ImageAnalysisService
+    if config.DEFAULT_AI_MODEL.lower() == "gemini":
+        return ImageAnalysisService(ai_service=registry.gemini())
+    return ImageAnalysisService(ai_service=registry.openrouter())
+
+
+# name -> (settings the instance depends on, factory)
+_SERVICES = {
+    "gemini": (lambda: (config.GEMINI_API_KEY,), _build_gemini),
+    "openrouter": (lambda: (config.OPENROUTER_API_KEY,), _build_openrouter),
+    "image_analysis": (
+        lambda: (config.DEFAULT_AI_MODEL, config.GEMINI_API_KEY, config.OPENROUTER_API_KEY),
+        _build_image_analysis
+    ),
+}
+
+
+class ServiceRegistry:
+    """Creates each AI service once per process and rebuilds it when its settings change"""
+    
+    def __init__(self):
+        self._services = {}
+        self._settings = {}
+        self._lock = threading.RLock()
+    
+    def get(self, name):
+        """Return the shared instance of a service, building it if needed"""
+        settings_of, factory = _SERVICES[name]
+        settings = settings_of()
+        with self._lock:
+            # Hot reload: a changed API key or default model invalidates the instance
+            if name not in self._services or self._settings[name] != settings:
+                self._services[name] = factory(self)
+                self._settings[name] = settings
+            return self._services[name]
+    
+    def gemini(self):
+        """Return the shared GeminiService"""
+        return self.get("gemini")
+    
+    def openrouter(self):
+        """Return the shared OpenRouterService"""
+        return self.get("openrouter")
+    
+    def image_analysis(self):
+        """Return the shared ImageAnalysisService"""
+        return self.get("image_analysis")
+    
+    def update_api_keys(self, gemini_api_key=None, openrouter_api_key=None):
+        """Apply new API keys; affected services are rebuilt on next use"""
+        with self._lock:
+            if gemini_api_key:
+                config.GEMINI_API_KEY = gemini_api_key
+            if openrouter_api_key:
+                config.OPENROUTER_API_KEY = openrouter_api_key
+    
+    def reload(self, name=None):
+        """Drop one or all instances so they are rebuilt on next use"""
+        with self._lock:
+            names = [name] if name else list(self._services)
+            for service_name in names:
+                self._services.pop(service_name, None)
+                self._settings.pop(service_name, None)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_service_registry():
+    """Return the process-wide service registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ServiceRegistry()
+        return _registry
\ No newline at end of file
@@ -0,0 +1,97 @@
+import itertools
+import os
+import time
+import numpy as np
+import pandas as pd
+import config
+from app.services.measurement_store import MeasurementStore, MEASUREMENT_COLUMNS
+
+# Plausible sensor ranges (inclusive); readings outside them are rejected
+VALID_RANGES = {
+    "height": (0, 1000),  # in cm
+    "stem_diameter": (0, 200),  # in mm
+    "leaf_count": (0, 10000),
+    "fruit_count": (0, 1000),
+    "temperature": (-20, 60),  # in Celsius
+    "humidity": (0, 100),  # percentage
+    "light_level": (0, 200000),  # in lux
+}
+
+
+def validate_readings(frame):
+    """Vectorized validation; returns (valid rows, number of rejected rows)
+    
+    plant_id and a parseable measurement_date are required. Metric values
+    may be missing, but a value that is not numeric or lies outside
+    VALID_RANGES rejects the whole row.
+    """
+    frame = frame.reindex(columns=list(MEASUREMENT_COLUMNS))
+    plant_id = pd.to_numeric(frame["plant_id"], errors="coerce")
+    dates = pd.to_datetime(frame["measurement_date"], errors="coerce")
+    valid = plant_id.notna().to_numpy() & (plant_id > 0).to_numpy() & dates.notna().to_numpy()
+    
+    clean = {"plant_id": plant_id, "measurement_date": dates}
+    for column, (low, high) in VALID_RANGES.items():
+        raw = frame[column]
+        values = pd.to_numeric(raw, errors="coerce")
+        present = values.notna().to_numpy()
+        valid &= present == raw.notna().to_numpy()
+        valid &= ~present | ((values >= low) & (values <= high)).to_numpy()
+        clean[column] = values
+    
+    frame = pd.DataFrame(clean)[valid]
+    frame["plant_id"] = frame["plant_id"].astype(np.int64)
+    return frame, int((~valid).sum())
+
+
+def read_chunks(source, fmt=None, chunk_size=None, columns=None):
+    """Yield DataFrame chunks from a CSV/JSON-lines path or file, or an iterable of tuples
+    
+    fmt is "csv", "jsonl" or "tuples" and is inferred from a path's
+    extension or defaults to "tuples" for other iterables. Tuples are read
+    in MEASUREMENT_COLUMNS order unless columns is given.
+    """
+    chunk_size = chunk_size or config.SENSOR_INGEST_CHUNK_SIZE
+    if fmt is None:
+        if isinstance(source, (str, os.PathLike)):
+            fmt = "jsonl" if str(source).endswith((".jsonl", ".json")) else "csv"
+        else:
+            fmt = "tuples"
+    
+    if fmt == "csv":
+        yield from pd.read_csv(source, chunksize=chunk_size)
+    elif fmt == "jsonl":
+        # Keep measurement_date as text; validation parses it
+        yield from pd.read_json(source, lines=True, chunksize=chunk_size, convert_dates=False)
+    elif fmt == "tuples":
+        rows = iter(source)
+        columns = list(columns or MEASUREMENT_COLUMNS)
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            yield pd.DataFrame.from_records(chunk, columns=columns)
+    else:
+        raise ValueError(f"Unsupported ingest format: {fmt}")
+
+
+def ingest(source, fmt=None, chunk_size=None, columns=None, store=None):
+    """Bulk-load sensor readings, one transaction per chunk
+    
+    Returns counts of inserted and rejected rows plus the throughput.
+    """
+    store = store or MeasurementStore()
+    inserted = rejected = 0
+    start = time.perf_counter()
+    for chunk in read_chunks(source, fmt, chunk_size, columns):
+        valid, bad = validate_readings(chunk)
+        inserted += store.add_measurements(valid)
+        rejected += bad
+    
+    elapsed = time.perf_counter() - start
+    return {
+        "inserted": inserted,
+        "rejected": rejected,
+        "seconds": elapsed,
+        "rows_per_second": inserted / elapsed if elapsed else 0.0
+    }
\ No newline at end of file
@@ -0,0 +1,401 @@
+import datetime
+import json
+import socket
+import threading
+import time
+import numpy as np
+import pandas as pd
+import config
+from app.services.measurement_store import MEASUREMENT_COLUMNS, MeasurementStore
+from app.services.sensor_ingest import VALID_RANGES, validate_readings
+
+# Plant reading columns that also feed the farm-wide live buffers
+LIVE_METRICS = ("temperature", "humidity", "light_level")
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+class RingBuffer:
+    """Fixed-size time series of one sensor with O(1) appends and window stats
+    
+    Readings live in preallocated NumPy arrays indexed by sequence number
+    modulo the size. Running sums and sums of squares are stored next to
+    each reading (one spare slot keeps the total just before the oldest
+    reading), so the mean and deviation of any window are a difference of
+    two entries and a time window only adds a binary search for its first
+    reading; min and max scan the window. The totals are taken about the
+    first reading so they stay small and precise for steady sensors.
+    Timestamps are kept non-decreasing (a late reading is stamped with the
+    newest time seen) so the search stays valid.
+    """
+    
+    __slots__ = ("capacity", "count", "_shift", "_times", "_values", "_sums", "_squares")
+    
+    def __init__(self, capacity=None):
+        self.capacity = capacity or config.TELEMETRY_BUFFER_SIZE
+        self.count = 0
+        self._shift = 0.0
+        self._times = np.zeros(self.capacity + 1)
+        self._values = np.zeros(self.capacity + 1)
+        # Running totals up to and including each slot's reading
+        self._sums = np.zeros(self.capacity + 1)
+        self._squares = np.zeros(self.capacity + 1)
+    
+    def __len__(self):
+        return min(self.count, self.capacity)
+    
+    def _slot(self, sequence):
+        """Array position of a reading's sequence number"""
+        return sequence % (self.capacity + 1)
+    
+    def extend(self, times, values):
+        """Append readings (epoch seconds, values) in arrival order"""
+        times = np.asarray(times, dtype=float)
+        values = np.asarray(values, dtype=float)
+        if not len(values):
+            return
+        if self.count:
+            previous = self._slot(self.count - 1)
+            newest, total, squares = self._times[previous], self._sums[previous], self._squares[previous]
+        else:
+            newest, total, squares = -np.inf, 0.0, 0.0
+            self._shift = values[0]
+        deviations = values - self._shift
+        sums = total + np.cumsum(deviations)
+        sum_squares = squares + np.cumsum(deviations ** 2)
+        stamps = np.maximum.accumulate(np.maximum(times, newest))
+        # Only the last capacity + 1 readings of a large batch survive
+        keep = slice(-(self.capacity + 1), None)
+        slots = self._slot(np.arange(self.count, self.count + len(values)))[keep]
+        self._times[slots] = stamps[keep]
+        self._values[slots] = values[keep]
+        self._sums[slots] = sums[keep]
+        self._squares[slots] = sum_squares[keep]
+        self.count += len(values)
+    
+    def append(self, timestamp, value):
+        """Append one reading"""
+        self.extend([timestamp], [value])
+    
+    def latest(self):
+        """(timestamp, value) of the newest reading, or None"""
+        if not self.count:
+            return None
+        slot = self._slot(self.count - 1)
+        return float(self._times[slot]), float(self._values[slot])
+    
+    def _first(self, seconds, now):
+        """Sequence number of the oldest kept reading in the last seconds (or of any kept reading)"""
+        oldest = max(self.count - self.capacity, 0)
+        if seconds is None or self.count == oldest:
+            return oldest
+        since = (time.time() if now is None else now) - seconds
+        start, end = self._slot(oldest), self._slot(self.count)
+        # Kept readings are times[start:end], or times[start:] then times[:end] once wrapped
+        older = self._times[start:end] if start < end else self._times[start:]
+        position = np.searchsorted(older, since, side="left")
+        if position == len(older) and start >= end:
+            position += np.searchsorted(self._times[:end], since, side="left")
+        return oldest + int(position)
+    
+    def series(self, seconds=None, now=None):
+        """(times, values) of the last seconds, oldest first"""
+        slots = self._slot(np.arange(self._first(seconds, now), self.count))
+        return self._times[slots], self._values[slots]
+    
+    def stats(self, seconds=None, now=None):
+        """count, mean, std, min, max and latest of the last seconds (all kept readings by default)"""
+        first = self._first(seconds, now)
+        count = self.count - first
+        if count <= 0:
+            return {"count": 0, "mean": None, "std": None, "min": None, "max": None, "latest": None}
+        
+        last = self._slot(self.count - 1)
+        before = self._slot(first - 1)
+        total = self._sums[last] - (self._sums[before] if first else 0.0)
+        squares = self._squares[last] - (self._squares[before] if first else 0.0)
+        mean = total / count
+        window = self._values[self._slot(np.arange(first, self.count))]
+        return {
+            "count": count,
+            "mean": float(self._shift + mean),
+            "std": float(np.sqrt(max(squares / count - mean ** 2, 0.0))),
+            "min": float(window.min()),
+            "max": float(window.max()),
+            "latest": float(self._values[last]),
+        }
+
+
+class TelemetryHub:
+    """Live sensor readings kept in memory, with plant readings written to the database in batches
+    
+    Messages are dicts. Plant readings carry plant_id and any of LIVE_METRICS
+    and feed one farm-wide buffer per metric; they are also queued and
+    flushed through MeasurementStore every TELEMETRY_FLUSH_INTERVAL seconds
+    or TELEMETRY_FLUSH_SIZE readings. Other sensors send "sensor" and
+    "value", plus "system" for a per-irrigation-system buffer next to the
+    farm-wide one. "ts" (epoch seconds) defaults to the arrival time. Live
+    metrics read only the buffers, never the database. Sensor readings go
+    through the store's alert engine as they arrive, plant readings as they
+    are flushed.
+    """
+    
+    def __init__(self, database_url=None, store=None, capacity=None, clock=time.time):
+        self.store = store or MeasurementStore(database_url)
+        self.capacity = capacity or config.TELEMETRY_BUFFER_SIZE
+        self.clock = clock
+        self.received = 0
+        self.rejected = 0
+        self.flushed = 0
+        self.last_error = None
+        self.server = None
+        self._buffers = {}
+        self._pending = []
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+        self._stopping = False
+    
+    def record(self, messages):
+        """Add a batch of messages to the buffers and the write queue; returns how many were accepted"""
+        now = self.clock()
+        readings, sensor_readings, plant_rows, rejected = {}, {}, [], 0
+        for message in messages:
+            try:
+                timestamp = float(message.get("ts") or now)
+                if "plant_id" in message:
+                    row = {column: message.get(column) for column in MEASUREMENT_COLUMNS}
+                    row["measurement_date"] = _EPOCH + datetime.timedelta(seconds=timestamp)
+                    live = [(metric, float(row[metric])) for metric in LIVE_METRICS if row[metric] is not None]
+                    plant_rows.append(row)
+                    for metric, value in live:
+                        low, high = VALID_RANGES[metric]
+                        if low <= value <= high:
+                            readings.setdefault(metric, []).append((timestamp, value))
+                else:
+                    value = float(message["value"])
+                    keys = [message["sensor"]] + ([f"{message['sensor']}/{message['system']}"] if message.get("system") else [])
+                    for key in keys:
+                        readings.setdefault(key, []).append((timestamp, value))
+                    # Alert rules see each reading once, under its most specific key
+                    sensor_readings.setdefault((message["sensor"], keys[-1]), []).append((timestamp, value))
+            except (AttributeError, KeyError, TypeError, ValueError):
+                rejected += 1
+        
+        with self._condition:
+            for key, points in readings.items():
+                if key not in self._buffers:
+                    self._buffers[key] = RingBuffer(self.capacity)
+                self._buffers[key].extend(*zip(*points))
+            self._pending.extend(plant_rows)
+            self.received += len(messages) - rejected
+            self.rejected += rejected
+            if len(self._pending) >= config.TELEMETRY_FLUSH_SIZE:
+                self._condition.notify()
+        # Plant readings reach the alert rules when they are flushed to the database
+        for (sensor, key), points in sensor_readings.items():
+            times, values = zip(*points)
+            self.store.alerts.observe(sensor, [key] * len(points), times, values)
+        return len(messages) - rejected
+    
+    def flush(self):
+        """Write the queued plant readings in one batch; returns the number stored"""
+        with self._flush_lock:
+            with self._condition:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+            valid, bad = validate_readings(pd.DataFrame(rows, columns=list(MEASUREMENT_COLUMNS)))
+            try:
+                stored = self.store.add_measurements(valid)
+            except Exception:
+                # Requeue ahead of newer readings for the next flush, dropping the oldest beyond the cap
+                with self._condition:
+                    self._pending = (rows + self._pending)[-config.TELEMETRY_MAX_PENDING:]
+                raise
+            with self._condition:
+                self.flushed += stored
+                self.rejected += bad
+            return stored
+    
+    def sensors(self):
+        """Names of the buffers holding readings"""
+        with self._condition:
+            return sorted(self._buffers)
+    
+    def latest(self, key):
+        """(datetime, value) of a sensor's newest reading, or None"""
+        with self._condition:
+            buffer = self._buffers.get(key)
+            point = buffer.latest() if buffer is not None else None
+        return None if point is None else (_EPOCH + datetime.timedelta(seconds=point[0]), point[1])
+    
+    def stats(self, key, seconds=None):
+        """Rolling stats of a sensor over the last seconds (TELEMETRY_WINDOW by default)"""
+        seconds = config.TELEMETRY_WINDOW if seconds is None else seconds
+        with self._condition:
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                return RingBuffer(1).stats()
+            return buffer.stats(seconds, self.clock())
+    
+    def series(self, key, seconds=None):
+        """A sensor's readings over the last seconds as a DataFrame of time and value"""
+        seconds = config.TELEMETRY_WINDOW if seconds is None else seconds
+        with self._condition:
+            buffer = self._buffers.get(key)
+            times, values = buffer.series(seconds, self.clock()) if buffer is not None else ([], [])
+            times, values = np.array(times), np.array(values)
+        return pd.DataFrame({"time": pd.to_datetime(times, unit="s"), "value": values})
+    
+    def _run(self):
+        """Flusher thread: write queued readings every interval, or early once enough are queued"""
+        failed = False
+        while True:
+            with self._condition:
+                if failed:
+                    # A failed write is retried after a full interval, however many readings queue up
+                    deadline = time.monotonic() + config.TELEMETRY_FLUSH_INTERVAL
+                    while not self._stopping and time.monotonic() < deadline:
+                        self._condition.wait(deadline - time.monotonic())
+                elif not self._stopping and len(self._pending) < config.TELEMETRY_FLUSH_SIZE:
+                    self._condition.wait(config.TELEMETRY_FLUSH_INTERVAL)
+                stopping = self._stopping
+            try:
+                self.flush()
+                failed = False
+            except Exception as e:
+                self.last_error = str(e)
+                failed = True
+            if stopping:
+                return
+    
+    def start(self):
+        """Start the background flusher"""
+        with self._condition:
+            if self._flusher is None:
+                self._stopping = False
+                self._flusher = threading.Thread(target=self._run, name="telemetry-flusher", daemon=True)
+                self._flusher.start()
+        return self
+    
+    def stop(self):
+        """Stop the flusher after a final flush"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+            flusher, self._flusher = self._flusher, None
+        if flusher is not None:
+            flusher.join()
+
+
+def decode_datagram(data):
+    """Messages of one datagram: JSON objects, one per line"""
+    messages = []
+    for line in data.decode("utf-8", errors="replace").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            messages.append(json.loads(line))
+        except ValueError:
+            messages.append(None)
+    return messages
+
+
+class TelemetryServer:
+    """Local UDP listener feeding a TelemetryHub
+    
+    Devices (or a bridge from an MQTT broker) send JSON-lines datagrams.
+    Datagrams already queued in the socket are drained together and handed
+    to the hub as one batch.
+    """
+    
+    def __init__(self, hub, host=None, port=None, batch_size=1000):
+        self.hub = hub
+        self.host = host or config.TELEMETRY_HOST
+        self.port = config.TELEMETRY_PORT if port is None else port
+        self.batch_size = batch_size
+        self.address = None
+        self._socket = None
+        self._thread = None
+        self._stopping = threading.Event()
+    
+    def start(self):
+        """Bind the socket and start receiving; address holds the bound (host, port)"""
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind((self.host, self.port))
+        self._socket.settimeout(0.5)
+        self.address = self._socket.getsockname()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="telemetry-listener", daemon=True)
+        self._thread.start()
+        return self
+    
+    def _run(self):
+        """Receive loop: block for one datagram, then drain what is waiting without blocking"""
+        while not self._stopping.is_set():
+            try:
+                data = self._socket.recv(65535)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            messages = decode_datagram(data)
+            self._socket.setblocking(False)
+            try:
+                while len(messages) < self.batch_size:
+                    messages.extend(decode_datagram(self._socket.recv(65535)))
+            except (BlockingIOError, OSError):
+                pass
+            finally:
+                if not self._stopping.is_set():
+                    self._socket.settimeout(0.5)
+            try:
+                self.hub.record(messages)
+            except Exception as e:
+                self.hub.last_error = str(e)
+    
+    def stop(self):
+        """Stop receiving and close the socket"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+def send_readings(messages, host=None, port=None, max_datagram=60000):
+    """Send messages to a telemetry listener as JSON-lines datagrams"""
+    address = (host or config.TELEMETRY_HOST, config.TELEMETRY_PORT if port is None else port)
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+        datagram = b""
+        for message in messages:
+            line = json.dumps(message, default=str).encode() + b"\n"
+            if datagram and len(datagram) + len(line) > max_datagram:
+                sender.sendto(datagram, address)
+                datagram = b""
+            datagram += line
+        if datagram:
+            sender.sendto(datagram, address)
+
+
+_telemetry = None
+_telemetry_lock = threading.Lock()
+
+
+def get_telemetry():
+    """Return the process-wide telemetry hub, started with its UDP listener on first use"""
+    global _telemetry
+    with _telemetry_lock:
+        if _telemetry is None:
+            _telemetry = TelemetryHub().start()
+            try:
+                _telemetry.server = TelemetryServer(_telemetry).start()
+            except OSError as e:
+                # Another process (e.g. a second Streamlit server) already listens on the port
+                _telemetry.server = None
+                _telemetry.last_error = f"Telemetry listener not started: {e}"
+        return _telemetry
\ No newline at end of file
@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+import config
+from app.database import get_engine
+from app.models import GrowingMedia, IrrigationSystem, Plant
+
+# Categorical inputs of the model, in design-matrix order after the intercept
+FACTORS = ("variety", "media_id", "irrigation_id")
+
+
+def cache_path(database_url, path=None):
+    """Cache file of one database's fit: YIELD_MODEL_PATH suffixed with a hash of the URL"""
+    root, extension = os.path.splitext(path or config.YIELD_MODEL_PATH)
+    return f"{root}-{hashlib.sha1(database_url.encode()).hexdigest()[:12]}{extension}"
+
+
+class YieldModel:
+    """Least-squares model of log harvest yield by variety, media and irrigation system
+    
+    log(yield) = intercept + variety effect + media effect + irrigation effect,
+    with a ridge penalty on the effects so groups with few harvests stay close
+    to the overall mean and unseen groups predict it. The normal equations are
+    kept (and cached on disk, one file per database) rather than the
+    harvests, so recording a harvest is a rank-one update plus a solve over
+    a handful of coefficients. Every process records harvests through the
+    cache file, so a file newer than the loaded fit is read again first.
+    """
+    
+    def __init__(self, database_url=None, path=None, ridge=None):
+        self.database_url = database_url or config.DATABASE_URL
+        self.path = path or cache_path(self.database_url)
+        self.ridge = config.YIELD_MODEL_RIDGE if ridge is None else ridge
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._stamp = None
+    
+    def _reset(self):
+        """Forget every observation and coefficient"""
+        self.levels = {factor: [] for factor in FACTORS}
+        self.observations = {}
+        self.xtx = np.zeros((1, 1))
+        self.xty = np.zeros(1)
+        self.coefficients = None
+    
+    def _file_stamp(self):
+        """Modification time of the cache file, or None when there is none"""
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+    
+    def _ensure_loaded(self):
+        """Read the cached fit unless it is already loaded and unchanged, or fit from the database"""
+        stamp = self._file_stamp()
+        if self._loaded and stamp == self._stamp:
+            return
+        self._reset()
+        state = None
+        if stamp is not None:
+            with open(self.path) as f:
+                state = json.load(f)
+        if state and state.get("database_url") == self.database_url:
+            self.levels = state["levels"]
+            self.observations = {int(plant_id): row for plant_id, row in state["observations"].items()}
+            self.xtx = np.array(state["xtx"]).reshape(self._size(), self._size())
+            self.xty = np.array(state["xty"])
+            self._solve()
+        else:
+            self._fit()
+        self._loaded = True
+        self._stamp = stamp
+    
+    def _size(self):
+        """Number of coefficients, intercept included"""
+        return 1 + sum(len(values) for values in self.levels.values())
+    
+    def _columns(self, row, grow=False):
+        """Design-matrix positions of the indicators set by an observation"""
+        columns, offset = [0], 1
+        for factor, value in zip(FACTORS, row):
+            values = self.levels[factor]
+            if value is None:
+                # A missing factor sets no indicator and adds no level
+                offset += len(values)
+                continue
+            if value not in values and grow:
+                # A new level becomes a zero row/column of the normal equations
+                position = offset + len(values)
+                self.xtx = np.insert(np.insert(self.xtx, position, 0.0, axis=0), position, 0.0, axis=1)
+                self.xty = np.insert(self.xty, position, 0.0)
+                values.append(value)
+            if value in values:
+                columns.append(offset + values.index(value))
+            offset += len(values)
+        return columns
+    
+    def _accumulate(self, row, sign):
+        """Add (sign=1) or remove (sign=-1) one harvest from the normal equations"""
+        columns = self._columns(row[:3], grow=sign > 0)
+        self.xtx[np.ix_(columns, columns)] += sign
+        self.xty[columns] += sign * np.log(row[3])
+    
+    def _solve(self):
+        """Solve the ridge-penalized normal equations (the intercept is not penalized)"""
+        if not self.observations:
+            self.coefficients = None
+            return
+        penalty = np.full(self._size(), self.ridge)
+        penalty[0] = 0.0
+        # One-hot factors are collinear with the intercept; lstsq also copes without a penalty
+        self.coefficients = np.linalg.lstsq(self.xtx + np.diag(penalty), self.xty, rcond=None)[0]
+    
+    def _harvests(self, plant_ids=None):
+        """(plant_id, variety, media_id, irrigation_id, harvest_yield) of plants with a positive yield"""
+        plants = Plant.__table__
+        query = select(
+            plants.c.id, plants.c.variety, plants.c.media_id, plants.c.irrigation_id, plants.c.harvest_yield
+        ).where(plants.c.harvest_yield > 0)
+        if plant_ids is not None:
+            query = query.where(plants.c.id.in_(plant_ids))
+        with get_engine(self.database_url).connect() as conn:
+            return conn.execute(query).all()
+    
+    def _fit(self):
+        """Build the normal equations from every harvest in one vectorized pass"""
+        self._reset()
+        rows = self._harvests()
+        if rows:
+            frame = pd.DataFrame(rows, columns=["plant_id", *FACTORS, "harvest_yield"], dtype=object)
+            design = [np.ones((len(frame), 1))]
+            for factor in FACTORS:
+                codes, levels = pd.factorize(frame[factor])
+                self.levels[factor] = list(levels)
+                # Missing values (code -1) set no indicator
+                design.append((codes[:, None] == np.arange(len(levels))).astype(float))
+            design = np.hstack(design)
+            self.xtx = design.T @ design
+            self.xty = design.T @ np.log(frame["harvest_yield"].to_numpy(dtype=float))
+            self.observations = {row[0]: list(row[1:]) for row in rows}
+        self._solve()
+    
+    def _save(self):
+        """Write the normal equations to the cache file"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {
+            "database_url": self.database_url,
+            "levels": self.levels,
+            "observations": self.observations,
+            "xtx": self.xtx.ravel().tolist(),
+            "xty": self.xty.tolist(),
+        }
+        # Write then rename so readers never see a half-written file
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.path)
+        self._stamp = self._file_stamp()
+    
+    def fit(self):
+        """Refit from every recorded harvest"""
+        with self._lock:
+            self._fit()
+            self._loaded = True
+            self._save()
+    
+    def update(self, plant_ids):
+        """Fold new or changed harvests (or group moves) of these plants into the fit"""
+        rows = {row[0]: list(row[1:]) for row in self._harvests(plant_ids)}
+        with self._lock:
+            self._ensure_loaded()
+            for plant_id in plant_ids:
+                old, new = self.observations.pop(plant_id, None), rows.get(plant_id)
+                if old is not None:
+                    self._accumulate(old, -1)
+                if new is not None:
+                    self._accumulate(new, 1)
+                    self.observations[plant_id] = new
+            self._solve()
+            self._save()
+    
+    def predict_grid(self, varieties, media_ids, irrigation_ids):
+        """Predicted yield (kg/plant) for every variety x media x irrigation combination
+        
+        Returns an array shaped (varieties, media, irrigation systems), all NaN
+        before any harvest is recorded.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            coefficients = self.coefficients
+            levels = {factor: list(values) for factor, values in self.levels.items()}
+        
+        shape = (len(varieties), len(media_ids), len(irrigation_ids))
+        if coefficients is None:
+            return np.full(shape, np.nan)
+        
+        effects, offset = [], 1
+        for factor, requested in zip(FACTORS, (varieties, media_ids, irrigation_ids)):
+            index = {value: offset + i for i, value in enumerate(levels[factor])}
+            effects.append(np.array([coefficients[index[value]] if value in index else 0.0 for value in requested]))
+            offset += len(levels[factor])
+        
+        log_yield = coefficients[0] + effects[0][:, None, None] + effects[1][None, :, None] + effects[2][None, None, :]
+        return np.exp(log_yield)
+    
+    def yield_grid(self, varieties=None):
+        """Long-format predictions for every variety x growing medium x irrigation system"""
+        with get_engine(self.database_url).connect() as conn:
+            media = conn.execute(select(GrowingMedia.id, GrowingMedia.name).order_by(GrowingMedia.name)).all()
+            systems = conn.execute(select(IrrigationSystem.id, IrrigationSystem.name).order_by(IrrigationSystem.name)).all()
+            if varieties is None:
+                planted = conn.execute(select(Plant.variety).where(Plant.variety.isnot(None)).distinct()).scalars()
+                varieties = sorted(set(config.MELON_VARIETIES) | set(planted))
+        
+        grid = self.predict_grid(varieties, [row.id for row in media], [row.id for row in systems])
+        index = pd.MultiIndex.from_product(
+            [varieties, [row.name for row in media], [row.name for row in systems]],
+            names=["variety", "media", "system"]
+        )
+        return pd.DataFrame({"predicted_yield": grid.ravel()}, index=index).reset_index()
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_yield_model(database_url=None):
+    """Return the process-wide yield model for a database URL"""
+    url = database_url or config.DATABASE_URL
+    with _models_lock:
+        if url not in _models:
+            _models[url] = YieldModel(url)
+        return _models[url]
\ No newline at end of file
@@ -1,52 +1,73 @@
+import uuid
 import streamlit as st
-from app.services.gemini_service import GeminiService
-from app.services.openrouter_service import OpenRouterService
+from app.services.async_ai_service import get_async_ai_service, is_acceptable
+from app.services.conversation import ChatHistoryStore, ConversationManager
+from app.services.registry import get_service_registry
 import config
 
+# One registry (and so one client per provider) shared by every Streamlit session
+get_services = st.cache_resource(get_service_registry)
+
+# One background writer for chat history shared by every session
+get_history_store = st.cache_resource(ChatHistoryStore)
+
 def show():
     st.title("AI Consultation 🤖")
     
     # Model selection
     ai_model = st.sidebar.selectbox(
         "Select AI Model",
-        ["Gemini", "OpenRouter - Claude", "OpenRouter - GPT-4"],
+        ["Gemini", "OpenRouter - Claude", "OpenRouter - GPT-4", "Compare All Models"],
         index=0
     )
     
-    # Initialize chat history
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+    # Initialize the conversation: a token-budgeted window plus a compact memory
+    if "conversation" not in st.session_state:
+        # Signed-in users keep their history; anonymous visitors only see this browser session's
+        user_id = st.session_state.get("user_id")
+        st.session_state.conversation = ConversationManager(
+            user_id=user_id,
+            session_id=None if user_id is not None else uuid.uuid4().hex,
+            store=get_history_store()
+        )
+    conversation = st.session_state.conversation
+    
+    show_past_consultations(conversation.user_id, conversation.session_id)
+    
+    # Older turns are folded into a summary instead of being re-rendered
+    if conversation.summary:
+        with st.expander("Earlier in this conversation"):
+            st.markdown(conversation.summary)
     
     # Display chat messages
-    for message in st.session_state.messages:
+    for message in conversation.turns:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
     
     # Chat input
     if prompt := st.chat_input("Ask about your melon cultivation..."):
-        # Add user message to chat history
-        st.session_state.messages.append({"role": "user", "content": prompt})
-        
         # Display user message
         with st.chat_message("user"):
             st.markdown(prompt)
         
-        # Get AI response based on selected model
-        with st.spinner("Thinking..."):
-            if ai_model == "Gemini":
-                service = GeminiService()
-                response = service.get_response(prompt)
-            else:
-                service = OpenRouterService()
-                model = "anthropic/claude-3-opus" if "Claude" in ai_model else "openai/gpt-4"
-                response = service.get_response(prompt, model=model)
+        # Get AI response based on selected model, streamed token by token
+        if ai_model == "Compare All Models":
+            chunks = compare_models(prompt)
+        elif ai_model == "Gemini":
+            service = get_services().gemini()
+            chunks = service.stream_response(prompt, chat_history=conversation.gemini_history(service.system_prompt))
+        else:
+            service = get_services().openrouter()
+            model = "anthropic/claude-3-opus" if "Claude" in ai_model else "openai/gpt-4"
+            chunks = service.stream_response(prompt, model=model, history=conversation.context_messages())
         
-        # Display assistant response
+        # Display assistant response as it arrives
         with st.chat_message("assistant"):
-            st.markdown(response)
+            response = render_stream(chunks)
         
-        # Add assistant response to chat history
-        st.session_state.messages.append({"role": "assistant", "content": response})
+        # Keep failed calls out of the context sent with later questions
+        if is_acceptable(response):
+            conversation.add_exchange(prompt, response, model_used=ai_model)
     
     # Option to upload an image for analysis
     st.sidebar.markdown("---")
@@ -77,4 +98,47 @@ def show():
                     st.markdown(analysis_result)
                 
                 # Add assistant response to chat history
-                st.session_state.messages.append({"role": "assistant", "content": analysis_result})
\ No newline at end of file
+                conversation.add_exchange("Analyze the uploaded plant image", analysis_result, model_used=ai_model)
+
+def show_past_consultations(user_id, session_id=None):
+    """Show saved consultations, loading the latest page first and older pages on demand"""
+    store = get_history_store()
+    if "history_pages" not in st.session_state:
+        page, cursor = store.fetch_page(user_id, session_id=session_id)
+        st.session_state.history_pages = page
+        st.session_state.history_cursor = cursor
+    
+    if not st.session_state.history_pages:
+        return
+    
+    with st.expander("Past consultations"):
+        if st.session_state.history_cursor is not None and st.button("Load older consultations"):
+            page, cursor = store.fetch_page(user_id, cursor=st.session_state.history_cursor, session_id=session_id)
+            st.session_state.history_pages = page + st.session_state.history_pages
+            st.session_state.history_cursor = cursor
+        
+        for row in st.session_state.history_pages:
+            st.caption(f"{row['timestamp']:%Y-%m-%d %H:%M} · {row['model_used'] or 'AI'}")
+            st.markdown(f"**You:** {row['query']}")
+            st.markdown(row["response"])
+
+def render_stream(chunks):
+    """Render streamed text chunks incrementally and return the full response"""
+    placeholder = st.empty()
+    placeholder.markdown("Thinking...")
+    
+    response = ""
+    for chunk in chunks:
+        response += chunk
+        placeholder.markdown(response + "▌")
+    
+    placeholder.markdown(response)
+    return response
+
+def compare_models(prompt):
+    """Query every model concurrently and yield their answers for comparison"""
+    service = get_async_ai_service()
+    answers = service.run(service.fan_out(prompt, timeout=config.AI_FAN_OUT_TIMEOUT))
+    
+    for target, answer in answers.items():
+        yield f"**{target}:**\n\n{answer}\n\n"
\ No newline at end of file
@@ -2,7 +2,19 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-import random  # For demo data, remove in production
+from app.services.data_version import get_data_version
+from app.services.irrigation_scheduler import get_irrigation_scheduler
+from app.services.nutrient_solver import NutrientSolver
+from app.services.performance_summary import PerformanceSummary
+from app.services.plant_repository import PlantRepository
+from app.services.plant_snapshot import PlantSnapshot
+from app.services.telemetry import get_telemetry
+import config
+
+# One repository, nutrient solver and performance summary per process
+get_plant_repository = st.cache_resource(PlantRepository)
+get_nutrient_solver = st.cache_resource(NutrientSolver)
+get_performance_summary = st.cache_resource(PerformanceSummary)
 
 def show():
     st.title("Cultivation Management 🌱")
@@ -19,105 +31,129 @@ def show():
     with tab3:
         irrigation_control()
 
+@st.cache_resource(ttl=config.PLANT_SNAPSHOT_TTL, show_spinner=False)
+def load_snapshot(data_version):
+    """Columnar plant list, rebuilt when plant data changes or the TTL expires"""
+    return PlantSnapshot.from_frame(get_plant_repository().summaries())
+
+@st.cache_data(ttl=config.PLANT_SNAPSHOT_TTL, show_spinner=False)
+def load_heights(plant_ids, data_version):
+    """Daily heights of one page of plants, reused until new measurements arrive"""
+    return get_plant_repository().daily_heights(plant_ids, start=datetime.now() - timedelta(days=90))
+
 def show_plants():
     st.subheader("My Melon Plants")
     
-    # In a real app, this would come from the database
-    plants = [
-        {
-            "id": 1,
-            "name": "Plant #1",
-            "variety": "Honeydew",
-            "planting_date": "2023-05-15",
-            "age": "32 days",
-            "media": "Cocopeat",
-            "irrigation": "Drip Fertigation",
-            "health": "Good",
-            "stage": "Fruiting"
-        },
-        {
-            "id": 2,
-            "name": "Plant #2",
-            "variety": "Cantaloupe",
-            "planting_date": "2023-05-20",
-            "age": "27 days",
-            "media": "Rockwool",
-            "irrigation": "Drip Fertigation",
-            "health": "Excellent",
-            "stage": "Flowering"
-        },
-        {
-            "id": 3,
-            "name": "Plant #3",
-            "variety": "Galia",
-            "planting_date": "2023-05-25",
-            "age": "22 days",
-            "media": "Perlite",
-            "irrigation": "Deep Water Culture",
-            "health": "Fair",
-            "stage": "Vegetative"
-        }
-    ]
+    snapshot = load_snapshot(get_data_version("plants"))
+    if not len(snapshot):
+        st.info("No plants yet. Add one in the \"Add New Plant\" tab.")
+        return
     
-    # Convert to DataFrame for display
-    df_plants = pd.DataFrame(plants)
+    # Filters and ordering only re-index the cached snapshot
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        varieties = st.multiselect("Variety", snapshot.distinct("variety"))
+        search = st.text_input("Search by name")
+    with col2:
+        health = st.multiselect("Health Status", snapshot.distinct("health"))
+        ages = snapshot.column("age")
+        oldest = int(max(ages[~pd.isna(ages)], default=0))
+        min_age, max_age = st.slider("Age (days)", 0, max(oldest, 1), (0, max(oldest, 1)))
+    with col3:
+        sort_labels = {"Name": "name", "Variety": "variety", "Health Status": "health",
+                       "Health Score": "health_score", "Age": "age"}
+        sort_by = st.selectbox("Sort by", list(sort_labels))
+        descending = st.checkbox("Descending")
+    
+    plants = snapshot.filter(
+        varieties=varieties, health=health, search=search,
+        min_age=min_age if min_age > 0 else None, max_age=max_age if max_age < oldest else None
+    ).sort(sort_labels[sort_by], descending)
+    
+    pages = plants.pages(config.PLANT_LIST_PAGE_SIZE)
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1) - 1
+    st.caption(f"{len(plants)} of {len(snapshot)} plants")
+    visible = plants.page(page, config.PLANT_LIST_PAGE_SIZE)
     
-    # Display plants with expanders for details
-    for i, plant in enumerate(plants):
-        with st.expander(f"{plant['name']} - {plant['variety']} ({plant['stage']})"):
+    # Only the visible page gets expanders and charts
+    heights = load_heights(tuple(int(plant_id) for plant_id in visible.column("id")), get_data_version("measurements"))
+    heights_by_plant = dict(tuple(heights.groupby("plant_id")))
+    
+    for plant in visible.records():
+        with st.expander(f"{plant.name} - {plant.variety} ({plant.health})"):
             col1, col2 = st.columns(2)
             
             with col1:
-                st.write(f"**Variety:** {plant['variety']}")
-                st.write(f"**Planted:** {plant['planting_date']}")
-                st.write(f"**Age:** {plant['age']}")
-                st.write(f"**Health Status:** {plant['health']}")
+                st.write(f"**Variety:** {plant.variety}")
+                st.write(f"**Planted:** {pd.Timestamp(plant.planting_date):%Y-%m-%d}" if pd.notna(plant.planting_date) else "**Planted:** -")
+                st.write(f"**Age:** {plant.age:.0f} days" if pd.notna(plant.age) else "**Age:** -")
+                st.write(f"**Health Status:** {plant.health}")
             
             with col2:
-                st.write(f"**Growing Media:** {plant['media']}")
-                st.write(f"**Irrigation System:** {plant['irrigation']}")
-                st.write(f"**Growth Stage:** {plant['stage']}")
+                st.write(f"**Growing Media:** {plant.media or '-'}")
+                st.write(f"**Irrigation System:** {plant.irrigation or '-'}")
+                if pd.notna(plant.health_score):
+                    st.write(f"**Latest Health Score:** {plant.health_score:.0f}")
                 
                 # Action buttons
                 col_btn1, col_btn2, col_btn3 = st.columns(3)
                 with col_btn1:
-                    st.button("Update", key=f"update_{i}")
+                    st.button("Update", key=f"update_{plant.id}")
                 with col_btn2:
-                    st.button("Analyze", key=f"analyze_{i}")
+                    st.button("Analyze", key=f"analyze_{plant.id}")
                 with col_btn3:
-                    st.button("Harvest", key=f"harvest_{i}")
-            
-            # Growth chart
-            dates = [(datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(int(plant['age'].split()[0]), 0, -1)]
-            heights = [random.uniform(5, 50) for _ in range(len(dates))]
-            
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(x=dates, y=heights, mode='lines+markers', name='Plant Height (cm)'))
-            
-            fig.update_layout(
-                title=f"Growth Progress - {plant['name']}",
-                xaxis_title="Date",
-                yaxis_title="Height (cm)"
-            )
+                    if st.button("Harvest", key=f"harvest_{plant.id}"):
+                        st.session_state[f"harvesting_{plant.id}"] = True
             
-            st.plotly_chart(fig, use_container_width=True)
+            if st.session_state.get(f"harvesting_{plant.id}"):
+                record_harvest(plant)
             
-            # Recent notes
-            st.write("**Recent Notes:**")
-            notes = [
-                {"date": "2023-06-14", "note": "Pruned side shoots to encourage vertical growth."},
-                {"date": "2023-06-10", "note": "Applied foliar spray for micronutrients."},
-                {"date": "2023-06-05", "note": "First flowers appeared."}
-            ]
+            # Growth chart
+            history = heights_by_plant.get(plant.id)
+            if history is not None:
+                fig = go.Figure()
+                fig.add_trace(go.Scatter(x=history["date"], y=history["height"], mode='lines+markers', name='Plant Height (cm)'))
+                
+                fig.update_layout(
+                    title=f"Growth Progress - {plant.name}",
+                    xaxis_title="Date",
+                    yaxis_title="Height (cm)"
+                )
+                
+                st.plotly_chart(fig, use_container_width=True)
             
-            for note in notes:
-                st.write(f"- {note['date']}: {note['note']}")
+            # Notes
+            if plant.notes:
+                st.write("**Notes:**")
+                st.write(plant.notes)
             
             # Add new note
-            new_note = st.text_area("Add Note", key=f"note_{i}")
-            if st.button("Save Note", key=f"save_note_{i}"):
+            new_note = st.text_area("Add Note", key=f"note_{plant.id}")
+            if st.button("Save Note", key=f"save_note_{plant.id}"):
                 st.success("Note saved successfully!")
 
+def record_harvest(plant):
+    """Harvest form for one plant; the yield feeds the performance summaries and the yield model"""
+    with st.form(key=f"harvest_form_{plant.id}"):
+        st.write("**Record Harvest**")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            harvest_yield = st.number_input("Yield (kg)", min_value=0.0, step=0.1)
+        with col2:
+            fruit_count = st.number_input("Fruit Count (0 keeps the recorded count)", min_value=0, step=1)
+        with col3:
+            harvest_date = st.date_input("Harvest Date", datetime.now())
+        
+        if st.form_submit_button("Record Harvest"):
+            if harvest_yield <= 0:
+                st.error("Enter the harvested weight.")
+                return
+            get_performance_summary().record_harvest(
+                int(plant.id), harvest_yield, datetime.combine(harvest_date, datetime.min.time()), int(fruit_count) or None
+            )
+            st.session_state[f"harvesting_{plant.id}"] = False
+            st.success(f"Harvest of {harvest_yield:.1f} kg recorded for {plant.name}.")
+
 def add_new_plant():
     st.subheader("Add New Melon Plant")
     
@@ -164,47 +200,53 @@ def add_new_plant():
 def irrigation_control():
     st.subheader("Irrigation Control System")
     
+    scheduler = get_irrigation_scheduler()
+    systems = scheduler.systems()
+    system_ids = dict(zip(systems["name"], systems["id"]))
+    if scheduler.last_error:
+        st.warning(f"Last scheduler error: {scheduler.last_error}")
+    
     # System selection
-    system = st.selectbox(
-        "Select Irrigation System",
-        ["All Systems", "System #1 (Drip Fertigation)", "System #2 (Deep Water Culture)", "System #3 (NFT)"]
-    )
+    system = st.selectbox("Select Irrigation System", ["All Systems"] + list(system_ids))
     
-    # Current status
+    # Current status from the live telemetry buffers
     st.write("#### Current Status")
     
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.metric(label="Water Temperature", value="24.5 °C", delta="0.3 °C")
-    
-    with col2:
-        st.metric(label="EC Level", value="2.1 mS/cm", delta="-0.1 mS/cm")
-    
-    with col3:
-        st.metric(label="pH Level", value="5.8", delta="0.0")
+    telemetry = get_telemetry()
+    sensors = [("Water Temperature", "water_temperature", " °C", 1), ("EC Level", "ec", " mS/cm", 2), ("pH Level", "ph", "", 1)]
+    for column, (label, sensor, unit, digits) in zip(st.columns(len(sensors)), sensors):
+        stats = telemetry.stats(sensor if system == "All Systems" else f"{sensor}/{system}")
+        if stats["latest"] is None:
+            column.metric(label=label, value="n/a")
+        else:
+            column.metric(
+                label=label, value=f"{stats['latest']:.{digits}f}{unit}",
+                delta=f"{stats['latest'] - stats['mean']:+.{digits}f}{unit}"
+            )
+    if telemetry.last_error:
+        st.caption(telemetry.last_error)
     
     # Irrigation schedule
     st.write("#### Irrigation Schedule")
     
-    schedules = [
-        {"system": "System #1", "start_time": "06:00", "duration": "15 min", "frequency": "Every 3 hours", "nutrient_mix": "Vegetative Growth"},
-        {"system": "System #1", "start_time": "09:00", "duration": "15 min", "frequency": "Every 3 hours", "nutrient_mix": "Vegetative Growth"},
-        {"system": "System #1", "start_time": "12:00", "duration": "15 min", "frequency": "Every 3 hours", "nutrient_mix": "Vegetative Growth"},
-        {"system": "System #1", "start_time": "15:00", "duration": "15 min", "frequency": "Every 3 hours", "nutrient_mix": "Vegetative Growth"},
-        {"system": "System #1", "start_time": "18:00", "duration": "15 min", "frequency": "Every 3 hours", "nutrient_mix": "Vegetative Growth"},
-        {"system": "System #2", "start_time": "Continuous", "duration": "24 hours", "frequency": "Daily", "nutrient_mix": "Fruiting Formula"},
-        {"system": "System #3", "start_time": "Continuous", "duration": "24 hours", "frequency": "Daily", "nutrient_mix": "Flowering Formula"}
-    ]
+    schedules = scheduler.schedules()
     
     # Filter schedules based on selected system
     if system != "All Systems":
-        system_name = system.split(" ")[0] + " " + system.split(" ")[1]
-        schedules = [schedule for schedule in schedules if schedule["system"] == system_name]
+        schedules = schedules[schedules["system"] == system]
     
     # Display schedules
-    df_schedules = pd.DataFrame(schedules)
-    st.dataframe(df_schedules)
+    if schedules.empty:
+        st.info("No active irrigation schedules.")
+    else:
+        st.dataframe(schedules.drop(columns="id"))
+        
+        cancel_labels = {f"#{row.id} {row.system} {row.start_time:%H:%M} ({row.frequency})": row.id
+                         for row in schedules.itertuples()}
+        to_cancel = st.selectbox("Schedule", list(cancel_labels))
+        if st.button("Cancel Schedule"):
+            scheduler.cancel_schedule(cancel_labels[to_cancel])
+            st.success("Irrigation schedule cancelled.")
     
     # Add new schedule
     st.write("#### Add New Schedule")
@@ -213,11 +255,9 @@ def irrigation_control():
         col1, col2 = st.columns(2)
         
         with col1:
-            schedule_system = st.selectbox(
-                "System",
-                ["System #1", "System #2", "System #3"]
-            )
+            schedule_system = st.selectbox("System", list(system_ids))
             
+            start_date = st.date_input("Start Date", datetime.utcnow())
             start_time = st.time_input("Start Time", datetime.strptime("06:00", "%H:%M").time())
             duration = st.selectbox(
                 "Duration",
@@ -230,18 +270,53 @@ def irrigation_control():
                 ["Every hour", "Every 2 hours", "Every 3 hours", "Every 4 hours", "Every 6 hours", "Daily"]
             )
             
-            nutrient_mix = st.selectbox(
-                "Nutrient Mix",
-                ["Vegetative Growth", "Flowering Formula", "Fruiting Formula", "Custom Mix"]
-            )
-            
-            if nutrient_mix == "Custom Mix":
-                custom_mix = st.text_input("Custom Mix Name")
+            ec_target = st.slider("Target EC (mS/cm)", 1.0, 3.0, 2.0, 0.1, key="schedule_ec")
+            ph_target = st.slider("Target pH", 5.0, 7.0, 5.8, 0.1, key="schedule_ph")
         
         # Submit button
         submitted = st.form_submit_button("Add Schedule")
-        if submitted:
-            st.success("Irrigation schedule added successfully!")
+        if submitted and schedule_system:
+            minutes = {"1 hour": 60, "Continuous": 24 * 60}.get(duration) or int(duration.split()[0])
+            start = datetime.combine(start_date, start_time)
+            check = scheduler.planner.check(system_ids[schedule_system], start, minutes, frequency)
+            try:
+                scheduler.add_schedule(
+                    system_ids[schedule_system], start, minutes, frequency, ec_target=ec_target, ph_target=ph_target
+                )
+            except ValueError as e:
+                st.error(f"Schedule not added: {e}")
+                if not check.conflicts.empty:
+                    st.dataframe(check.conflicts)
+            else:
+                st.success("Irrigation schedule added successfully!")
+                if check.overloaded:
+                    st.warning(
+                        f"Pump overload at {check.peak_at:%Y-%m-%d %H:%M}: {check.peak_flow:.1f} L/h "
+                        f"({config.IRRIGATION_PUMP_MAX_FLOW} L/h max), {check.peak_power:.2f} W "
+                        f"({config.IRRIGATION_PUMP_MAX_POWER} W max)"
+                    )
+    
+    # Pump load over the planning horizon
+    st.write("#### Pump Load")
+    
+    peak_flow, peak_power, peak_at = scheduler.planner.farm_peak()
+    col1, col2 = st.columns(2)
+    col1.metric("Peak Flow", f"{peak_flow:.1f} L/h", help=f"Pump limit {config.IRRIGATION_PUMP_MAX_FLOW} L/h")
+    col2.metric("Peak Hydraulic Power", f"{peak_power:.2f} W", help=f"Pump limit {config.IRRIGATION_PUMP_MAX_POWER} W")
+    if peak_flow > config.IRRIGATION_PUMP_MAX_FLOW or peak_power > config.IRRIGATION_PUMP_MAX_POWER:
+        st.warning(f"Scheduled runs overload the pump at {peak_at:%Y-%m-%d %H:%M}.")
+    peak_flows = scheduler.planner.peak_flows()
+    if not peak_flows.empty:
+        st.dataframe(peak_flows)
+    
+    # Execution log
+    st.write("#### Recent Irrigation Runs")
+    
+    runs = scheduler.recent_runs()
+    if runs.empty:
+        st.info("No irrigation runs yet.")
+    else:
+        st.dataframe(runs)
     
     # Manual control
     st.write("#### Manual Control")
@@ -250,10 +325,7 @@ def irrigation_control():
     
     with col1:
         st.write("**System Control**")
-        system_control = st.selectbox(
-            "Select System to Control",
-            ["System #1", "System #2", "System #3"]
-        )
+        system_control = st.selectbox("Select System to Control", list(system_ids))
         
         st.write("System Status:")
         status = st.radio(
@@ -272,4 +344,16 @@ def irrigation_control():
         ph_target = st.slider("Target pH", 5.0, 7.0, 5.8, 0.1)
         
         if st.button("Apply Nutrient Settings"):
-            st.success(f"Nutrient settings updated: EC={ec_target} mS/cm, pH={ph_target}")
\ No newline at end of file
+            updated = scheduler.set_targets(system_ids.get(system_control), ec_target=ec_target, ph_target=ph_target)
+            if not updated:
+                st.info(f"{system_control} has no active schedules to update.")
+            else:
+                st.success(f"Saved EC {ec_target} mS/cm and pH {ph_target} on {updated} schedule(s) of {system_control}.")
+                plan = get_nutrient_solver().solve_schedules(system_ids.get(system_control))
+                if plan.doses.empty:
+                    st.warning("No stock tank can reach these targets. Run init_db.py to add the default stock tanks.")
+                else:
+                    st.write(f"Dosing per schedule in mL/L (estimated EC {plan.summary['ec'].mean():.2f} mS/cm):")
+                    st.dataframe(plan.doses.pivot_table(index="tank", columns="schedule_id", values="ml_per_l", fill_value=0.0))
+                # Stock tanks carry no acidity data, so pH is adjusted separately
+                st.caption("pH is saved as the schedules' target but not dosed from the stock tanks.")
\ No newline at end of file
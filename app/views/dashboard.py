@@ -2,8 +2,31 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import random  # For demo data, remove in production
+from plotly.subplots import make_subplots
+from datetime import datetime, time, timedelta
+from app.services.dashboard_service import DashboardService
+from app.services.data_version import get_data_version
+from app.services.telemetry import get_telemetry
+import config
+
+# One service per process; every query result is memoized below
+get_dashboard_service = st.cache_resource(DashboardService)
+
+@st.cache_data(ttl=config.DASHBOARD_CACHE_TTL, show_spinner=False)
+def load(name, data_version, *args):
+    """Run a DashboardService query, reused until new measurements arrive or the TTL expires"""
+    return getattr(get_dashboard_service(), name)(*args)
+
+def query(name, *args):
+    """Memoized dashboard query keyed on the current measurement, plant and alert data versions"""
+    versions = (get_data_version("measurements"), get_data_version("plants"), get_data_version("alerts"))
+    return load(name, versions, *args)
+
+def percent_change(current, previous):
+    """Format the change between two values as a percentage delta"""
+    if not current or not previous:
+        return None
+    return f"{(current / previous - 1) * 100:.0f}%"
 
 def show():
     st.title("Melon Buddy Dashboard 🍈")
@@ -21,35 +44,36 @@ def show():
         show_analytics()
 
 def show_overview():
+    overview = query("overview")
+    
     # Header section with key metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric(label="Active Plants", value="12", delta="2")
+        st.metric(label="Active Plants", value=overview["active_plants"], delta=overview["new_plants"] or None)
     
     with col2:
-        st.metric(label="Avg. Plant Health", value="87%", delta="3%")
+        avg_health = overview["avg_health"]
+        st.metric(
+            label="Avg. Plant Health",
+            value=f"{avg_health:.0f}%" if avg_health is not None else "n/a",
+            delta=percent_change(avg_health, overview["previous_avg_health"])
+        )
     
     with col3:
-        st.metric(label="Days to Harvest", value="18", delta="-2")
+        st.metric(
+            label="Readings (24h)",
+            value=f"{overview['readings_24h']:,}",
+            delta=percent_change(overview["readings_24h"], overview["previous_readings_24h"])
+        )
     
     with col4:
-        st.metric(label="Yield Forecast", value="42 kg", delta="5%")
+        st.metric(label="Analyses (7 days)", value=overview["analyses_7d"])
     
     # Recent activities
     st.subheader("Recent Activities")
     
-    # In a real app, this would come from the database
-    activities = [
-        {"date": "2023-06-15", "activity": "Added 3 new melon plants (Variety: Honeydew)", "type": "Plant"},
-        {"date": "2023-06-14", "activity": "Adjusted nutrient solution EC to 2.1", "type": "Nutrient"},
-        {"date": "2023-06-13", "activity": "Detected minor magnesium deficiency in Plant #5", "type": "Health"},
-        {"date": "2023-06-12", "activity": "Updated irrigation schedule to 4x daily", "type": "Irrigation"},
-        {"date": "2023-06-10", "activity": "Harvested 3.2kg from Plant #2", "type": "Harvest"}
-    ]
-    
-    # Convert to DataFrame for display
-    df_activities = pd.DataFrame(activities)
+    df_activities = query("recent_activities")
     
     # Color-code by activity type
     def highlight_activity(s):
@@ -63,23 +87,48 @@ def show_overview():
             return [''] * len(s)
     
     # Display styled dataframe
-    st.dataframe(df_activities[['date', 'activity']].style.apply(highlight_activity, axis=1))
+    if df_activities.empty:
+        st.info("No activity recorded yet.")
+    else:
+        st.dataframe(df_activities[['date', 'activity', 'type']].style.apply(highlight_activity, axis=1))
+    
+    # Live conditions straight from the telemetry buffers (no database query)
+    st.subheader("Live Conditions")
+    
+    telemetry = get_telemetry()
+    if telemetry.last_error:
+        st.warning(telemetry.last_error)
+    live = [("Temperature", "temperature", "°C", 1), ("Humidity", "humidity", "%", 0), ("Light", "light_level", "lux", 0)]
+    for column, (label, key, unit, digits) in zip(st.columns(len(live)), live):
+        stats = telemetry.stats(key)
+        if stats["latest"] is None:
+            column.metric(label=label, value="n/a")
+        else:
+            column.metric(
+                label=label, value=f"{stats['latest']:.{digits}f} {unit}",
+                delta=f"{stats['latest'] - stats['mean']:+.{digits}f} {unit} vs. window mean"
+            )
+    recent = telemetry.series("temperature")
+    if not recent.empty:
+        st.line_chart(recent.set_index("time")["value"].rename("Temperature (°C)"))
+    st.button("Refresh live readings")
     
-    # Weather forecast (placeholder)
-    st.subheader("Environment Forecast")
+    # Greenhouse conditions from the daily measurement rollups
+    st.subheader("Greenhouse Conditions")
     
-    # Generate demo data
-    dates = [(datetime.now() + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(7)]
-    temps = [random.uniform(22, 28) for _ in range(7)]
-    humidity = [random.uniform(60, 80) for _ in range(7)]
+    today = datetime.combine(datetime.utcnow().date(), time())
+    conditions = query("daily_conditions", today - timedelta(days=6), today + timedelta(days=1))
+    if conditions.empty:
+        st.info("No sensor readings in the last 7 days.")
+        return
     
-    # Create forecast chart
+    # Create conditions chart
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=dates, y=temps, name="Temperature (°C)"))
-    fig.add_trace(go.Scatter(x=dates, y=humidity, name="Humidity (%)", yaxis="y2"))
+    fig.add_trace(go.Scatter(x=conditions["date"], y=conditions["temperature"], name="Temperature (°C)"))
+    fig.add_trace(go.Scatter(x=conditions["date"], y=conditions["humidity"], name="Humidity (%)", yaxis="y2"))
     
     fig.update_layout(
-        title="7-Day Greenhouse Forecast",
+        title="Last 7 Days in the Greenhouse",
         xaxis_title="Date",
         yaxis_title="Temperature (°C)",
         yaxis2=dict(
@@ -102,8 +151,11 @@ def show_plant_health():
     st.subheader("Plant Health Overview")
     
     # Plant selection
-    plant_options = ["All Plants", "Plant #1 (Honeydew)", "Plant #2 (Cantaloupe)", "Plant #3 (Galia)"]
-    selected_plant = st.selectbox("Select Plant", plant_options)
+    plants = query("plants")
+    plant_options = {"All Plants": None}
+    plant_options.update({f"{row.name} ({row.variety})": row.id for row in plants.itertuples()})
+    selected_plant = st.selectbox("Select Plant", list(plant_options))
+    plant_id = plant_options[selected_plant]
     
     # Date range selection
     col1, col2 = st.columns(2)
@@ -112,31 +164,34 @@ def show_plant_health():
     with col2:
         end_date = st.date_input("End Date", datetime.now())
     
-    # Generate demo data for plant health metrics
-    dates = [(datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(30, 0, -1)]
-    health_score = [random.uniform(70, 95) for _ in range(30)]
-    leaf_count = [int(20 + i/2) for i in range(30)]
-    fruit_count = [int(i/5) if i > 10 else 0 for i in range(30)]
+    start = datetime.combine(start_date, time())
+    end = datetime.combine(end_date, time()) + timedelta(days=1)
+    health = query("health_trend", start, end, plant_id)
+    growth = query("daily_conditions", start, end, plant_id)
     
     # Create health metrics chart
-    fig1 = px.line(
-        x=dates, 
-        y=health_score, 
-        title="Plant Health Score Over Time",
-        labels={"x": "Date", "y": "Health Score (0-100)"}
-    )
-    
-    st.plotly_chart(fig1, use_container_width=True)
+    if health.empty:
+        st.info("No plant analyses in the selected period.")
+    else:
+        fig1 = px.line(
+            x=health["date"], 
+            y=health["health_score"], 
+            title="Plant Health Score Over Time",
+            labels={"x": "Date", "y": "Health Score (0-100)"}
+        )
+        
+        st.plotly_chart(fig1, use_container_width=True)
     
-    # Create growth metrics chart
-    fig2 = go.Figure()
-    fig2.add_trace(go.Scatter(x=dates, y=leaf_count, name="Leaf Count"))
-    fig2.add_trace(go.Scatter(x=dates, y=fruit_count, name="Fruit Count"))
+    # Create growth metrics chart; height and temperature each get their own axis
+    fig2 = make_subplots(specs=[[{"secondary_y": True}]])
+    fig2.add_trace(go.Scatter(x=growth["date"], y=growth["height"], name="Height (cm)"), secondary_y=False)
+    fig2.add_trace(go.Scatter(x=growth["date"], y=growth["temperature"], name="Temperature (°C)"), secondary_y=True)
+    fig2.update_yaxes(title_text="Daily Mean Height (cm)", secondary_y=False)
+    fig2.update_yaxes(title_text="Daily Mean Temperature (°C)", secondary_y=True)
     
     fig2.update_layout(
         title="Plant Growth Metrics",
         xaxis_title="Date",
-        yaxis_title="Count",
         legend=dict(
             orientation="h",
             yanchor="bottom",
@@ -148,24 +203,13 @@ def show_plant_health():
     
     st.plotly_chart(fig2, use_container_width=True)
     
-    # Health alerts
+    # Health alerts, raised by the rule engine as analyses are saved
     st.subheader("Health Alerts")
     
-    # Demo alerts
-    alerts = [
-        {"date": "2023-06-13", "plant": "Plant #3", "issue": "Possible magnesium deficiency", "severity": "Medium"},
-        {"date": "2023-06-10", "plant": "Plant #1", "issue": "Early signs of powdery mildew", "severity": "Low"},
-        {"date": "2023-06-05", "plant": "Plant #2", "issue": "Irregular watering detected", "severity": "Low"}
-    ]
-    
-    # Filter alerts for selected plant
-    if selected_plant != "All Plants":
-        plant_name = selected_plant.split(" ")[0] + " " + selected_plant.split(" ")[1]
-        alerts = [alert for alert in alerts if alert["plant"] == plant_name]
-    
-    if alerts:
-        df_alerts = pd.DataFrame(alerts)
-        st.dataframe(df_alerts)
+    alerts = query("health_alerts", start, end, plant_id)
+    
+    if not alerts.empty:
+        st.dataframe(alerts)
     else:
         st.info("No health alerts for the selected plant.")
 
@@ -175,15 +219,13 @@ def show_analytics():
     # Media comparison
     st.write("#### Growing Media Comparison")
     
-    # Generate demo data
-    media_types = ["Cocopeat", "Rockwool", "Perlite", "Vermiculite", "Hydroton"]
-    growth_rate = [8.2, 7.5, 6.8, 7.0, 6.5]
-    fruit_yield = [4.2, 3.8, 3.5, 3.6, 3.3]
+    media_stats = query("media_performance")
+    media_types = media_stats["media"].tolist() or config.DEFAULT_MEDIA_TYPES
     
     # Create comparison chart
     fig1 = go.Figure(data=[
-        go.Bar(name="Growth Rate (cm/week)", x=media_types, y=growth_rate),
-        go.Bar(name="Fruit Yield (kg/plant)", x=media_types, y=fruit_yield)
+        go.Bar(name="Growth Rate (cm/week)", x=media_stats["media"], y=media_stats["growth_rate"]),
+        go.Bar(name="Fruit Yield (kg/plant)", x=media_stats["media"], y=media_stats["avg_yield"])
     ])
     
     fig1.update_layout(
@@ -205,16 +247,14 @@ def show_analytics():
     # Irrigation comparison
     st.write("#### Irrigation System Comparison")
     
-    # Generate demo data
-    irrigation_types = ["Drip Fertigation", "Ebb and Flow", "Deep Water Culture", "NFT", "Aeroponics"]
-    water_usage = [2.5, 3.8, 4.2, 3.0, 1.8]
-    nutrient_efficiency = [85, 75, 90, 80, 95]
+    irrigation_stats = query("irrigation_usage")
+    irrigation_types = irrigation_stats["system"].tolist() or config.DEFAULT_IRRIGATION_TYPES
     
     # Create dual-axis chart
     fig2 = go.Figure()
-    fig2.add_trace(go.Bar(x=irrigation_types, y=water_usage, name="Water Usage (L/day/plant)"))
-    fig2.add_trace(go.Scatter(x=irrigation_types, y=nutrient_efficiency, 
-                             mode="markers+lines", name="Nutrient Efficiency (%)", yaxis="y2",
+    fig2.add_trace(go.Bar(x=irrigation_stats["system"], y=irrigation_stats["water_usage"], name="Water Usage (L/day/plant)"))
+    fig2.add_trace(go.Scatter(x=irrigation_stats["system"], y=irrigation_stats["water_per_kg"], 
+                             mode="markers+lines", name="Water per kg Yield (L/day/kg)", yaxis="y2",
                              marker=dict(size=10)))
     
     fig2.update_layout(
@@ -222,10 +262,9 @@ def show_analytics():
         xaxis_title="Irrigation Type",
         yaxis_title="Water Usage (L/day/plant)",
         yaxis2=dict(
-            title="Nutrient Efficiency (%)",
+            title="Water per kg Yield (L/day/kg)",
             overlaying="y",
-            side="right",
-            range=[0, 100]
+            side="right"
         ),
         legend=dict(
             orientation="h",
@@ -241,11 +280,13 @@ def show_analytics():
     # Yield prediction
     st.write("#### Yield Prediction")
     
+    predictions = query("yield_predictions")
+    if predictions["predicted_yield"].isna().all():
+        st.info("Record harvests to train the yield model.")
+    
     # Variety selection for prediction
-    variety = st.selectbox(
-        "Select Melon Variety",
-        ["Honeydew", "Cantaloupe", "Galia", "Charentais", "Crenshaw"]
-    )
+    variety = st.selectbox("Select Melon Variety", predictions["variety"].unique().tolist() or config.MELON_VARIETIES)
+    variety_grid = predictions[predictions["variety"] == variety]
     
     # Media and irrigation selection
     col1, col2 = st.columns(2)
@@ -254,40 +295,28 @@ def show_analytics():
     with col2:
         irrigation = st.selectbox("Irrigation System", irrigation_types)
     
-    # Generate prediction based on selections (in a real app, this would use a trained model)
-    base_yield = {
-        "Honeydew": 4.0,
-        "Cantaloupe": 3.8,
-        "Galia": 3.5,
-        "Charentais": 3.2,
-        "Crenshaw": 4.5
-    }
-    
-    media_factor = {
-        "Cocopeat": 1.05,
-        "Rockwool": 1.0,
-        "Perlite": 0.95,
-        "Vermiculite": 0.97,
-        "Hydroton": 0.93
-    }
-    
-    irrigation_factor = {
-        "Drip Fertigation": 1.0,
-        "Ebb and Flow": 0.95,
-        "Deep Water Culture": 1.1,
-        "NFT": 0.98,
-        "Aeroponics": 1.15
-    }
-    
-    # Calculate predicted yield
-    predicted_yield = base_yield[variety] * media_factor[media] * irrigation_factor[irrigation]
+    # Predicted yield for the selection, compared with the variety's mean over all setups
+    selected = variety_grid[(variety_grid["media"] == media) & (variety_grid["system"] == irrigation)]
+    if not selected.empty and pd.notna(selected["predicted_yield"].iloc[0]):
+        predicted_yield = selected["predicted_yield"].iloc[0]
+        change = percent_change(predicted_yield, variety_grid["predicted_yield"].mean())
+        st.metric(
+            label=f"Predicted Yield for {variety} Melon",
+            value=f"{predicted_yield:.2f} kg/plant",
+            delta=f"{change} vs. average" if change else None
+        )
     
-    # Display prediction
-    st.metric(
-        label=f"Predicted Yield for {variety} Melon",
-        value=f"{predicted_yield:.2f} kg/plant",
-        delta=f"{((predicted_yield / base_yield[variety]) - 1) * 100:.1f}% vs. average"
-    )
+    # Every media x irrigation combination for the variety
+    if variety_grid["predicted_yield"].notna().any():
+        heatmap = variety_grid.pivot(index="media", columns="system", values="predicted_yield")
+        fig_yield = px.imshow(
+            heatmap,
+            text_auto=".2f",
+            color_continuous_scale="Greens",
+            labels=dict(x="Irrigation System", y="Growing Media", color="kg/plant"),
+            title=f"Predicted {variety} Yield by Media and Irrigation (kg/plant)"
+        )
+        st.plotly_chart(fig_yield, use_container_width=True)
     
     # Factors affecting yield
     st.write("#### Factors Affecting Yield")
@@ -300,6 +329,8 @@ def show_analytics():
         "Charentais": [4, 5, 3, 3, 4],
         "Crenshaw": [5, 4, 4, 3, 5]
     }
+    if variety not in characteristics:
+        return
     
     categories = ['Growth Rate', 'Disease Resistance', 'Heat Tolerance', 'Water Efficiency', 'Fruit Size']
     
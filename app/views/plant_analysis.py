@@ -7,6 +7,41 @@ import random  # For demo data, remove in production
 import io
 from PIL import Image
 import numpy as np
+from app.services.growth_forecast import GrowthForecaster
+from app.services.plant_repository import PlantRepository
+import config
+
+# One forecaster per process; its fits are cached in the database
+get_growth_forecaster = st.cache_resource(GrowthForecaster)
+get_plant_repository = st.cache_resource(PlantRepository)
+
+def select_plant(key):
+    """Plant an upload is saved to, or None to analyze it without saving"""
+    labels = {"Don't save": None}
+    labels.update({f"{plant.name} ({plant.variety})": plant.id for plant in get_plant_repository().list()})
+    return labels[st.selectbox("Save to Plant", list(labels), key=key)]
+
+def save_analysis(plant_id, uploaded_file, **results):
+    """Record the upload as an analysis of the plant, its image kept in the image store"""
+    if plant_id is not None:
+        get_plant_repository().add_analysis(plant_id, uploaded_file.getvalue(), **results)
+        st.caption("Image saved to the plant's analysis history.")
+
+def show_analysis_history(plant_id):
+    """The plant's recent analysis images, read back from the image store"""
+    if plant_id is None:
+        return
+    analyses = [
+        analysis for analysis in get_plant_repository().analyses(plant_id, limit=config.ANALYSIS_HISTORY_SIZE)
+        if analysis.image_path or analysis.image_data
+    ]
+    if not analyses:
+        return
+    
+    st.write("#### Analysis History")
+    for column, analysis in zip(st.columns(len(analyses)), analyses):
+        with column:
+            st.image(analysis.get_image(), caption=analysis.analysis_date.strftime("%Y-%m-%d %H:%M"), use_column_width=True)
 
 def show():
     st.title("Plant Analysis & Diagnostics 🔍")
@@ -50,8 +85,11 @@ def leaf_analysis():
             ["Gemini Pro Vision", "OpenRouter - Claude Vision", "OpenRouter - GPT-4 Vision"]
         )
         
+        plant_id = select_plant("leaf_plant")
+        
         # Analyze button
         if st.button("Analyze Leaf"):
+            save_analysis(plant_id, uploaded_file, ai_model_used=ai_model)
             with st.spinner("Analyzing leaf image..."):
                 # Simulate processing time
                 import time
@@ -152,6 +190,8 @@ def leaf_analysis():
                 """
                 
                 st.markdown(recommendations)
+        
+        show_analysis_history(plant_id)
 
 def disease_detection():
     st.subheader("Disease Detection")
@@ -177,8 +217,11 @@ def disease_detection():
             key="disease_model"
         )
         
+        plant_id = select_plant("disease_plant")
+        
         # Detect button
         if st.button("Detect Diseases"):
+            save_analysis(plant_id, uploaded_file, ai_model_used=ai_model)
             with st.spinner("Analyzing image for diseases..."):
                 # Simulate processing time
                 import time
@@ -287,67 +330,77 @@ def disease_detection():
                     """
                 
                 st.markdown(recommendations)
+        
+        show_analysis_history(plant_id)
 
 def growth_prediction():
     st.subheader("Growth Prediction")
     
+    forecaster = get_growth_forecaster()
+    days_to_predict = st.slider("Forecast Horizon (days)", 7, 90, config.GROWTH_FORECAST_DAYS, 1)
+    
+    # Curves are fitted from each plant's measurement history and refitted only when new readings arrive
+    summary = forecaster.farm_summary(days_to_predict)
+    if summary.empty:
+        st.info(f"Growth curves need at least {config.GROWTH_FIT_MIN_POINTS} days of height measurements per plant.")
+        return
+    
     # Plant selection
     st.write("#### Select Plant")
     
-    plant = st.selectbox(
-        "Plant",
-        ["Plant #1 (Honeydew)", "Plant #2 (Cantaloupe)", "Plant #3 (Galia)"]
-    )
+    labels = {f"{row.name} ({row.variety})": row.plant_id for row in summary.itertuples()}
+    plant = st.selectbox("Plant", list(labels))
+    plant_id = labels[plant]
+    selected = summary[summary["plant_id"] == plant_id].iloc[0]
     
     # Current metrics
-    st.write("#### Current Metrics")
-    
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        current_height = st.number_input("Current Height (cm)", min_value=0.0, value=25.0, step=0.5)
+        st.metric("Fitted Height (cm)", f"{selected['height']:.1f}")
     
     with col2:
-        current_leaves = st.number_input("Leaf Count", min_value=0, value=12, step=1)
+        st.metric(
+            f"Height in {days_to_predict} Days (cm)",
+            f"{selected['forecast']:.1f}",
+            delta=f"{selected['forecast'] - selected['height']:+.1f} cm"
+        )
     
     with col3:
-        days_since_planting = st.number_input("Days Since Planting", min_value=0, value=25, step=1)
+        st.metric("Days to 90% of Mature Height", f"{selected['days_to_90']:.0f}")
     
-    # Environmental factors
-    st.write("#### Environmental Factors")
+    st.write("#### Growth Prediction Results")
     
-    col1, col2 = st.columns(2)
+    measured, curve = forecaster.plant_curve(plant_id, days_to_predict)
+    today = pd.Timestamp(datetime.utcnow()).normalize()
     
-    with col1:
-        temperature = st.slider("Average Temperature (°C)", 15.0, 35.0, 24.0, 0.5)
-        light_hours = st.slider("Daily Light Hours", 8, 16, 12, 1)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=measured["date"], y=measured["height"], mode="markers", name="Measured (daily mean)"))
+    fig.add_trace(go.Scatter(
+        x=curve["date"][curve["date"] <= today], y=curve["height"][curve["date"] <= today],
+        mode="lines", name="Fitted Curve"
+    ))
+    fig.add_trace(go.Scatter(
+        x=curve["date"][curve["date"] >= today], y=curve["height"][curve["date"] >= today],
+        mode="lines", name="Forecast", line=dict(dash="dash")
+    ))
+    fig.add_hline(y=selected["max_height"], line_dash="dot", annotation_text="Mature height")
+    fig.update_layout(title=f"Height Forecast for {plant}", xaxis_title="Date", yaxis_title="Height (cm)")
     
-    with col2:
-        humidity = st.slider("Average Humidity (%)", 40, 90, 65, 5)
-        ec_level = st.slider("Nutrient Solution EC (mS/cm)", 1.0, 3.0, 2.0, 0.1)
+    st.plotly_chart(fig, use_container_width=True)
+    
+    # Farm-wide view: every active plant forecast in one batch
+    st.write("#### Farm-wide Forecast")
+    
+    forecast = forecaster.forecast(days_to_predict)
+    fig2 = px.line(forecast, x="date", y="height", color="name", labels={"height": "Height (cm)", "date": "Date"})
+    st.plotly_chart(fig2, use_container_width=True)
     
-    # Predict button
-    if st.button("Generate Prediction"):
-        with st.spinner("Generating growth prediction..."):
-            # Simulate processing time
-            import time
-            time.sleep(1)
-            
-            # Display prediction results (in a real app, this would come from a trained model)
-            st.success("Prediction complete!")
-            
-            st.write("#### Growth Prediction Results")
-            
-            # Generate prediction data
-            days_to_predict = 30
-            current_day = days_since_planting
-            
-            # Simple growth model (would be more sophisticated in a real app)
-            days = list(range(current_day - 10 if current_day > 10 else 0, current_day + days_to_predict + 1))
-            
-            # Height prediction (sigmoid curve)
-            max_height = 200  # Maximum height in cm
-            growth_rate = 0.1  # Growth rate parameter
-            midpoint = 45  # Day at which growth is at midpoint
-            
-            # Adjust parameters based on environmental factors
\ No newline at end of file
+    st.dataframe(
+        summary.drop(columns="plant_id").rename(columns={
+            "name": "Plant", "variety": "Variety", "height": "Fitted Height (cm)",
+            "forecast": f"In {days_to_predict} Days (cm)", "max_height": "Mature Height (cm)",
+            "days_to_90": "Days to 90%"
+        }).round(1),
+        use_container_width=True
+    )
\ No newline at end of file
@@ -2,6 +2,9 @@ import streamlit as st
 import os
 import json
 from datetime import datetime
+from app.services.registry import get_service_registry
+
+API_KEY_MASK = "••••••••••••••••••••••••••••••"
 
 def show():
     st.title("Settings ⚙️")
@@ -60,19 +63,23 @@ def show_api_settings():
     gemini_key = st.text_input(
         "Gemini API Key",
         type="password",
-        value="••••••••••••••••••••••••••••••"
+        value=API_KEY_MASK
     )
     
     # OpenRouter API
     openrouter_key = st.text_input(
         "OpenRouter API Key",
         type="password",
-        value="••••••••••••••••••••••••••••••"
+        value=API_KEY_MASK
     )
     
     # Save API keys
     if st.button("Save API Keys"):
-        # In a real app, this would securely store the API keys
+        # Masked placeholders mean "keep the current key"; changed keys hot-reload the shared clients
+        get_service_registry().update_api_keys(
+            gemini_api_key=None if gemini_key == API_KEY_MASK else gemini_key,
+            openrouter_api_key=None if openrouter_key == API_KEY_MASK else openrouter_key
+        )
         st.success("API keys saved successfully!")
     
     # Model settings
@@ -0,0 +1,75 @@
+"""Benchmark measurement ingestion: one ORM object per reading vs bulk ingest()
+
+Run from the project root:
+    python -m benchmarks.bench_sensor_ingest
+"""
+import argparse
+import datetime
+import os
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.database import get_engine, init_schema
+from app.models import PlantMeasurement
+from app.services.measurement_store import MeasurementStore
+from app.services.sensor_ingest import ingest
+
+
+def make_readings(count, plants=50, seed=0):
+    """Minute-by-minute readings from several plants, as sensor tuples"""
+    rng = np.random.default_rng(seed)
+    start = datetime.datetime(2024, 1, 1)
+    heights = rng.uniform(5, 120, count).tolist()
+    temperatures = rng.uniform(20, 34, count).tolist()
+    humidity = rng.uniform(50, 90, count).tolist()
+    light = rng.uniform(0, 60000, count).tolist()
+    return [
+        (i % plants + 1, start + datetime.timedelta(seconds=i * 60 // plants), heights[i], None, None, None,
+         temperatures[i], humidity[i], light[i])
+        for i in range(count)
+    ]
+
+
+def orm_ingest(url, readings):
+    """The existing write path: one PlantMeasurement per reading"""
+    with Session(get_engine(url)) as session:
+        for plant_id, date, height, _, _, _, temperature, humidity, light in readings:
+            session.add(PlantMeasurement(
+                plant_id=plant_id, measurement_date=date, height=height,
+                temperature=temperature, humidity=humidity, light_level=light
+            ))
+        session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--orm-rows", type=int, default=20000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as folder:
+        orm_url = f"sqlite:///{os.path.join(folder, 'orm.db')}"
+        bulk_url = f"sqlite:///{os.path.join(folder, 'bulk.db')}"
+        init_schema(orm_url)
+        init_schema(bulk_url)
+        
+        readings = make_readings(args.orm_rows)
+        start = time.perf_counter()
+        orm_ingest(orm_url, readings)
+        orm_rate = args.orm_rows / (time.perf_counter() - start)
+        
+        result = ingest(make_readings(args.rows), store=MeasurementStore(bulk_url))
+        
+        get_engine(orm_url).dispose()
+        get_engine(bulk_url).dispose()
+    
+    print(f"ORM, one object per reading  {orm_rate:10,.0f} rows/s  ({args.orm_rows} rows)")
+    print(f"ingest(), chunked executemany {result['rows_per_second']:10,.0f} rows/s  ({args.rows} rows)")
+    print(f"speedup {result['rows_per_second'] / orm_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
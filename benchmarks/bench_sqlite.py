@@ -0,0 +1,112 @@
+"""Benchmark the tuned SQLite engine from get_engine() against create_engine() defaults
+
+Measures single-row write transactions, point reads, and reads from several
+threads while a background writer commits, counting "database is locked"
+failures. Run from the project root:
+    python -m benchmarks.bench_sqlite
+"""
+import argparse
+import datetime
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import OperationalError
+
+from app.database import get_engine, init_schema
+from app.models import PlantMeasurement
+
+TABLE = PlantMeasurement.__table__
+START = datetime.datetime(2024, 1, 1)
+
+
+def write_transactions(engine, count, offset=0):
+    """Commit one reading per transaction, like a sensor writer; returns (commits, locked errors)"""
+    locked = 0
+    for i in range(count):
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(TABLE).values(
+                    plant_id=i % 50 + 1, measurement_date=START + datetime.timedelta(seconds=offset + i), height=50.0
+                ))
+        except OperationalError:
+            locked += 1
+    return count - locked, locked
+
+
+def point_reads(engine, count):
+    """Latest reading of a plant, one query per call; returns (reads, locked errors)"""
+    locked = 0
+    for i in range(count):
+        try:
+            with engine.connect() as conn:
+                conn.execute(
+                    select(TABLE.c.height).where(TABLE.c.plant_id == i % 50 + 1)
+                    .order_by(TABLE.c.measurement_date.desc()).limit(1)
+                ).first()
+        except OperationalError:
+            locked += 1
+    return count - locked, locked
+
+
+def concurrent(engine, readers, reads, writes):
+    """Reader threads racing a writer thread; returns (reads/s, writes/s, locked errors)"""
+    results = {}
+    
+    def run(name, fn, *args):
+        results[name] = fn(engine, *args)
+    
+    threads = [threading.Thread(target=run, args=("writer", write_transactions, writes, 10 ** 6))]
+    threads += [threading.Thread(target=run, args=(f"reader{i}", point_reads, reads)) for i in range(readers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    done_reads = sum(value[0] for name, value in results.items() if name != "writer")
+    locked = sum(value[1] for value in results.values())
+    return done_reads / elapsed, results["writer"][0] / elapsed, locked
+
+
+def profile(label, engine, args):
+    start = time.perf_counter()
+    commits, _ = write_transactions(engine, args.writes)
+    write_rate = commits / (time.perf_counter() - start)
+    start = time.perf_counter()
+    reads, _ = point_reads(engine, args.reads)
+    read_rate = reads / (time.perf_counter() - start)
+    mixed_reads, mixed_writes, locked = concurrent(engine, args.threads, args.reads // args.threads, args.writes // 2)
+    print(f"{label:<10} {write_rate:12,.0f} {read_rate:12,.0f} {mixed_reads:14,.0f} {mixed_writes:14,.0f} {locked:8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=2000, help="single-row write transactions")
+    parser.add_argument("--reads", type=int, default=4000, help="point reads")
+    parser.add_argument("--threads", type=int, default=4, help="reader threads in the mixed run")
+    args = parser.parse_args()
+    
+    print(f"{'engine':<10} {'commits/s':>12} {'reads/s':>12} {'mixed reads/s':>14} {'mixed commits/s':>14} {'locked':>8}")
+    with tempfile.TemporaryDirectory() as folder:
+        default_url = f"sqlite:///{os.path.join(folder, 'default.db')}"
+        tuned_url = f"sqlite:///{os.path.join(folder, 'tuned.db')}"
+        init_schema(tuned_url)
+        
+        # The default engine shares the schema but none of the pragmas (rollback journal, synchronous=FULL)
+        default = create_engine(default_url)
+        with default.begin() as conn:
+            for table in PlantMeasurement.metadata.sorted_tables:
+                table.create(conn, checkfirst=True)
+        
+        profile("default", default, args)
+        profile("tuned", get_engine(tuned_url), args)
+        default.dispose()
+        get_engine(tuned_url).dispose()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
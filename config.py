@@ -2,11 +2,98 @@
 
 # Database settings
 DATABASE_URL = "sqlite:///melon_buddy.db"
+DATABASE_POOL_SIZE = 5  # Connections kept open for Streamlit threads and background writers
+DATABASE_MAX_OVERFLOW = 10  # Extra connections allowed under bursts
+DATABASE_POOL_TIMEOUT = 30  # Seconds to wait for a free connection
+SQLITE_BUSY_TIMEOUT = 5  # Seconds a connection waits on a locked database before failing
+SQLITE_CACHE_SIZE_KB = 64000  # Page cache per connection
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024  # Bytes of the database file read through mmap
 
 # API Keys (replace with your actual keys)
 GEMINI_API_KEY = "your_gemini_api_key_here"
 OPENROUTER_API_KEY = "your_openrouter_api_key_here"
 
+# HTTP client settings (OpenRouter)
+HTTP_CONNECT_TIMEOUT = 5  # in seconds
+HTTP_READ_TIMEOUT = 60  # in seconds
+HTTP_MAX_RETRIES = 3
+HTTP_BACKOFF_FACTOR = 0.5  # first retry waits 0.5s, then 1s, 2s, ...
+HTTP_MAX_BACKOFF = 30  # upper bound for backoff and Retry-After waits, in seconds
+HTTP_POOL_MAXSIZE = 10
+
+# Async AI service settings
+AI_MAX_CONCURRENCY = 4  # Requests in flight per provider
+AI_FAN_OUT_TIMEOUT = 90  # in seconds
+
+# Chat context settings
+CHAT_CONTEXT_TOKEN_BUDGET = 2000  # Recent turns sent verbatim with each request
+CHAT_SUMMARY_TOKEN_BUDGET = 300  # Compact memory of older turns
+CHAT_HISTORY_PAGE_SIZE = 20  # Past consultations loaded per page
+CHAT_HISTORY_WRITE_RETRIES = 5  # Attempts at a failed chat history write before its batch is dropped
+CHAT_HISTORY_RETRY_DELAY = 2  # in seconds, between those attempts
+
+# Measurement history settings
+MEASUREMENT_CHART_MIN_POINTS = 24  # Charts use the coarsest rollup giving at least this many points
+SENSOR_INGEST_CHUNK_SIZE = 50000  # Readings per transaction during bulk ingestion
+
+# Dashboard settings
+DASHBOARD_CACHE_TTL = 300  # Seconds an aggregate is reused when no new data arrives
+HEALTH_ALERT_THRESHOLD = 60  # Analyses scoring below this raise a health alert
+
+# Plant list settings
+PLANT_LIST_PAGE_SIZE = 20  # Plants rendered per page of the cultivation list
+PLANT_SNAPSHOT_TTL = 300  # Seconds the plant list snapshot is reused when no plant data changes
+
+# Yield prediction settings
+YIELD_MODEL_PATH = "cache/yield_model.json"  # Cached normal equations of the yield regression, suffixed per database
+YIELD_MODEL_RIDGE = 1.0  # Shrinks rarely harvested groups toward the overall mean yield
+MELON_VARIETIES = ["Honeydew", "Cantaloupe", "Galia", "Charentais", "Crenshaw"]
+
+# Growth forecast settings
+GROWTH_FORECAST_DAYS = 30  # Days ahead shown by growth forecasts
+GROWTH_FIT_MIN_POINTS = 5  # Daily mean heights needed before a plant's curve is fitted
+GROWTH_FIT_MAX_HEIGHT = 500  # Upper bound for fitted mature height, in cm
+GROWTH_FIT_ITERATIONS = 50  # Levenberg-Marquardt iterations per fit
+
+# Irrigation scheduler settings
+IRRIGATION_SCHEDULER_MAX_SLEEP = 60  # Longest the timer thread sleeps between checks, in seconds
+IRRIGATION_SCHEDULER_RETRY_DELAY = 5  # Pause before retrying runs whose claim failed, in seconds
+IRRIGATION_RUN_HISTORY = 50  # Execution log entries shown in the irrigation view
+IRRIGATION_PLANNING_HORIZON_DAYS = 7  # Days of schedule runs checked for conflicts and pump load
+IRRIGATION_PUMP_MAX_FLOW = 8.0  # Flow the shared pump supplies to all systems at once, in L/h
+IRRIGATION_PUMP_MAX_POWER = 0.25  # Hydraulic power (flow x pressure) the pump delivers, in W
+
+# Nutrient dosing settings
+NUTRIENT_PPM_PER_EC = 640  # Dissolved nutrient ppm that raise EC by 1 mS/cm
+NUTRIENT_WATER_EC = 0.2  # EC of the source water before dosing, in mS/cm
+NUTRIENT_MAX_DOSE = 10.0  # Default most mL of a stock per liter of irrigation water
+NUTRIENT_DOSE_PENALTY = 1e-6  # Prefers the smallest total dose among equally good mixes
+NUTRIENT_SOLVER_ITERATIONS = 50  # Upper bound on Newton iterations per batch
+DEFAULT_STOCK_TANK_VOLUME = 100.0  # Liters in each default stock tank
+DEFAULT_STOCK_TANKS = {  # Default stock concentrates (100 g of fertilizer per liter), in ppm
+    "Calcium nitrate": {"nitrogen": 15500, "calcium": 19000},
+    "Potassium nitrate": {"nitrogen": 13800, "potassium": 38700},
+    "Monopotassium phosphate": {"phosphorus": 22800, "potassium": 28700},
+    "Magnesium sulfate": {"magnesium": 9900, "sulfur": 13000},
+    "Trace elements": {"iron": 700, "manganese": 200, "zinc": 40, "copper": 10, "boron": 130, "molybdenum": 6},
+}
+
+# Telemetry settings
+TELEMETRY_HOST = "127.0.0.1"  # Address the UDP telemetry listener binds to
+TELEMETRY_PORT = 47800  # UDP port sensors send JSON-lines readings to
+TELEMETRY_BUFFER_SIZE = 3600  # Readings kept in memory per sensor
+TELEMETRY_WINDOW = 3600  # Seconds covered by live rolling stats
+TELEMETRY_FLUSH_INTERVAL = 5  # Seconds between batched writes of plant readings
+TELEMETRY_FLUSH_SIZE = 1000  # Queued plant readings that trigger an early write
+TELEMETRY_MAX_PENDING = 100000  # Queued plant readings kept while the database write keeps failing
+
+# Alert settings
+ALERT_COOLDOWN = 6 * 60 * 60  # Seconds a rule keeps updating its open alert instead of raising a new one
+ALERT_ANALYSIS_COOLDOWN = 3 * 24 * 60 * 60  # Same for rules on image analyses, which arrive days apart
+ALERT_HISTORY_SIZE = 64  # Recent readings kept per plant or sensor for rate-of-change and drift rules
+ALERT_EC_DRIFT = 0.3  # EC departure from its last hour's mean that raises an alert, in mS/cm
+ALERT_LIST_LIMIT = 200  # Alerts shown on the dashboard
+
 # Default settings
 DEFAULT_AI_MODEL = "Gemini"  # Options: "Gemini", "OpenRouter"
 DEFAULT_IRRIGATION_TYPES = ["Drip Fertigation", "Ebb and Flow", "Deep Water Culture", "NFT", "Aeroponics"]
@@ -14,7 +101,17 @@ DEFAULT_MEDIA_TYPES = ["Cocopeat", "Rockwool", "Perlite", "Vermiculite", "Hydrot
 
 # Image analysis settings
 IMAGE_ANALYSIS_THRESHOLD = 0.7
+IMAGE_ANALYSIS_WORKERS = None  # Worker processes for batch analysis (None = one per CPU core)
+IMAGE_ANALYSIS_AI_CONCURRENCY = 4  # Maximum AI calls in flight during batch analysis
+ANALYSIS_HISTORY_SIZE = 4  # Past analysis images shown for the selected plant
+
+# Analysis result cache settings
+ANALYSIS_CACHE_ENABLED = True
+ANALYSIS_CACHE_PATH = "cache/analysis_cache.db"
+ANALYSIS_CACHE_MAX_ENTRIES = 1000
+ANALYSIS_CACHE_TTL = 7 * 24 * 60 * 60  # in seconds
 
 # Application paths
 UPLOAD_FOLDER = "uploads"
+IMAGE_STORE_FOLDER = UPLOAD_FOLDER + "/images"  # Content-addressed analysis images
 BACKUP_FOLDER = "backups"
\ No newline at end of file
@@ -1,32 +1,25 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 import config
-from app.models.plant import Base as PlantBase
-from app.models.user import Base as UserBase
-from app.models.irrigation import Base as IrrigationBase
-from app.models.analysis import Base as AnalysisBase
+from app.database import get_session, init_schema
 import os
 
 def init_database():
     """Initialize the database with tables"""
-    engine = create_engine(config.DATABASE_URL)
-    
-    # Create all tables
-    PlantBase.metadata.create_all(engine)
-    UserBase.metadata.create_all(engine)
-    IrrigationBase.metadata.create_all(engine)
-    AnalysisBase.metadata.create_all(engine)
+    # Create or verify every table and apply pending migrations in one transaction
+    applied = init_schema()
+    if applied:
+        print(f"Applied schema migrations: {applied}")
     
     print("Database initialized successfully!")
     
     # Create a session
-    Session = sessionmaker(bind=engine)
-    session = Session()
+    session = get_session()
     
     # Add default data if needed
     # For example, default irrigation systems
-    from app.models.irrigation import IrrigationSystem
+    from app.models import GrowingMedia, IrrigationSystem, StockTank
     IrrigationSystem.get_default_systems(session)
+    GrowingMedia.get_default_media(session)
+    StockTank.get_default_tanks(session)
     
     session.close()
 
@@ -0,0 +1,62 @@
+import argparse
+from sqlalchemy import select, update, text
+import config
+from app.database import get_engine
+from app.models.analysis import PlantAnalysis
+from app.services.image_store import ImageStore
+
+def migrate_images(database_url=None, batch_size=100, store=None, vacuum=False):
+    """Move inline PlantAnalysis.image_data blobs into the image store
+    
+    Rows are walked in id order, one batch per transaction, and only one blob
+    is held in memory at a time. Returns the number of migrated rows.
+    """
+    engine = get_engine(database_url)
+    store = store or ImageStore()
+    table = PlantAnalysis.__table__
+    
+    migrated = 0
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            ids = conn.execute(
+                select(table.c.id)
+                .where(table.c.id > last_id, table.c.image_data.isnot(None))
+                .order_by(table.c.id)
+                .limit(batch_size)
+            ).scalars().all()
+            
+            if not ids:
+                break
+            
+            for analysis_id in ids:
+                blob = conn.execute(
+                    select(table.c.image_data).where(table.c.id == analysis_id)
+                ).scalar_one()
+                ref = store.put(blob)
+                conn.execute(
+                    update(table)
+                    .where(table.c.id == analysis_id)
+                    .values(image_path=ref, image_data=None)
+                )
+        
+        last_id = ids[-1]
+        migrated += len(ids)
+        print(f"Migrated {migrated} images...")
+    
+    if vacuum and migrated:
+        # Give the space freed by the blobs back to the filesystem
+        with engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+    
+    return migrated
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move analysis images out of the database into the image store")
+    parser.add_argument("--database-url", default=config.DATABASE_URL)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--vacuum", action="store_true", help="Run VACUUM afterwards to shrink the database file")
+    args = parser.parse_args()
+    
+    count = migrate_images(args.database_url, args.batch_size, vacuum=args.vacuum)
+    print(f"Image migration complete! {count} images moved to {config.IMAGE_STORE_FOLDER}")
\ No newline at end of file
@@ -0,0 +1,67 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+import config
+from app.services import analysis_cache, yield_model
+
+
+@pytest.fixture(autouse=True)
+def isolated_analysis_cache(tmp_path, monkeypatch):
+    """Point the shared analysis cache at a throwaway file for each test"""
+    monkeypatch.setattr(config, "ANALYSIS_CACHE_PATH", str(tmp_path / "analysis_cache.db"))
+    monkeypatch.setattr(analysis_cache, "_cache", None)
+    yield
+
+
+@pytest.fixture(autouse=True)
+def isolated_yield_model(tmp_path, monkeypatch):
+    """Keep fitted yield models out of the shared cache directory"""
+    monkeypatch.setattr(config, "YIELD_MODEL_PATH", str(tmp_path / "yield_model.json"))
+    monkeypatch.setattr(yield_model, "_models", {})
+    yield
+
+
+class FakeAIService:
+    """Stand-in for the Gemini/OpenRouter services that records concurrency"""
+    
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+    
+    def analyze_image(self, image_data, prompt=None):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        return "analysis"
+
+
+def _leaf_png(color=(40, 160, 40), size=(120, 90)):
+    """PNG bytes of a plain-coloured frame (BGR color)"""
+    img = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+    img[:] = color
+    ok, encoded = cv2.imencode(".png", img)
+    assert ok
+    return encoded.tobytes()
+
+
+@pytest.fixture
+def fake_ai_service():
+    """FakeAIService factory, e.g. fake_ai_service(delay=0.05)"""
+    return FakeAIService
+
+
+@pytest.fixture
+def leaf_png():
+    """Encoder for plain-coloured PNG test images, e.g. leaf_png((30, 200, 220))"""
+    return _leaf_png
\ No newline at end of file
@@ -0,0 +1,202 @@
+import datetime
+
+import numpy as np
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import config
+from app.database import get_engine, init_schema
+from app.models import Alert, Plant, PlantAnalysis
+from app.services.alert_engine import AlertEngine, AlertRule, change_hits, compile_rules, get_alert_engine
+from app.services.measurement_store import MeasurementStore
+from app.services.telemetry import TelemetryHub
+
+NOW = datetime.datetime(2024, 3, 1, 12)
+HOUR = 3600.0
+T0 = (NOW - datetime.datetime(1970, 1, 1)).total_seconds()
+
+
+@pytest.fixture
+def url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'melon.db'}"
+    init_schema(url)
+    with Session(get_engine(url)) as session:
+        session.add_all([Plant(name="Melon 1"), Plant(name="Melon 2")])
+        session.commit()
+    return url
+
+
+def stored(url):
+    with Session(get_engine(url)) as session:
+        return session.scalars(select(Alert).order_by(Alert.id)).all()
+
+
+def test_compiled_thresholds_fire_only_their_metric(url):
+    rules = [
+        AlertRule("Hot", "temperature", "above", 30, "Medium"),
+        AlertRule("Very hot", "temperature", "above", 38, "High"),
+        AlertRule("Cold", "temperature", "below", 10, "Medium"),
+        AlertRule("Dry", "humidity", "below", 30, "Low"),
+    ]
+    assert set(compile_rules(rules)) == {"temperature", "humidity"}
+    with pytest.raises(ValueError, match="Unknown alert rule kind"):
+        compile_rules([AlertRule("Odd", "ph", "sideways", 1, "Low")])
+    
+    engine = AlertEngine(url, rules)
+    values = np.array([20, 31, 40, np.nan, 5])
+    new = engine.observe("temperature", [f"plant:{i}" for i in range(5)], T0 + np.arange(5), values)
+    
+    assert new == 4
+    fired = {(alert.rule, alert.subject) for alert in stored(url)}
+    assert fired == {("Hot", "plant:1"), ("Hot", "plant:2"), ("Very hot", "plant:2"), ("Cold", "plant:4")}
+    assert engine.observe("ph", ["ec/NFT"], [T0], [3.0]) == 0
+
+
+def test_repeats_within_the_cooldown_update_one_alert(url):
+    engine = AlertEngine(url, [AlertRule("Hot", "temperature", "above", 30, "Medium", cooldown=HOUR)])
+    times = T0 + np.array([0, 600, 1200, 1200 + 2 * HOUR])
+    
+    assert engine.observe("temperature", ["plant:1"] * 4, times, [31, 33, 32, 35], plant_ids=[1] * 4) == 2
+    first, second = stored(url)
+    assert (first.occurrences, first.value, first.last_seen) == (3, 32, NOW + datetime.timedelta(minutes=20))
+    assert second.occurrences == 1 and second.plant_id == 1
+    
+    # Another engine on the same database picks up the open alert
+    again = AlertEngine(url, engine.rules)
+    assert again.observe("temperature", ["plant:1"], [times[-1] + 60], [36]) == 0
+    assert stored(url)[1].occurrences == 2
+
+
+def test_a_failed_write_leaves_the_open_alerts_untouched(url):
+    engine = AlertEngine(url, [AlertRule("Hot", "temperature", "above", 30, "Medium", cooldown=HOUR)])
+    assert engine.observe("temperature", ["plant:1"], [T0], [31], plant_ids=[1]) == 1
+    
+    database = engine.engine
+    
+    class FailingEngine:
+        def begin(self):
+            raise RuntimeError("database is locked")
+        
+        def __getattr__(self, name):
+            return getattr(database, name)
+    
+    engine.engine = FailingEngine()
+    assert engine.observe("temperature", ["plant:1", "plant:2"], [T0 + 60] * 2, [33, 34], plant_ids=[1, 2]) == 0
+    assert engine.last_error == "database is locked"
+    
+    engine.engine = database
+    assert engine.observe("temperature", ["plant:1", "plant:2"], [T0 + 120] * 2, [35, 36], plant_ids=[1, 2]) == 1
+    first, second = stored(url)
+    assert (first.subject, first.occurrences, first.value) == ("plant:1", 2, 35)
+    assert (second.subject, second.occurrences, second.first_seen) == ("plant:2", 1, NOW + datetime.timedelta(minutes=2))
+
+
+def test_change_rules_compare_with_the_subjects_history(url):
+    engine = AlertEngine(url, [
+        AlertRule("EC drift", "ec", "drift", 0.3, "Medium", window=HOUR),
+        AlertRule("Confidence rising", "disease_confidence", "rise", 0.5, "High", window=10 * HOUR),
+    ])
+    assert engine.observe("ec", ["ec/NFT"] * 5, T0 + 60 * np.arange(5), [2.0, 2.1, 1.9, 2.0, 2.5]) == 1
+    # Only the last hour counts: 2.5 two hours on is the new normal, not a drift
+    assert engine.observe("ec", ["ec/NFT", "ec/Drip"], [T0 + 3 * HOUR] * 2, [2.55, 2.0]) == 0
+    
+    times = T0 + HOUR * np.array([0, 1, 2, 20])
+    assert engine.observe("disease_confidence", ["plant:1"] * 4, times, [0.1, 0.3, 0.7, 0.95]) == 1
+    assert [alert.rule for alert in stored(url)] == ["EC drift", "Confidence rising"]
+    assert stored(url)[1].last_seen == NOW + datetime.timedelta(hours=2)
+
+
+def test_change_hits_match_brute_force():
+    rng = np.random.default_rng(2)
+    rules = [
+        AlertRule("Rise", "x", "rise", 1.0, "Low", window=50),
+        AlertRule("Fall", "x", "fall", 1.5, "Low"),
+        AlertRule("Drift", "x", "drift", 1.0, "Low", window=20),
+    ]
+    codes = np.sort(rng.integers(0, 20, 3000))
+    times = np.concatenate([np.sort(rng.uniform(0, 500, (codes == code).sum())) for code in range(20)])
+    values = rng.normal(0, 1, len(codes))
+    targets = np.flatnonzero(rng.random(len(codes)) < 0.5)
+    
+    expected = set()
+    for position in targets:
+        earlier = [p for p in range(max(position - 8, 0), position) if codes[p] == codes[position]]
+        for rule in rules:
+            window = [values[p] for p in earlier if rule.window is None or times[p] >= times[position] - rule.window]
+            if not window:
+                continue
+            change = {
+                "rise": values[position] - min(window),
+                "fall": max(window) - values[position],
+                "drift": abs(values[position] - np.mean(window)),
+            }[rule.kind]
+            if change >= rule.threshold:
+                expected.add((position, rule.name))
+    
+    hits = change_hits(rules, codes, times, values, targets, lags=8)
+    assert {(position, rule.name) for position, rule in hits} == expected
+
+
+def test_measurements_sensors_and_analyses_feed_the_engine(url):
+    store = MeasurementStore(url)
+    store.add_measurements([
+        {"plant_id": 1, "measurement_date": NOW, "temperature": 37.0, "humidity": 60},
+        {"plant_id": 2, "measurement_date": NOW, "temperature": 24.0, "humidity": 60},
+    ])
+    hub = TelemetryHub(url, store=store, clock=lambda: T0)
+    hub.record([{"sensor": "water_temperature", "system": "NFT", "value": 30.0}])
+    
+    engine = get_alert_engine(url)
+    assert engine.scan_analyses() == 0
+    with Session(get_engine(url)) as session:
+        session.add_all([
+            PlantAnalysis(plant_id=2, analysis_date=NOW, health_score=25.0, disease_confidence=0.1),
+            PlantAnalysis(plant_id=1, analysis_date=NOW, health_score=90.0),
+        ])
+        session.commit()
+    assert engine.scan_analyses() == 2
+    assert engine.scan_analyses() == 0
+    
+    alerts = engine.alerts(NOW - datetime.timedelta(days=1), NOW + datetime.timedelta(days=1))
+    assert set(zip(alerts["subject"], alerts["rule"])) == {
+        ("Melon 1", "Heat stress"), ("water_temperature/NFT", "Root zone too warm"),
+        ("Melon 2", "Critical health score"), ("Melon 2", "Low health score"),
+    }
+    assert set(engine.alerts(NOW - datetime.timedelta(days=1), NOW + datetime.timedelta(days=1), plant_id=2)["severity"]) == {"High", "Medium"}
+    assert engine.last_error is None and config.HEALTH_ALERT_THRESHOLD / 2 > 25.0
+
+def test_the_analysis_cursor_survives_restarts(url):
+    def analyse(*scores):
+        with Session(get_engine(url)) as session:
+            session.add_all([PlantAnalysis(plant_id=1, analysis_date=NOW, health_score=score) for score in scores])
+            session.commit()
+    
+    # Analyses stored before any scan are evaluated by the first one
+    analyse(25.0)
+    engine = AlertEngine(url)
+    assert engine.scan_analyses() == 2
+    
+    # ... and a new process resumes after the last evaluated analysis
+    analyse(40.0)
+    restarted = AlertEngine(url)
+    assert restarted.scan_analyses() == 0
+    assert [alert.occurrences for alert in stored(url)] == [1, 2]
+    
+    # A failed write leaves the cursor where it was
+    analyse(24.0)
+    database = restarted.engine
+    
+    class FailingEngine:
+        def begin(self):
+            raise RuntimeError("database is locked")
+        
+        def __getattr__(self, name):
+            return getattr(database, name)
+    
+    restarted.engine = FailingEngine()
+    assert restarted.scan_analyses() == 0 and restarted.last_error == "database is locked"
+    restarted.engine = database
+    assert restarted.scan_analyses() == 0
+    assert engine.scan_analyses() == 0
+    assert [alert.occurrences for alert in stored(url)] == [2, 3]
\ No newline at end of file
@@ -0,0 +1,102 @@
+from PIL import Image
+
+from app.services.analysis_cache import AnalysisCache, image_digest
+from app.services.image_analysis_service import ImageAnalysisService
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+
+
+def test_key_depends_on_image_prompt_and_model():
+    image = b"leaf-bytes"
+    
+    key = AnalysisCache.make_key(image, "prompt", "model")
+    
+    assert key == AnalysisCache.make_key(bytes(image), "prompt", "model")
+    assert key != AnalysisCache.make_key(b"other-leaf", "prompt", "model")
+    assert key != AnalysisCache.make_key(image, "other prompt", "model")
+    assert key != AnalysisCache.make_key(image, "prompt", "other-model")
+    assert AnalysisCache.make_key("not an image") is None
+
+
+def test_pil_images_hash_by_pixels():
+    a = Image.new("RGB", (4, 4), (10, 200, 10))
+    b = Image.new("RGB", (4, 4), (10, 200, 10))
+    
+    assert image_digest(a) == image_digest(b)
+    assert image_digest(a) != image_digest(Image.new("RGB", (4, 4), (200, 10, 10)))
+
+
+def test_hit_miss_counters_and_persistence(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = AnalysisCache(path=path, max_entries=10, ttl=0)
+    
+    assert cache.get("k") is None
+    cache.set("k", {"ai_analysis": "healthy"})
+    assert cache.get("k") == {"ai_analysis": "healthy"}
+    
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert AnalysisCache(path=path).get("k") == {"ai_analysis": "healthy"}
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    clock = FakeClock()
+    cache = AnalysisCache(path=str(tmp_path / "cache.db"), max_entries=2, ttl=0, clock=clock)
+    
+    cache.set("a", 1)
+    clock.now += 1
+    cache.set("b", 2)
+    clock.now += 1
+    cache.get("a")
+    clock.now += 1
+    cache.set("c", 3)
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_entries_expire_after_ttl(tmp_path):
+    clock = FakeClock()
+    cache = AnalysisCache(path=str(tmp_path / "cache.db"), ttl=60, clock=clock)
+    
+    cache.set("k", "value")
+    clock.now += 59
+    assert cache.get("k") == "value"
+    clock.now += 2
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_image_analysis_service_reuses_cached_results(tmp_path, fake_ai_service, leaf_png):
+    ai_service = fake_ai_service()
+    cache = AnalysisCache(path=str(tmp_path / "cache.db"))
+    service = ImageAnalysisService(ai_service=ai_service, cache=cache)
+    image = leaf_png()
+    
+    first = service.analyze_plant_image(image)
+    second = service.analyze_plant_image(image)
+    batch = dict(service.analyze_batch([image, leaf_png((20, 90, 200))], max_workers=1))
+    
+    assert first == second == batch[0]
+    assert ai_service.calls == 2
+    assert cache.stats()["hits"] == 2
+
+
+def test_ai_errors_are_not_cached(tmp_path, leaf_png):
+    class FailingAIService:
+        def analyze_image(self, image_data, prompt=None):
+            return "Error analyzing image: quota exceeded"
+    
+    cache = AnalysisCache(path=str(tmp_path / "cache.db"))
+    service = ImageAnalysisService(ai_service=FailingAIService(), cache=cache)
+    
+    service.analyze_plant_image(leaf_png())
+    
+    assert cache.stats()["entries"] == 0
\ No newline at end of file
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+
+from app.services.async_ai_service import AsyncAIService, BackgroundEventLoop
+
+
+class SlowService:
+    """Blocking stand-in for a provider service with per-model latency"""
+    
+    def __init__(self, delays, answers=None):
+        self.delays = delays
+        self.answers = answers or {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+    
+    def get_response(self, prompt, model=None):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delays.get(model, 0.0))
+        with self._lock:
+            self.in_flight -= 1
+        return self.answers.get(model, f"{model or 'gemini'}: {prompt}")
+    
+    def analyze_image(self, image_data, prompt=None, model=None):
+        return f"{model or 'gemini'} saw {len(image_data)} bytes"
+
+
+def make_service(gemini_delay=0.2, claude_delay=0.2, gpt_delay=0.2, answers=None, **kwargs):
+    gemini = SlowService({None: gemini_delay}, answers)
+    openrouter = SlowService({"anthropic/claude-3-opus": claude_delay, "openai/gpt-4": gpt_delay}, answers)
+    return AsyncAIService(gemini_service=gemini, openrouter_service=openrouter, **kwargs)
+
+
+def test_fan_out_waits_for_the_slowest_model_not_the_sum():
+    service = make_service(0.2, 0.3, 0.2)
+    
+    start = time.perf_counter()
+    answers = asyncio.run(service.fan_out("pH?"))
+    elapsed = time.perf_counter() - start
+    
+    assert list(answers) == ["Gemini", "OpenRouter - Claude", "OpenRouter - GPT-4"]
+    assert answers["OpenRouter - Claude"] == "anthropic/claude-3-opus: pH?"
+    assert elapsed < 0.6
+
+
+def test_fan_out_first_acceptable_skips_errors_and_slow_models():
+    answers = {None: "Error communicating with Gemini API: quota"}
+    service = make_service(0.0, 0.1, 1.0, answers=answers)
+    
+    start = time.perf_counter()
+    result = asyncio.run(service.fan_out("pH?", first_acceptable=True))
+    
+    assert result == {"OpenRouter - Claude": "anthropic/claude-3-opus: pH?"}
+    assert time.perf_counter() - start < 0.5
+
+
+def test_fan_out_timeout_reports_missing_models():
+    service = make_service(0.0, 0.0, 1.0)
+    
+    answers = asyncio.run(service.fan_out("pH?", timeout=0.2))
+    
+    assert answers["Gemini"] == "gemini: pH?"
+    assert answers["OpenRouter - GPT-4"].endswith("timed out")
+
+
+def test_concurrency_is_limited_per_provider():
+    service = make_service(max_concurrency=2)
+    
+    async def burst():
+        return await asyncio.gather(*[service.get_response("q", "OpenRouter - GPT-4") for _ in range(6)])
+    
+    assert len(asyncio.run(burst())) == 6
+    assert service._service("openrouter").max_in_flight == 2
+
+
+def test_shared_background_loop_runs_calls_from_sync_code():
+    service = make_service(loop_runner=BackgroundEventLoop())
+    
+    assert service.run(service.analyze_image(b"leaf", target="OpenRouter - GPT-4")) == "openai/gpt-4-vision saw 4 bytes"
+    assert service.run(service.get_response("hi")) == "gemini: hi"
\ No newline at end of file
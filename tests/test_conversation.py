@@ -0,0 +1,136 @@
+from sqlalchemy import create_engine, text
+
+import config
+from app.database import init_schema
+from app.services.conversation import ChatHistoryStore, ConversationManager, estimate_tokens
+from app.services.openrouter_service import OpenRouterService
+
+
+def long_answer(i):
+    return f"Answer {i}: keep EC near 2.0 mS/cm. " + "Detail about nutrient balance. " * 20
+
+
+def test_window_and_summary_stay_within_budget():
+    conversation = ConversationManager(token_budget=400, summary_budget=80)
+    
+    for i in range(200):
+        conversation.add_exchange(f"Question {i} about fertigation?", long_answer(i))
+        assert conversation.window_tokens <= 400 or len(conversation.turns) == 2
+        assert estimate_tokens(conversation.summary) <= 80
+    
+    assert conversation.turns[-1]["content"] == long_answer(199)
+    assert "Question 0 " not in conversation.summary
+    assert conversation.summary.splitlines()[-1] == "- Assistant advised: Answer 197: keep EC near 2.0 mS/cm."
+
+
+def test_context_messages_put_memory_before_recent_turns():
+    conversation = ConversationManager(token_budget=200)
+    for i in range(5):
+        conversation.add_exchange(f"Question {i}?", long_answer(i))
+    
+    messages = conversation.context_messages()
+    
+    assert messages[0]["role"] == "system"
+    assert "Farmer asked: Question 0?" in messages[0]["content"]
+    assert messages[-1] == {"role": "assistant", "content": long_answer(4)}
+    
+    history = conversation.gemini_history("You are PyMelonBuddy.")
+    assert history[0]["parts"][0].startswith("You are PyMelonBuddy.")
+    assert [turn["role"] for turn in history[2:]] == ["user", "model"] * (len(history[2:]) // 2)
+
+
+def test_openrouter_payload_includes_history():
+    service = OpenRouterService(cache=False)
+    history = [{"role": "user", "content": "pH?"}, {"role": "assistant", "content": "5.8"}]
+    
+    payload = service._chat_payload("And EC?", "openai/gpt-4", 0.7, 100, history)
+    
+    assert [m["role"] for m in payload["messages"]] == ["system", "user", "assistant", "user"]
+    assert payload["messages"][-1]["content"] == "And EC?"
+
+
+def test_exchanges_are_persisted_to_chat_history(tmp_path):
+    url = f"sqlite:///{tmp_path / 'melon.db'}"
+    init_schema(url)
+    store = ChatHistoryStore(url)
+    conversation = ConversationManager(user_id=7, store=store)
+    
+    conversation.add_exchange("Why are leaves yellow?", "Likely magnesium deficiency.", model_used="Gemini")
+    store.flush()
+    
+    with create_engine(url).connect() as conn:
+        row = conn.execute(text("SELECT user_id, query, response, model_used FROM chat_history")).one()
+        indexes = conn.execute(text("PRAGMA index_list(chat_history)")).fetchall()
+    assert tuple(row) == (7, "Why are leaves yellow?", "Likely magnesium deficiency.", "Gemini")
+    assert "ix_chat_history_user_timestamp" in [index[1] for index in indexes]
+
+
+def test_history_pages_walk_backwards_without_gaps(tmp_path):
+    url = f"sqlite:///{tmp_path / 'melon.db'}"
+    init_schema(url)
+    store = ChatHistoryStore(url, asynchronous=False)
+    for i in range(25):
+        store.save(1, f"Question {i}?", f"Answer {i}.")
+        store.save(2, f"Other user {i}?", "No.")
+    
+    page, cursor = store.fetch_page(1, limit=10)
+    assert [row["query"] for row in page] == [f"Question {i}?" for i in range(15, 25)]
+    
+    seen = [row["query"] for row in page]
+    while cursor is not None:
+        page, cursor = store.fetch_page(1, cursor=cursor, limit=10)
+        seen = [row["query"] for row in page] + seen
+    assert seen == [f"Question {i}?" for i in range(25)]
+
+
+def test_anonymous_sessions_only_see_their_own_history(tmp_path):
+    url = f"sqlite:///{tmp_path / 'melon.db'}"
+    init_schema(url)
+    store = ChatHistoryStore(url, asynchronous=False)
+    first = ConversationManager(session_id="a" * 32, store=store)
+    second = ConversationManager(session_id="b" * 32, store=store)
+    
+    first.add_exchange("Is my Galia ripe?", "Check the slip at the stem.")
+    second.add_exchange("How much water?", "About 2 L per day.")
+    
+    assert [row["query"] for row in store.fetch_page(None, session_id="a" * 32)[0]] == ["Is my Galia ripe?"]
+    assert [row["query"] for row in store.fetch_page(None, session_id="b" * 32)[0]] == ["How much water?"]
+    # Without a user or a session there is no history to show
+    assert store.fetch_page(None) == ([], None)
+    assert store.fetch_page(7, session_id="a" * 32) == ([], None)
+
+
+def test_failed_history_writes_are_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CHAT_HISTORY_RETRY_DELAY", 0)
+    url = f"sqlite:///{tmp_path / 'melon.db'}"
+    init_schema(url)
+    
+    class FlakyStore(ChatHistoryStore):
+        failures = 1
+        
+        def _write(self, rows):
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError("database is locked")
+            super()._write(rows)
+    
+    store = FlakyStore(url)
+    store.save(3, "When to harvest?", "When the tendril dries.")
+    store.save(3, "How sweet?", "Around 14 Brix.")
+    store.flush()
+    
+    assert store.last_error == "database is locked"
+    assert [row["query"] for row in store.fetch_page(3)[0]] == ["When to harvest?", "How sweet?"]
+
+
+def test_persistence_failures_do_not_break_the_chat():
+    class BrokenStore:
+        def save(self, *args):
+            raise RuntimeError("no such table: chat_history")
+    
+    conversation = ConversationManager(store=BrokenStore())
+    
+    conversation.add_exchange("Hello?", "Hi!")
+    
+    assert conversation.turns[-1]["content"] == "Hi!"
+    assert "chat_history" in conversation.persist_error
\ No newline at end of file
@@ -0,0 +1,77 @@
+import datetime
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.database import get_engine, init_schema
+from app.models import GrowingMedia, IrrigationSchedule, IrrigationSystem, Plant, PlantAnalysis
+from app.services.dashboard_service import DashboardService
+from app.services.data_version import get_data_version
+from app.services.measurement_store import MeasurementStore
+
+NOW = datetime.datetime(2024, 3, 15, 12)
+
+
+@pytest.fixture
+def url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'melon.db'}"
+    init_schema(url)
+    with Session(get_engine(url)) as session:
+        cocopeat, rockwool = GrowingMedia(name="Cocopeat"), GrowingMedia(name="Rockwool")
+        drip = IrrigationSystem(name="Drip Fertigation", flow_rate=2.0)
+        session.add_all([cocopeat, rockwool, drip])
+        session.add(IrrigationSchedule(system=drip, start_time=NOW, duration=15, frequency="Every 3 hours"))
+        for i, media in enumerate([cocopeat, cocopeat, rockwool]):
+            plant = Plant(name=f"Plant #{i + 1}", variety="Galia", media=media, irrigation=drip,
+                          planting_date=NOW - datetime.timedelta(days=20), fruit_count=i)
+            session.add(plant)
+            session.add(PlantAnalysis(plant=plant, analysis_date=NOW - datetime.timedelta(days=1),
+                                      health_score=90 - 30 * i, disease_detected=(i == 1), disease_name="Powdery mildew"))
+        session.commit()
+    return url
+
+
+def test_aggregates_come_from_the_database(url):
+    store = MeasurementStore(url)
+    version = get_data_version("measurements")
+    store.add_measurements(
+        {"plant_id": plant_id, "measurement_date": NOW - datetime.timedelta(days=day), "height": 50.0 - day * plant_id,
+         "temperature": 25.0, "humidity": 70.0}
+        for plant_id in (1, 2, 3) for day in range(8)
+    )
+    assert get_data_version("measurements") == version + 1
+    
+    service = DashboardService(url)
+    overview = service.overview(now=NOW)
+    assert overview["active_plants"] == 3
+    assert overview["avg_health"] == pytest.approx(60.0)
+    assert overview["readings_24h"] == 3
+    
+    media = service.media_performance().set_index("media")
+    assert media.loc["Cocopeat", "growth_rate"] == pytest.approx(10.5)
+    assert media.loc["Rockwool", "growth_rate"] == pytest.approx(21.0)
+    assert media.loc["Cocopeat", "plants"] == 2
+    
+    usage = service.irrigation_usage().set_index("system")
+    # 8 runs x 15 min at 2 L/h shared by 3 plants
+    assert usage.loc["Drip Fertigation", "water_usage"] == pytest.approx(4.0 / 3)
+    
+    conditions = service.daily_conditions(datetime.datetime(2024, 3, 8), datetime.datetime(2024, 3, 16))
+    assert len(conditions) == 8
+    assert conditions["temperature"].tolist() == [25.0] * 8
+
+
+def test_alerts_and_activities(url):
+    service = DashboardService(url)
+    window = (NOW - datetime.timedelta(days=7), NOW)
+    
+    # The fixture stores analyses directly, so nothing has scanned them yet
+    assert service.health_alerts(*window).empty
+    service.alert_engine.scan_analyses()
+    alerts = service.health_alerts(*window)
+    assert alerts[["subject", "rule"]].values.tolist() == [["Plant #3", "Low health score"]]
+    assert service.health_alerts(*window, plant_id=1).empty
+    
+    activities = service.recent_activities()
+    assert activities["type"].tolist()[0] == "Health"
+    assert "Detected Powdery mildew in Plant #2" in activities["activity"].tolist()
\ No newline at end of file
@@ -0,0 +1,83 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy.orm import Session
+
+from app.database import get_engine, init_schema
+from app.models import Plant
+from app.services.growth_forecast import GrowthForecaster, fit_logistic, logistic
+from app.services.measurement_store import MeasurementStore
+
+PLANTED = datetime.datetime(2024, 3, 1)
+NOW = PLANTED + datetime.timedelta(days=40)
+# max_height, rate, midpoint of the simulated plants
+CURVES = np.array([[200.0, 0.12, 35.0], [150.0, 0.09, 45.0], [240.0, 0.15, 30.0]])
+
+
+@pytest.fixture
+def url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'melon.db'}"
+    init_schema(url)
+    with Session(get_engine(url)) as session:
+        session.add_all([Plant(name=f"Plant #{i + 1}", variety="Galia", planting_date=PLANTED) for i in range(4)])
+        session.commit()
+    return url
+
+
+def readings(days, plants=(1, 2, 3), first_day=0):
+    day = np.arange(first_day, days) + 0.5
+    heights = logistic(day[None, :], CURVES[[(plant_id - 1) % len(CURVES) for plant_id in plants]])
+    return pd.DataFrame({
+        "plant_id": np.repeat(plants, len(day)),
+        "measurement_date": [PLANTED + datetime.timedelta(days=float(d)) for _ in plants for d in day],
+        "height": heights.ravel(),
+    })
+
+
+def test_batched_fit_recovers_each_curve():
+    day = np.tile(np.arange(0.0, 60.0), (3, 1))
+    rng = np.random.default_rng(1)
+    heights = logistic(day, CURVES) + rng.normal(0, 1.0, day.shape)
+    mask = np.ones(day.shape, dtype=bool)
+    # The second plant has a shorter history
+    mask[1, 50:] = False
+    
+    params, rmse = fit_logistic(day, heights, mask)
+    
+    np.testing.assert_allclose(params, CURVES, rtol=0.1)
+    assert (rmse < 1.5).all()
+
+
+def test_only_plants_with_new_readings_are_refitted(url):
+    store = MeasurementStore(url)
+    store.add_measurements(readings(30))
+    store.add_measurements(readings(3, plants=(4,)))
+    forecaster = GrowthForecaster(url)
+    
+    assert forecaster.update() == 3
+    assert forecaster.update() == 0
+    
+    store.add_measurements(readings(40, plants=(2,), first_day=30))
+    assert forecaster.update() == 1
+    
+    fits = forecaster.fits().set_index("plant_id")
+    assert sorted(fits.index) == [1, 2, 3]
+    assert fits.at[2, "max_height"] == pytest.approx(150.0, rel=0.02)
+    assert fits.at[2, "points"] == 40
+
+
+def test_forecast_covers_every_fitted_active_plant(url):
+    MeasurementStore(url).add_measurements(readings(30))
+    forecaster = GrowthForecaster(url)
+    
+    forecast = forecaster.forecast(days=10, now=NOW)
+    assert len(forecast) == 3 * 11
+    plant_1 = forecast[forecast["plant_id"] == 1]["height"].to_numpy()
+    np.testing.assert_allclose(plant_1, logistic(np.arange(40.0, 51.0)[None, :], CURVES[:1])[0], rtol=0.02)
+    
+    summary = forecaster.farm_summary(days=10, now=NOW).set_index("plant_id")
+    assert (summary["forecast"] > summary["height"]).all()
+    # 90% of mature height is reached at midpoint + ln(9) / rate
+    assert summary.at[1, "days_to_90"] == pytest.approx(35.0 + np.log(9) / 0.12 - 40.0, abs=1.0)
\ No newline at end of file
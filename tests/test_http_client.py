@@ -0,0 +1,176 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.services.http_client import HttpClient
+from app.services.openrouter_service import OpenRouterService
+
+
+class StandInServer:
+    """Local stand-in for the OpenRouter API that replays scripted responses"""
+    
+    def __init__(self, script):
+        self.script = list(script)
+        self.requests = []
+        self.client_ports = set()
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                server.requests.append(json.loads(body or b"{}"))
+                server.client_ports.add(self.client_address[1])
+                status, headers, payload, delay = server.script.pop(0) if server.script else (200, {}, {}, 0)
+                time.sleep(delay)
+                if isinstance(payload, str):
+                    data, content_type = payload.encode(), "text/event-stream"
+                else:
+                    data, content_type = json.dumps(payload).encode(), "application/json"
+                try:
+                    self.send_response(status)
+                    for key, value in headers.items():
+                        self.send_header(key, value)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up first (e.g. a read timeout test)
+                    self.close_connection = True
+            
+            def log_message(self, *args):
+                pass
+        
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        # Non-daemon handler threads are joined by server_close, so no request outlives its test
+        self.httpd.daemon_threads = False
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+    
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def ok(content="hello"):
+    return (200, {}, {"choices": [{"message": {"content": content}}]}, 0)
+
+
+@pytest.fixture
+def make_server():
+    servers = []
+    
+    def factory(*script):
+        server = StandInServer(script)
+        servers.append(server)
+        return server
+    
+    yield factory
+    for server in servers:
+        server.close()
+
+
+def make_client(**kwargs):
+    delays = []
+    client = HttpClient(backoff_factor=0.5, sleep=delays.append, **kwargs)
+    return client, delays
+
+
+def test_retries_server_errors_with_exponential_backoff(make_server):
+    server = make_server((500, {}, {}, 0), (503, {}, {}, 0), ok())
+    client, delays = make_client()
+    
+    response = client.post(server.url, metric="chat", json={})
+    
+    assert response.status_code == 200
+    assert delays == [0.5, 1.0]
+    assert client.metrics.summary()["chat"]["retries"] == 2
+
+
+def test_respects_retry_after_on_429(make_server):
+    server = make_server((429, {"Retry-After": "7"}, {}, 0), ok())
+    client, delays = make_client()
+    
+    assert client.post(server.url, json={}).status_code == 200
+    assert delays == [7.0]
+
+
+def test_gives_up_after_max_retries_and_returns_last_response(make_server):
+    server = make_server(*[(502, {}, {}, 0)] * 5)
+    client, delays = make_client(max_retries=2)
+    
+    response = client.post(server.url, metric="chat", json={})
+    
+    assert response.status_code == 502
+    assert len(delays) == 2
+    assert client.metrics.summary()["chat"]["errors"] == 1
+
+
+def test_read_timeout_is_enforced(make_server):
+    server = make_server((200, {}, {}, 0.5), (200, {}, {}, 0.5))
+    client, _ = make_client(read_timeout=0.1, max_retries=1)
+    
+    with pytest.raises(requests.Timeout):
+        client.post(server.url, metric="slow", json={})
+    assert client.metrics.summary()["slow"]["calls"] == 1
+
+
+def test_connections_are_kept_alive(make_server):
+    server = make_server()
+    client, _ = make_client()
+    
+    for _ in range(5):
+        client.post(server.url, json={})
+    
+    assert len(server.requests) == 5
+    assert len(server.client_ports) == 1
+
+
+def test_openrouter_service_uses_the_pooled_client(make_server):
+    server = make_server((503, {"Retry-After": "0"}, {}, 0), ok("Keep EC at 2.0"))
+    client, _ = make_client()
+    service = OpenRouterService(http_client=client, base_url=server.url)
+    
+    assert service.get_response("What EC for fruiting?") == "Keep EC at 2.0"
+    assert server.requests[-1]["messages"][-1]["content"] == "What EC for fruiting?"
+    metrics = service.get_latency_metrics()["openrouter.chat"]
+    assert metrics["calls"] == 1 and metrics["retries"] == 1
+    assert metrics["p95_ms"] >= metrics["p50_ms"] > 0
+
+
+def sse(*tokens):
+    events = [": OPENROUTER PROCESSING", ""]
+    for token in tokens:
+        events += ["data: " + json.dumps({"choices": [{"delta": {"content": token}}]}), ""]
+    events += ["data: [DONE]", ""]
+    return (200, {}, "\n".join(events) + "\n", 0)
+
+
+def test_openrouter_streams_server_sent_events(make_server):
+    server = make_server(sse("Keep ", "EC ", "at 2.0"))
+    client, _ = make_client()
+    service = OpenRouterService(http_client=client, base_url=server.url)
+    
+    tokens = list(service.stream_response("What EC for fruiting?"))
+    
+    assert tokens == ["Keep ", "EC ", "at 2.0"]
+    assert server.requests[-1]["stream"] is True
+    assert "openrouter.stream.first_token" in service.get_latency_metrics()
+
+
+def test_openrouter_stream_reports_errors_as_text(make_server):
+    server = make_server((401, {}, {"error": "bad key"}, 0))
+    client, _ = make_client()
+    service = OpenRouterService(http_client=client, base_url=server.url)
+    
+    tokens = list(service.stream_response("hello"))
+    
+    assert len(tokens) == 1
+    assert tokens[0].startswith("Error communicating with OpenRouter API")
\ No newline at end of file
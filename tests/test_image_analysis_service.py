@@ -0,0 +1,68 @@
+import pytest
+from PIL import Image
+
+from app.services.image_analysis_service import ImageAnalysisService
+
+
+def test_analyze_plant_image_returns_features_and_ai_analysis(fake_ai_service, leaf_png):
+    service = ImageAnalysisService(ai_service=fake_ai_service())
+    
+    result = service.analyze_plant_image(leaf_png())
+    
+    assert result["ai_analysis"] == "analysis"
+    assert result["features"]["leaf_area_estimate"] == 800 * 600
+    assert result["features"]["green_intensity"] > 1.0
+
+
+def test_analyze_plant_image_rejects_unsupported_input(fake_ai_service):
+    service = ImageAnalysisService(ai_service=fake_ai_service())
+    
+    assert service.analyze_plant_image("not an image") == {"error": "Unsupported image format"}
+
+
+def test_analyze_batch_matches_single_image_results(fake_ai_service, leaf_png):
+    ai_service = fake_ai_service()
+    service = ImageAnalysisService(ai_service=ai_service)
+    images = [leaf_png(), leaf_png((30, 200, 220)), Image.new("RGB", (64, 48), (40, 160, 40))]
+    
+    results = dict(service.analyze_batch(images, max_workers=2))
+    
+    assert sorted(results) == [0, 1, 2]
+    assert ai_service.calls == 3
+    for index, image_data in enumerate(images):
+        expected = service.analyze_plant_image(image_data)
+        assert results[index]["features"] == expected["features"]
+
+
+def test_analyze_batch_reports_errors_per_image(fake_ai_service, leaf_png):
+    service = ImageAnalysisService(ai_service=fake_ai_service())
+    
+    results = dict(service.analyze_batch([leaf_png(), 42], max_workers=2))
+    
+    assert "features" in results[0]
+    assert results[1] == {"error": "Unsupported image format"}
+
+
+def test_analyze_batch_bounds_ai_concurrency(fake_ai_service, leaf_png):
+    ai_service = fake_ai_service(delay=0.05)
+    service = ImageAnalysisService(ai_service=ai_service)
+    
+    results = list(service.analyze_batch([leaf_png()] * 8, max_workers=2, max_concurrent_ai=3))
+    
+    assert len(results) == 8
+    assert 1 < ai_service.max_in_flight <= 3
+
+
+def test_fused_extractor_matches_legacy_extractor():
+    from benchmarks.bench_feature_extraction import legacy_extract_features, make_frames
+    
+    frames = make_frames(3)
+    
+    batch = ImageAnalysisService.extract_features_batch(frames)
+    
+    for frame, features in zip(frames, batch):
+        expected = legacy_extract_features(frame)
+        assert features["leaf_area_estimate"] == expected["leaf_area_estimate"]
+        assert features["yellow_brown_ratio"] == pytest.approx(expected["yellow_brown_ratio"])
+        assert features["green_intensity"] == pytest.approx(expected["green_intensity"])
+        assert ImageAnalysisService._extract_features(frame) == features
\ No newline at end of file
@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.services.image_store import ImageStore
+from migrate_images import migrate_images
+
+
+def test_put_shards_by_hash_and_deduplicates(tmp_path):
+    store = ImageStore(root=str(tmp_path))
+    
+    ref = store.put(b"leaf photo")
+    
+    digest = ref.split("/")[-1]
+    assert ref == f"{digest[:2]}/{digest[2:4]}/{digest}"
+    assert store.put(b"leaf photo") == ref
+    assert os.listdir(os.path.dirname(store.path_for(ref))) == [digest]
+
+
+def test_open_serves_reads_through_mmap(tmp_path):
+    store = ImageStore(root=str(tmp_path))
+    ref = store.put(bytes(range(256)))
+    
+    with store.open(ref) as buffer:
+        pixels = np.frombuffer(buffer, np.uint8)
+        assert pixels[255] == 255
+        del pixels
+    
+    assert store.read(ref) == bytes(range(256))
+    assert store.read(store.put(b"")) == b""
+
+
+def test_rejects_references_outside_the_store(tmp_path):
+    store = ImageStore(root=str(tmp_path))
+    
+    with pytest.raises(ValueError):
+        store.path_for("../../etc/passwd")
+
+
+def test_migrate_images_moves_blobs_in_batches(tmp_path):
+    url = f"sqlite:///{tmp_path / 'melon.db'}"
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE plant_analyses (id INTEGER PRIMARY KEY, plant_id INTEGER, "
+            "image_data BLOB, image_path VARCHAR(255))"
+        ))
+        for i in range(1, 8):
+            blob = b"same photo" if i % 2 else f"photo {i}".encode()
+            conn.execute(text("INSERT INTO plant_analyses (id, image_data) VALUES (:id, :blob)"), {"id": i, "blob": blob})
+        conn.execute(text("INSERT INTO plant_analyses (id, image_data) VALUES (8, NULL)"))
+    store = ImageStore(root=str(tmp_path / "images"))
+    
+    assert migrate_images(url, batch_size=3, store=store) == 7
+    
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, image_data, image_path FROM plant_analyses ORDER BY id")).all()
+    assert all(row.image_data is None for row in rows)
+    assert rows[-1].image_path is None
+    assert store.read(rows[0].image_path) == b"same photo"
+    assert rows[0].image_path == rows[2].image_path
+    assert store.read(rows[1].image_path) == b"photo 2"
+    assert migrate_images(url, store=store) == 0
\ No newline at end of file
@@ -0,0 +1,109 @@
+import datetime
+
+import numpy as np
+import pytest
+from sqlalchemy.orm import Session
+
+import config
+from app.database import get_engine, init_schema
+from app.models import IrrigationSystem
+from app.services.irrigation_planner import IntervalIndex, IrrigationPlanner, expand_occurrences, peak_load
+from app.services.irrigation_scheduler import IrrigationScheduler
+
+NOW = datetime.datetime(2024, 3, 1, 0)
+HOUR = datetime.timedelta(hours=1)
+
+
+@pytest.fixture
+def url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'melon.db'}"
+    init_schema(url)
+    with Session(get_engine(url)) as session:
+        session.add_all([
+            IrrigationSystem(name="Drip Fertigation", flow_rate=2.0, pressure=100.0),
+            IrrigationSystem(name="NFT", flow_rate=4.0, pressure=150.0),
+        ])
+        session.commit()
+    return url
+
+
+def test_interval_index_matches_brute_force():
+    rng = np.random.default_rng(7)
+    starts = rng.integers(0, 100_000, 5000)
+    ends = starts + rng.integers(1, 2000, 5000)
+    index = IntervalIndex(starts, ends)
+    
+    for lo in rng.integers(-1000, 101_000, 300):
+        hi = lo + rng.integers(1, 5000)
+        expected = np.flatnonzero((starts < hi) & (ends > lo))
+        assert np.array_equal(np.sort(index.overlapping(lo, hi)), expected)
+    # Runs are half-open: touching ends do not overlap
+    assert len(IntervalIndex([0, 10], [10, 20]).overlapping(10, 10 + 1)) == 1
+
+
+def test_interval_index_accepts_zero_length_intervals():
+    starts = np.concatenate([np.full(100, 50), np.arange(0, 1000, 10)])
+    ends = np.concatenate([np.full(100, 50), np.arange(0, 1000, 10) + np.arange(100) % 3])
+    index = IntervalIndex(starts, ends)
+    
+    for lo, hi in [(0, 100), (49, 51), (50, 60), (0, 1000), (995, 1200)]:
+        expected = np.flatnonzero((starts < hi) & (ends > lo))
+        assert np.array_equal(np.sort(index.overlapping(lo, hi)), expected)
+
+
+def test_expand_occurrences_keeps_runs_overlapping_the_window():
+    rows, starts, ends = expand_occurrences([0, 100, 50, 500], [30, 0, 0, 30], [10, 10, 10, 10], 45, 130)
+    
+    assert rows.tolist() == [0, 0, 0, 1, 2]
+    assert starts.tolist() == [60, 90, 120, 100, 50]
+    assert (ends - starts).tolist() == [10] * 5
+
+
+def test_peak_load_sweeps_groups_and_weight_columns():
+    groups, peaks, at = peak_load(
+        np.array([0, 5, 10, 10]), np.array([10, 20, 15, 12]),
+        np.array([[1, 10], [2, 20], [4, 40], [8, 80.0]]), np.array([1, 1, 1, 2])
+    )
+    
+    assert groups.tolist() == [1, 2]
+    # The first run ends exactly when the third starts, so they never add up
+    assert peaks.tolist() == [[6, 60], [8, 80]]
+    assert at.tolist() == [[10, 10], [10, 10]]
+
+
+def test_planner_finds_conflicts_and_pump_load(url):
+    scheduler = IrrigationScheduler(url, clock=lambda: NOW)
+    drip = scheduler.add_schedule(1, NOW + 6 * HOUR, 30, "Every 3 hours")
+    scheduler.add_schedule(2, NOW + 6 * HOUR, 60, "Daily")
+    planner = IrrigationPlanner(url)
+    
+    conflicts = planner.conflicts(1, NOW + 7 * HOUR + datetime.timedelta(minutes=40), 20, "Every 3 hours", now=NOW)
+    assert conflicts.empty
+    conflicts = planner.conflicts(1, NOW + 6 * HOUR + datetime.timedelta(minutes=15), 20, "Daily", now=NOW)
+    assert set(conflicts["schedule_id"]) == {drip}
+    assert len(conflicts) == config.IRRIGATION_PLANNING_HORIZON_DAYS
+    
+    flows = planner.peak_flows(now=NOW).set_index("system")
+    assert flows.loc["Drip Fertigation", "peak_runs"] == 1
+    assert flows.loc["NFT", "peak_flow"] == 4.0
+    flow, power, at = planner.farm_peak(now=NOW)
+    assert (flow, at) == (6.0, NOW + 6 * HOUR)
+    assert power == pytest.approx((2.0 * 100 + 4.0 * 150) / 3600)
+    
+    check = planner.check(2, NOW + 6 * HOUR, 60, "Daily", now=NOW)
+    assert check.peak_flow == 10.0 and check.overloaded
+
+
+def test_add_schedule_rejects_overlaps(url):
+    scheduler = IrrigationScheduler(url, clock=lambda: NOW)
+    scheduler.add_schedule(1, NOW + 6 * HOUR, 30, "Every 3 hours")
+    
+    with pytest.raises(ValueError, match="overlaps"):
+        scheduler.add_schedule(1, NOW + 9 * HOUR + datetime.timedelta(minutes=10), 10, "Daily")
+    with pytest.raises(ValueError, match="cannot repeat"):
+        scheduler.add_schedule(2, NOW, 120, "Every hour")
+    # Another system, or the same one once the schedule is cancelled, is free
+    scheduler.add_schedule(2, NOW + 9 * HOUR, 10, "Daily")
+    scheduler.cancel_schedule(1)
+    scheduler.add_schedule(1, NOW + 9 * HOUR + datetime.timedelta(minutes=10), 10, "Daily")
+    assert len(scheduler.schedules()) == 2
\ No newline at end of file
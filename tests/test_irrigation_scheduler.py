@@ -0,0 +1,180 @@
+import datetime
+import threading
+
+import pandas as pd
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database import get_engine, init_schema
+from app.models import IrrigationRun, IrrigationSystem, Plant
+from app.services.irrigation_scheduler import IrrigationScheduler, TimerHeap, next_occurrence
+from app.services.performance_summary import PerformanceSummary
+
+START = datetime.datetime(2024, 3, 1, 6)
+HOUR = datetime.timedelta(hours=1)
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'melon.db'}"
+    init_schema(url)
+    with Session(get_engine(url)) as session:
+        drip = IrrigationSystem(name="Drip Fertigation", flow_rate=2.0)
+        session.add_all([drip, IrrigationSystem(name="NFT", flow_rate=4.0)])
+        session.add_all([Plant(name="Plant #1", irrigation=drip), Plant(name="Plant #2", irrigation=drip)])
+        session.commit()
+    return url
+
+
+def run_log(url):
+    with get_engine(url).connect() as conn:
+        runs = IrrigationRun.__table__
+        return conn.execute(
+            select(runs.c.schedule_id, runs.c.scheduled_for, runs.c.status, runs.c.message)
+            .order_by(runs.c.scheduled_for, runs.c.schedule_id)
+        ).all()
+
+
+def test_timer_heap_orders_moves_and_cancels():
+    timers = TimerHeap()
+    for key in range(1000):
+        timers.push(key, START + (key % 10) * HOUR)
+    for key in range(0, 1000, 2):
+        timers.cancel(key)
+    timers.push(1, START + 20 * HOUR)
+    
+    fired = timers.pop_due(START + 5 * HOUR)
+    
+    assert [due for _, due in fired] == sorted(due for _, due in fired)
+    assert all(key % 2 and key % 10 <= 5 and key != 1 for key, _ in fired)
+    assert len(fired) == 3 * 100 - 1
+    assert len(timers) == 500 - len(fired)
+    assert timers.due(1) == START + 20 * HOUR
+
+
+def test_occurrences_are_expanded_lazily():
+    every_3h = 3 * HOUR
+    assert next_occurrence(START, every_3h, START - HOUR) == START
+    assert next_occurrence(START, every_3h, START) == START + every_3h
+    assert next_occurrence(START, every_3h, START + 10 * 24 * HOUR + HOUR) == START + 81 * every_3h
+    assert next_occurrence(START, None, START) is None
+
+
+def test_due_runs_are_logged_once_across_restarts(url):
+    clock = FakeClock(START - HOUR)
+    dispatched = []
+    scheduler = IrrigationScheduler(url, dispatch=dispatched.append, clock=clock)
+    schedule_id = scheduler.add_schedule(1, START, 15, "Every 3 hours")
+    scheduler.add_schedule(2, START + HOUR, 30)
+    
+    assert scheduler.run_pending() == []
+    assert len(scheduler.run_pending(START)) == 1
+    assert scheduler.run_pending(START + 2 * HOUR)[0]["duration"] == 30
+    assert scheduler.run_pending(START + 2 * HOUR) == []
+    assert scheduler.timers.due(schedule_id) == START + 3 * HOUR
+    assert [run["scheduled_for"] for run in dispatched] == [START, START + HOUR]
+    
+    # A second instance (a restart or another process) neither repeats logged runs
+    # nor replays every occurrence missed while it was down
+    clock.now = START + 10 * HOUR
+    restarted = IrrigationScheduler(url, clock=clock)
+    assert restarted.load() == 1
+    assert restarted.timers.due(schedule_id) == START + 9 * HOUR
+    assert len(restarted.run_pending()) == 1
+    assert scheduler.run_pending(START + 9 * HOUR) == []
+    
+    assert [(row.schedule_id, row.scheduled_for) for row in run_log(url)] == [
+        (schedule_id, START), (2, START + HOUR), (schedule_id, START + 9 * HOUR)
+    ]
+
+
+def test_failed_dispatch_is_recorded(url):
+    def broken_valve(run):
+        raise RuntimeError("valve did not open")
+    
+    scheduler = IrrigationScheduler(url, dispatch=broken_valve, clock=FakeClock(START))
+    scheduler.add_schedule(1, START, 15, "Daily")
+    scheduler.run_pending()
+    
+    (row,) = run_log(url)
+    assert (row.status, row.message) == ("failed", "valve did not open")
+    assert scheduler.last_error == "valve did not open"
+
+
+def test_failed_claims_are_retried(url):
+    dispatched = []
+    scheduler = IrrigationScheduler(url, dispatch=dispatched.append, clock=FakeClock(START))
+    schedule_id = scheduler.add_schedule(1, START, 15, "Every 3 hours")
+    once_id = scheduler.add_schedule(2, START, 30)
+    database = scheduler.engine
+    
+    class FailingEngine:
+        def begin(self):
+            raise RuntimeError("database is locked")
+        
+        def __getattr__(self, name):
+            return getattr(database, name)
+    
+    scheduler.engine = FailingEngine()
+    with pytest.raises(RuntimeError, match="locked"):
+        scheduler.run_pending(START + HOUR)
+    assert scheduler.timers.due(schedule_id) == START and scheduler.timers.due(once_id) == START
+    
+    scheduler.engine = database
+    assert len(scheduler.run_pending(START + HOUR)) == 2
+    assert scheduler.timers.due(schedule_id) == START + 3 * HOUR and scheduler.timers.due(once_id) is None
+    assert [(row.schedule_id, row.scheduled_for) for row in run_log(url)] == [(schedule_id, START), (once_id, START)]
+
+
+def test_schedule_changes_refresh_water_usage(url):
+    summary = PerformanceSummary(url)
+    summary.refresh()
+    scheduler = IrrigationScheduler(url, clock=FakeClock(START))
+    
+    schedule_id = scheduler.add_schedule(1, START, 30, "Every 12 hours")
+    drip = summary.irrigation_summary().set_index("system").loc["Drip Fertigation"]
+    # Two 30 min runs a day at 2 L/h shared by 2 plants
+    assert drip["water_usage"] == pytest.approx(1.0)
+    
+    scheduler.cancel_schedule(schedule_id)
+    assert summary.irrigation_summary().set_index("system").loc["Drip Fertigation", "water_usage"] == 0
+    assert scheduler.schedules().empty
+    assert IrrigationScheduler(url).load() == 0
+
+
+def test_targets_are_saved_and_carried_by_later_runs(url):
+    scheduler = IrrigationScheduler(url, clock=FakeClock(START - HOUR))
+    first = scheduler.add_schedule(1, START, 15, "Every 3 hours", ec_target=2.0, ph_target=5.8)
+    scheduler.add_schedule(2, START, 15, "Daily", ec_target=1.5)
+    cancelled = scheduler.add_schedule(1, START + HOUR, 15, "Daily")
+    scheduler.cancel_schedule(cancelled)
+    
+    assert scheduler.set_targets(1, ec_target=2.4, ph_target=6.0) == 1
+    assert scheduler.set_targets(1) == 0
+    
+    targets = scheduler.schedules().set_index("id")[["ec_target", "ph_target"]]
+    assert targets.loc[first].tolist() == [2.4, 6.0]
+    # Other systems keep their own targets
+    assert targets.loc[2, "ec_target"] == 1.5 and pd.isna(targets.loc[2, "ph_target"])
+    run = scheduler.run_pending(START)[0]
+    assert (run["ec_target"], run["ph_target"]) == (2.4, 6.0)
+
+
+def test_background_thread_dispatches_without_polling(url):
+    fired = threading.Event()
+    scheduler = IrrigationScheduler(url, dispatch=lambda run: fired.set()).start()
+    try:
+        scheduler.add_schedule(1, datetime.datetime.utcnow() + datetime.timedelta(milliseconds=200), 5)
+        assert fired.wait(5)
+    finally:
+        scheduler.stop()
+    assert len(run_log(url)) == 1
\ No newline at end of file
@@ -0,0 +1,69 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.database import init_schema
+from app.services.measurement_store import MeasurementStore, pick_resolution
+
+START = datetime.datetime(2024, 3, 1)
+
+
+@pytest.fixture
+def store(tmp_path):
+    url = f"sqlite:///{tmp_path / 'melon.db'}"
+    init_schema(url)
+    return MeasurementStore(url)
+
+
+def readings(count, plant_id=1, offset=0):
+    rng = np.random.default_rng(offset)
+    return pd.DataFrame({
+        "plant_id": plant_id,
+        "measurement_date": [START + datetime.timedelta(minutes=offset + i) for i in range(count)],
+        "height": rng.uniform(10, 90, count),
+        "temperature": rng.uniform(20, 32, count),
+        "humidity": rng.uniform(55, 85, count),
+        "light_level": np.where(np.arange(count) % 7 == 0, np.nan, rng.uniform(0, 40000, count)),
+    })
+
+
+def test_incremental_rollups_match_a_full_aggregation(store):
+    first, second = readings(1500), readings(1500, offset=1500)
+    store.add_measurements(first)
+    store.add_measurements(second)
+    store.add_measurements(readings(50, plant_id=2))
+    
+    raw = pd.concat([first, second])
+    end = START + datetime.timedelta(days=3)
+    for resolution, freq in (("hour", "H"), ("day", "D")):
+        history = store.history(1, START, end, resolution=resolution)
+        expected = raw.groupby(raw["measurement_date"].dt.floor(freq)).agg(["mean", "min", "max"])
+        
+        assert list(history["timestamp"]) == list(expected.index)
+        for metric in ("height", "light_level"):
+            np.testing.assert_allclose(history[metric], expected[(metric, "mean")])
+            np.testing.assert_allclose(history[f"{metric}_min"], expected[(metric, "min")])
+            np.testing.assert_allclose(history[f"{metric}_max"], expected[(metric, "max")])
+
+
+def test_rebuild_matches_incremental_rollups(store):
+    store.add_measurements(readings(500))
+    end = START + datetime.timedelta(days=1)
+    before = store.history(1, START, end, resolution="hour")
+    
+    store.rebuild_rollups()
+    
+    pd.testing.assert_frame_equal(store.history(1, START, end, resolution="hour"), before)
+
+
+def test_chart_window_picks_coarsest_sufficient_resolution(store):
+    assert pick_resolution(START, START + datetime.timedelta(days=30)) == "day"
+    assert pick_resolution(START, START + datetime.timedelta(days=3)) == "hour"
+    assert pick_resolution(START, START + datetime.timedelta(hours=6)) == "raw"
+    
+    store.add_measurements(readings(120))
+    raw = store.history(1, START, START + datetime.timedelta(hours=1))
+    assert len(raw) == 60
+    assert (raw["height"] == raw["height_max"]).all()
\ No newline at end of file
@@ -0,0 +1,101 @@
+import datetime
+
+import numpy as np
+import pytest
+from sqlalchemy.orm import Session
+
+import config
+from app.database import get_engine, init_schema
+from app.models import IrrigationSchedule, IrrigationSystem, NutrientMix, StockTank
+from app.services.nutrient_solver import ELEMENTS, NutrientSolver, estimate_ec, solve_doses
+
+
+def random_stocks(rng, tanks):
+    """Concentrates carrying a few elements each, in ppm"""
+    return rng.uniform(1000, 20000, (tanks, len(ELEMENTS))) * (rng.random((tanks, len(ELEMENTS))) < 0.4)
+
+
+def test_solve_doses_recovers_reachable_targets():
+    rng = np.random.default_rng(3)
+    stocks = random_stocks(rng, 6)
+    doses = rng.uniform(0.5, 3.0, (40, 6))
+    targets = doses @ stocks / 1000.0
+    
+    solved, ppm, ec = solve_doses(stocks, targets)
+    
+    assert np.abs(solved - doses).max() < 0.05
+    assert np.allclose(ppm, targets, rtol=1e-2, atol=0.05)
+    assert np.allclose(ec, estimate_ec(ppm))
+
+
+def test_solve_doses_respects_bounds_and_ec_only_targets():
+    rng = np.random.default_rng(4)
+    stocks = random_stocks(rng, 300)
+    targets = rng.uniform(0.5, 3.0, (50, 300)) * (rng.random((50, 300)) < 0.02) @ stocks / 1000.0
+    max_doses = rng.uniform(0.0, 2.0, 300)
+    max_doses[:10] = 0.0
+    
+    doses, _, _ = solve_doses(stocks, targets * 5, max_doses=max_doses)
+    assert (doses >= 0).all() and (doses <= max_doses + 1e-12).all()
+    assert not doses[:, :10].any()
+    
+    # With no element targets, only the EC is matched
+    free = np.full((3, len(ELEMENTS)), np.nan)
+    _, _, ec = solve_doses(stocks, free, ec_targets=[1.2, 2.0, np.nan])
+    assert ec[:2] == pytest.approx([1.2, 2.0], abs=1e-3)
+    assert ec[2] == config.NUTRIENT_WATER_EC
+
+
+def test_default_stock_tanks_dose_a_complete_mix(tmp_path):
+    url = f"sqlite:///{tmp_path / 'melon.db'}"
+    init_schema(url)
+    with Session(get_engine(url)) as session:
+        assert len(StockTank.get_default_tanks(session)) == len(config.DEFAULT_STOCK_TANKS)
+        assert len(StockTank.get_default_tanks(session)) == len(config.DEFAULT_STOCK_TANKS)
+        drip = IrrigationSystem(name="Drip Fertigation")
+        session.add(IrrigationSchedule(system=drip, start_time=datetime.datetime(2024, 3, 1, 6), duration=10,
+                                       frequency="Daily", ec_target=1.8))
+        session.commit()
+    
+    plan = NutrientSolver(url).solve_schedules()
+    
+    assert plan.summary["ec"].iloc[0] == pytest.approx(1.8, abs=1e-3)
+    assert len(plan.doses) > 1
+
+
+def test_solver_plans_every_active_schedule(tmp_path):
+    url = f"sqlite:///{tmp_path / 'melon.db'}"
+    init_schema(url)
+    with Session(get_engine(url)) as session:
+        calcium_nitrate = NutrientMix(name="Calcium nitrate stock", nitrogen=15500, calcium=19000)
+        potassium = NutrientMix(name="MKP stock", phosphorus=22800, potassium=28700)
+        vegetative = NutrientMix(name="Vegetative", nitrogen=31, calcium=38, phosphorus=45.6, potassium=57.4)
+        drip = IrrigationSystem(name="Drip Fertigation")
+        session.add_all([
+            StockTank(name="A", nutrient_mix=calcium_nitrate, volume=100.0, max_dose=5.0),
+            StockTank(name="B", nutrient_mix=potassium, volume=100.0),
+            StockTank(name="Empty", nutrient_mix=potassium, volume=0.0),
+        ])
+        start = datetime.datetime(2024, 3, 1, 6)
+        session.add_all([
+            IrrigationSchedule(system=drip, start_time=start, duration=10, frequency="Daily", nutrient_mix=vegetative),
+            IrrigationSchedule(system=drip, start_time=start, duration=10, frequency="Daily", ec_target=1.0),
+            IrrigationSchedule(system=drip, start_time=start, duration=10, frequency="Daily", is_active=False),
+        ])
+        session.commit()
+    
+    plan = NutrientSolver(url).solve_schedules()
+    
+    assert plan.summary["schedule_id"].tolist() == [1, 2]
+    assert plan.summary["element_error"].iloc[0] < 1e-3
+    assert plan.summary["ec"].iloc[1] == pytest.approx(1.0, abs=1e-3)
+    doses = plan.doses[plan.doses["schedule_id"] == 1].set_index("tank")["ml_per_l"]
+    assert doses.to_dict() == pytest.approx({"A": 2.0, "B": 2.0}, rel=1e-3)
+    assert "Empty" not in set(plan.doses["tank"])
+    
+    overridden = NutrientSolver(url).solve_schedules(ec_target=1.2)
+    assert overridden.summary["ec"].iloc[1] == pytest.approx(1.2, abs=1e-3)
+    # Beyond what full doses of A and B give, the EC stops at that maximum
+    capped = NutrientSolver(url).solve_schedules(ec_target=2.0)
+    most = config.NUTRIENT_WATER_EC + (5.0 * 34.5 + config.NUTRIENT_MAX_DOSE * 51.5) / config.NUTRIENT_PPM_PER_EC
+    assert capped.summary["ec"].iloc[1] == pytest.approx(most)
\ No newline at end of file
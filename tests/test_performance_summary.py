@@ -0,0 +1,85 @@
+import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy.orm import Session
+
+from app.database import get_engine, init_schema
+from app.models import GrowingMedia, IrrigationSchedule, IrrigationSystem, Plant
+from app.services.measurement_store import MeasurementStore
+from app.services.performance_summary import PerformanceSummary
+
+NOW = datetime.datetime(2024, 3, 15, 12)
+
+
+@pytest.fixture
+def url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'melon.db'}"
+    init_schema(url)
+    with Session(get_engine(url)) as session:
+        cocopeat, rockwool = GrowingMedia(name="Cocopeat"), GrowingMedia(name="Rockwool")
+        drip = IrrigationSystem(name="Drip Fertigation", flow_rate=2.0)
+        session.add_all([cocopeat, rockwool, drip])
+        session.add(IrrigationSchedule(system=drip, start_time=NOW, duration=30, frequency="Daily"))
+        for i, media in enumerate([cocopeat, cocopeat, rockwool]):
+            session.add(Plant(name=f"Plant #{i + 1}", variety="Galia", media=media, irrigation=drip))
+        session.commit()
+    return url
+
+
+def readings(plant_id, days, growth):
+    return pd.DataFrame({
+        "plant_id": plant_id,
+        "measurement_date": [NOW - datetime.timedelta(days=day) for day in range(days)],
+        "height": [100.0 - growth * day for day in range(days)],
+    })
+
+
+def test_incremental_summaries_match_a_rebuild(url):
+    store = MeasurementStore(url)
+    store.add_measurements(readings(1, 8, 1.0))
+    store.add_measurements(readings(1, 15, 1.0).iloc[8:])
+    store.add_measurements(readings(3, 8, 2.0))
+    
+    summary = PerformanceSummary(url)
+    columns = ["media", "growth_rate", "plants"]
+    media = summary.media_summary()[columns]
+    irrigation = summary.irrigation_summary().drop(columns="updated_at")
+    assert media.set_index("media").loc["Cocopeat", "growth_rate"] == pytest.approx(7.0)
+    assert media.set_index("media").loc["Rockwool", "growth_rate"] == pytest.approx(14.0)
+    
+    summary.rebuild()
+    pd.testing.assert_frame_equal(summary.media_summary()[columns], media)
+    pd.testing.assert_frame_equal(summary.irrigation_summary().drop(columns="updated_at"), irrigation)
+
+
+def test_harvest_updates_yield_and_water_per_kg(url):
+    summary = PerformanceSummary(url)
+    summary.record_harvest(1, 2.0, fruit_count=2)
+    summary.record_harvest(2, 3.0, fruit_count=4)
+    
+    media = summary.media_summary().set_index("media")
+    assert media.loc["Cocopeat", "avg_yield"] == pytest.approx(2.5)
+    assert media.loc["Cocopeat", "avg_fruit_count"] == pytest.approx(3.0)
+    assert pd.isna(media.loc["Rockwool", "avg_yield"])
+    
+    drip = summary.irrigation_summary().set_index("system").loc["Drip Fertigation"]
+    # One 30 min run a day at 2 L/h shared by 3 plants
+    assert drip["water_usage"] == pytest.approx(1.0 / 3)
+    assert drip["water_per_kg"] == pytest.approx(1.0 / 3 / 2.5)
+
+
+def test_moving_the_last_plant_out_of_a_group_clears_its_row(url):
+    summary = PerformanceSummary(url)
+    summary.record_harvest(3, 4.0)
+    assert summary.media_summary().set_index("media").loc["Rockwool", "plants"] == 1
+    
+    with Session(get_engine(url)) as session:
+        plant = session.get(Plant, 3)
+        plant.media_id = session.query(GrowingMedia).filter_by(name="Cocopeat").one().id
+        session.commit()
+    summary.refresh()
+    
+    media = summary.media_summary().set_index("media")
+    assert media.loc["Rockwool", "plants"] == 0
+    assert media.loc["Cocopeat", "avg_yield"] == pytest.approx(4.0)
\ No newline at end of file
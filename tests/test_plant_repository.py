@@ -0,0 +1,109 @@
+import datetime
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import Session
+
+from app.database import get_engine, init_schema
+from app.models import GrowingMedia, IrrigationSystem, Plant, PlantAnalysis, PlantMeasurement
+from app.services.alert_engine import get_alert_engine
+from app.services.image_store import ImageStore
+from app.services.plant_repository import PlantRepository
+
+NOW = datetime.datetime(2024, 3, 15)
+
+
+def seed(url, count):
+    with Session(get_engine(url)) as session:
+        media, drip = GrowingMedia(name="Cocopeat"), IrrigationSystem(name="Drip Fertigation")
+        for i in range(count):
+            plant = Plant(name=f"Plant #{i:04d}", variety="Galia", media=media, irrigation=drip,
+                          planting_date=NOW - datetime.timedelta(days=i % 30))
+            plant.measurements = [PlantMeasurement(height=10.0 + day, measurement_date=NOW) for day in range(2)]
+            plant.analyses = [
+                PlantAnalysis(analysis_date=NOW - datetime.timedelta(days=2), health_score=70.0),
+                PlantAnalysis(analysis_date=NOW - datetime.timedelta(days=1), health_score=80.0 + i % 10),
+            ]
+            session.add(plant)
+        session.commit()
+
+
+@pytest.fixture
+def repository(tmp_path):
+    def make(count):
+        url = f"sqlite:///{tmp_path / f'melon_{count}.db'}"
+        init_schema(url)
+        seed(url, count)
+        return PlantRepository(url)
+    return make
+
+
+def count_queries(engine, fn):
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return result, len(statements)
+
+
+def test_query_count_does_not_grow_with_the_number_of_plants(repository):
+    small, large = repository(5), repository(400)
+    
+    counts = []
+    for repo in (small, large):
+        def load_everything():
+            plants = repo.list(strategy="detail")
+            return [(p.media.name, p.irrigation.name, len(p.measurements), len(p.analyses)) for p in plants]
+        rows, queries = count_queries(repo.engine, load_everything)
+        assert all(row == ("Cocopeat", "Drip Fertigation", 2, 2) for row in rows)
+        counts.append(queries)
+    
+    assert counts[0] == counts[1] == 3
+
+
+def test_list_strategy_refuses_to_lazy_load_collections(repository):
+    plant = repository(2).list()[0]
+    
+    assert plant.media.name == "Cocopeat"
+    with pytest.raises(InvalidRequestError):
+        plant.measurements
+
+
+def test_summary_projection_is_a_single_query(repository):
+    repo = repository(50)
+    
+    summaries, queries = count_queries(repo.engine, lambda: repo.summaries(now=NOW))
+    
+    assert queries == 1
+    assert len(summaries) == 50
+    first = summaries.iloc[0]
+    assert (first["media"], first["irrigation"], first["age"], first["health_score"]) == (
+        "Cocopeat", "Drip Fertigation", 0, 80.0
+    )
+
+
+def test_added_analyses_keep_their_image_in_the_store(repository, tmp_path):
+    repo = repository(2)
+    store = ImageStore(root=str(tmp_path / "images"))
+    plant_id = repo.list()[0].id
+    
+    added = repo.add_analysis(plant_id, b"leaf photo", store=store, ai_model_used="Gemini Pro Vision")
+    
+    assert added.image_data is None and store.exists(added.image_path)
+    latest = repo.analyses(plant_id, limit=1)[0]
+    assert latest.id == added.id and latest.get_image(store) == b"leaf photo"
+    assert len(repo.analyses(plant_id)) == 3
+    
+    # Saving an analysis runs the alert rules over it
+    repo.add_analysis(plant_id, b"wilted leaf", store=store, analysis_date=NOW, health_score=20.0)
+    day = datetime.timedelta(days=1)
+    alerts = get_alert_engine(repo.database_url).alerts(NOW - day, NOW + day, plant_id)
+    assert {"Critical health score", "Low health score"} <= set(alerts["rule"])
\ No newline at end of file
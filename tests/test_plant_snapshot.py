@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.plant_snapshot import PlantSnapshot
+
+
+@pytest.fixture
+def snapshot():
+    count = 3000
+    return PlantSnapshot.from_frame(pd.DataFrame({
+        "id": np.arange(1, count + 1),
+        "name": [f"Plant #{i:04d}" for i in range(1, count + 1)],
+        "variety": np.array(["Galia", "Honeydew", None])[np.arange(count) % 3],
+        "planting_date": pd.Timestamp("2024-01-01"),
+        "media": "Cocopeat",
+        "irrigation": None,
+        "health": np.array(["Good", "Fair"])[np.arange(count) % 2],
+        "health_score": np.where(np.arange(count) % 10 == 0, np.nan, np.arange(count) % 97),
+        "current_height": 50.0,
+        "fruit_count": 0,
+        "notes": None,
+        "age": np.arange(count) % 60,
+    }))
+
+
+def test_filters_combine(snapshot):
+    plants = snapshot.filter(varieties=["Galia"], health=["Good"], min_age=10, max_age=20)
+    
+    # Galia and Good every 6th plant; ages 12 and 18 of every 60
+    assert len(plants) == 100
+    assert set(plants.column("variety")) == {"Galia"}
+    assert set(plants.column("health")) == {"Good"}
+    assert plants.column("age").min() >= 10 and plants.column("age").max() <= 20
+    assert len(snapshot.filter(search="#0012")) == 1
+    assert snapshot.distinct("variety") == ["Galia", "Honeydew"]
+
+
+def test_sorting_is_stable_and_puts_missing_scores_last(snapshot):
+    for descending in (False, True):
+        scores = snapshot.sort("health_score", descending).column("health_score")
+        present = scores[~np.isnan(scores)]
+        assert np.isnan(scores[len(present):]).all()
+        assert (np.diff(present) <= 0).all() if descending else (np.diff(present) >= 0).all()
+    
+    by_variety = snapshot.sort("variety", descending=True)
+    assert by_variety.column("variety")[0] == "Honeydew"
+    assert by_variety.column("variety")[-1] == ""
+    # Ties keep their previous order
+    assert list(by_variety.column("id")[:3]) == [2, 5, 8]
+
+
+def test_paging_after_filter_and_sort(snapshot):
+    plants = snapshot.filter(health=["Fair"]).sort("age", descending=True)
+    
+    assert plants.pages(20) == 75
+    last = plants.page(74, 20)
+    assert len(last) == 20
+    rows = list(plants.page(0, 20).records())
+    assert [row.age for row in rows] == sorted((row.age for row in rows), reverse=True)
+    assert rows[0].irrigation == ""
+    with pytest.raises(ValueError):
+        snapshot.sort("notes")
\ No newline at end of file
@@ -0,0 +1,82 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+import config
+from app.database import get_engine, get_session, init_schema
+from app.migrations import MIGRATIONS
+from app.models import Base, GrowingMedia, Plant
+
+
+def test_fresh_database_gets_every_table_and_foreign_key_index(tmp_path):
+    url = f"sqlite:///{tmp_path / 'melon.db'}"
+    
+    assert init_schema(url) == [version for version, _, _ in MIGRATIONS]
+    
+    inspector = inspect(create_engine(url))
+    assert set(Base.metadata.tables) <= set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        indexed = {index["column_names"][0] for index in inspector.get_indexes(table.name)}
+        indexed.update(inspector.get_pk_constraint(table.name)["constrained_columns"][:1])
+        for foreign_key in table.foreign_keys:
+            assert foreign_key.parent.name in indexed, (table.name, foreign_key.parent.name)
+    
+    assert init_schema(url) == []
+
+
+def test_relationships_resolve_across_model_modules(tmp_path):
+    url = f"sqlite:///{tmp_path / 'melon.db'}"
+    init_schema(url)
+    
+    with Session(create_engine(url)) as session:
+        session.add(Plant(name="Golden Melon", media=GrowingMedia(name="Cocopeat")))
+        session.commit()
+        plant = session.query(Plant).one()
+        assert plant.media.plants == [plant]
+
+
+def test_legacy_database_is_upgraded_in_place(tmp_path):
+    url = f"sqlite:///{tmp_path / 'melon.db'}"
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE plant_analyses (id INTEGER PRIMARY KEY, plant_id INTEGER, image_data BLOB)"))
+        conn.execute(text("INSERT INTO plant_analyses (id, plant_id) VALUES (1, 5)"))
+        conn.execute(text(
+            "CREATE TABLE chat_history (id INTEGER PRIMARY KEY, user_id INTEGER, timestamp DATETIME,"
+            " query TEXT NOT NULL, response TEXT NOT NULL, model_used VARCHAR(50))"
+        ))
+        conn.execute(text("INSERT INTO chat_history (id, user_id, query, response) VALUES (1, 2, 'pH?', '5.8')"))
+    
+    init_schema(url)
+    
+    inspector = inspect(engine)
+    assert "image_path" in [column["name"] for column in inspector.get_columns("plant_analyses")]
+    assert "ix_plant_analyses_plant_id" in [index["name"] for index in inspector.get_indexes("plant_analyses")]
+    assert "session_id" in [column["name"] for column in inspector.get_columns("chat_history")]
+    assert {"ix_chat_history_user_timestamp", "ix_chat_history_session_timestamp"} <= {
+        index["name"] for index in inspector.get_indexes("chat_history")
+    }
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT plant_id FROM plant_analyses")).scalar_one() == 5
+        assert conn.execute(text("SELECT query FROM chat_history WHERE user_id = 2")).scalar_one() == "pH?"
+
+
+def test_shared_engine_applies_the_sqlite_profile(tmp_path):
+    url = f"sqlite:///{tmp_path / 'melon.db'}"
+    init_schema(url)
+    engine = get_engine(url)
+    
+    with engine.connect() as conn:
+        def pragma(name):
+            return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+        assert pragma("journal_mode") == "wal"
+        assert pragma("busy_timeout") == config.SQLITE_BUSY_TIMEOUT * 1000
+        assert pragma("cache_size") == -config.SQLITE_CACHE_SIZE_KB
+        assert pragma("mmap_size") == config.SQLITE_MMAP_SIZE
+    assert engine.pool.size() == config.DATABASE_POOL_SIZE
+    
+    # VACUUM cannot run inside the BEGIN the engine emits for normal connections
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").exec_driver_sql("VACUUM")
+    
+    with get_session(url) as session:
+        assert session.get_bind() is engine
\ No newline at end of file
@@ -0,0 +1,75 @@
+import datetime
+import io
+import json
+
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from app.database import init_schema
+from app.services.measurement_store import MeasurementStore
+from app.services.sensor_ingest import ingest, validate_readings
+
+START = datetime.datetime(2024, 3, 1, 6)
+
+
+@pytest.fixture
+def store(tmp_path):
+    url = f"sqlite:///{tmp_path / 'melon.db'}"
+    init_schema(url)
+    return MeasurementStore(url)
+
+
+def count_rows(store, table):
+    with store.engine.connect() as conn:
+        return conn.execute(text(f"SELECT count(*) FROM {table}")).scalar_one()
+
+
+def test_validation_rejects_bad_rows_without_dropping_sparse_ones():
+    frame = pd.DataFrame({
+        "plant_id": [1, None, 2, 3, 4, 5],
+        "measurement_date": ["2024-03-01 06:00", "2024-03-01 06:01", "not a date", "2024-03-01 06:03",
+                             "2024-03-01 06:04", "2024-03-01 06:05"],
+        "temperature": [24.5, 24.0, 23.0, 140.0, "warm", None],
+    })
+    
+    valid, rejected = validate_readings(frame)
+    
+    assert rejected == 4
+    assert list(valid["plant_id"]) == [1, 5]
+    assert valid["temperature"].isna().tolist() == [False, True]
+
+
+def test_tuples_are_ingested_in_chunks(store):
+    rows = (
+        (i % 3 + 1, START + datetime.timedelta(minutes=i), 30.0 + i / 100, None, None, None, 25.0, 70.0, 12000.0)
+        for i in range(2500)
+    )
+    
+    result = ingest(rows, chunk_size=1000, store=store)
+    
+    assert (result["inserted"], result["rejected"]) == (2500, 0)
+    assert count_rows(store, "plant_measurements") == 2500
+    with store.engine.connect() as conn:
+        samples = conn.execute(text("SELECT sum(samples) FROM plant_measurement_hourly")).scalar_one()
+    assert samples == 2500
+
+
+def test_csv_and_jsonl_sources(store):
+    csv = io.StringIO(
+        "plant_id,measurement_date,height,temperature\n"
+        "1,2024-03-01 06:00:00,31.5,24.0\n"
+        "1,2024-03-01 06:10:00,31.7,-99\n"
+        "2,2024-03-01 06:20:00,28.0,\n"
+    )
+    jsonl = io.StringIO("\n".join(json.dumps(row) for row in [
+        {"plant_id": 1, "measurement_date": "2024-03-01T07:00:00", "humidity": 72.5},
+        {"plant_id": 2, "measurement_date": "2024-03-01T07:00:00", "humidity": 105},
+    ]))
+    
+    assert ingest(csv, fmt="csv", store=store)["inserted"] == 2
+    assert ingest(jsonl, fmt="jsonl", store=store)["rejected"] == 1
+    
+    history = store.history(1, START, START + datetime.timedelta(hours=2), resolution="raw")
+    assert history["height"].tolist()[0] == 31.5
+    assert history["humidity"].tolist()[-1] == 72.5
\ No newline at end of file
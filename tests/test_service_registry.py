@@ -0,0 +1,67 @@
+import threading
+
+import config
+from app.services import registry as registry_module
+from app.services.registry import ServiceRegistry
+
+
+def test_services_are_created_once(monkeypatch):
+    built = []
+    monkeypatch.setitem(registry_module._SERVICES, "openrouter", (
+        lambda: (config.OPENROUTER_API_KEY,), lambda reg: built.append(object()) or built[-1]
+    ))
+    registry = ServiceRegistry()
+    
+    first = registry.openrouter()
+    
+    assert registry.openrouter() is first
+    assert len(built) == 1
+
+
+def test_concurrent_first_use_builds_a_single_instance(monkeypatch):
+    built = []
+    barrier = threading.Barrier(8)
+    monkeypatch.setitem(registry_module._SERVICES, "gemini", (
+        lambda: (config.GEMINI_API_KEY,), lambda reg: built.append(object()) or built[-1]
+    ))
+    registry = ServiceRegistry()
+    seen = []
+    
+    def worker():
+        barrier.wait()
+        seen.append(registry.gemini())
+    
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(built) == 1
+    assert all(service is built[0] for service in seen)
+
+
+def test_changing_api_keys_hot_reloads_dependent_services(monkeypatch):
+    monkeypatch.setattr(config, "GEMINI_API_KEY", "old-key")
+    monkeypatch.setattr(config, "DEFAULT_AI_MODEL", "Gemini")
+    registry = ServiceRegistry()
+    
+    gemini = registry.gemini()
+    analysis = registry.image_analysis()
+    assert analysis.ai_service is gemini
+    
+    registry.update_api_keys(gemini_api_key="new-key")
+    
+    assert registry.gemini() is not gemini
+    assert registry.gemini().api_key == "new-key"
+    assert registry.image_analysis().ai_service is registry.gemini()
+    assert registry.openrouter() is registry.openrouter()
+
+
+def test_reload_drops_cached_instances():
+    registry = ServiceRegistry()
+    service = registry.openrouter()
+    
+    registry.reload("openrouter")
+    
+    assert registry.openrouter() is not service
\ No newline at end of file
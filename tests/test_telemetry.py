@@ -0,0 +1,124 @@
+import datetime
+import time
+
+import numpy as np
+import pytest
+from sqlalchemy import func, select
+
+from app.database import get_engine, init_schema
+from app.models import PlantMeasurement
+from app.services.measurement_store import MeasurementStore
+from app.services.telemetry import RingBuffer, TelemetryHub, TelemetryServer, send_readings
+
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture
+def url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'melon.db'}"
+    init_schema(url)
+    return url
+
+
+def stored(url):
+    with get_engine(url).connect() as conn:
+        return conn.execute(select(func.count()).select_from(PlantMeasurement.__table__)).scalar()
+
+
+def test_ring_buffer_window_stats_match_brute_force():
+    rng = np.random.default_rng(5)
+    buffer = RingBuffer(50)
+    times, values, clock = [], [], 0.0
+    for _ in range(100):
+        size = int(rng.integers(1, 80))
+        batch_times, batch_values = clock + np.arange(size), rng.normal(20, 3, size)
+        buffer.extend(batch_times, batch_values)
+        times.extend(batch_times)
+        values.extend(batch_values)
+        clock += size
+        
+        kept_times, kept_values = np.array(times[-50:]), np.array(values[-50:])
+        for seconds in (None, 1, 10, 49, 500):
+            window = kept_values if seconds is None else kept_values[kept_times >= clock - seconds]
+            stats = buffer.stats(seconds, now=clock)
+            assert stats["count"] == len(window)
+            assert stats["mean"] == pytest.approx(window.mean())
+            # Differences of running totals lose a little precision as the totals grow
+            assert stats["std"] == pytest.approx(window.std(), abs=1e-4)
+            assert (stats["min"], stats["max"], stats["latest"]) == (window.min(), window.max(), values[-1])
+    assert len(buffer) == 50 and buffer.latest() == (clock - 1, values[-1])
+
+
+def test_hub_keeps_live_buffers_and_flushes_plant_readings(url):
+    hub = TelemetryHub(url, clock=lambda: NOW)
+    accepted = hub.record([
+        {"plant_id": 1, "ts": NOW - 120, "temperature": 24.0, "humidity": 60, "height": 31.5},
+        {"plant_id": 2, "ts": NOW - 60, "temperature": 26.0, "humidity": 500},
+        {"sensor": "ec", "system": "NFT", "value": 2.1, "ts": NOW - 30},
+        {"sensor": "ec", "system": "Drip Fertigation", "value": "1.7"},
+        {"sensor": "ph"},
+        None,
+    ])
+    
+    assert accepted == 4 and hub.rejected == 2
+    assert hub.stats("temperature")["mean"] == 25.0
+    # Out-of-range values stay out of the live buffers
+    assert hub.stats("humidity")["count"] == 1
+    assert hub.latest("ec/NFT")[1] == 2.1
+    assert hub.stats("ec")["count"] == 2 and hub.stats("ec", seconds=10)["latest"] == 1.7
+    assert hub.stats("unknown")["count"] == 0
+    assert stored(url) == 0
+    
+    # The invalid humidity rejects its whole row, as in bulk ingestion
+    assert hub.flush() == 1
+    assert stored(url) == 1 and hub.rejected == 3
+    assert hub.flush() == 0
+
+
+def test_failed_writes_keep_readings_queued(url):
+    class FlakyStore(MeasurementStore):
+        failures = 1
+        
+        def add_measurements(self, readings):
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError("database is locked")
+            return super().add_measurements(readings)
+    
+    hub = TelemetryHub(store=FlakyStore(url), clock=lambda: NOW)
+    hub.record([{"plant_id": 1, "ts": NOW - i, "temperature": 24.0} for i in range(3)])
+    
+    with pytest.raises(RuntimeError, match="locked"):
+        hub.flush()
+    assert stored(url) == 0
+    hub.record([{"plant_id": 2, "ts": NOW, "temperature": 25.0}])
+    
+    assert hub.flush() == 4
+    assert stored(url) == 4 and hub.flushed == 4
+
+
+def test_udp_listener_batches_readings_into_the_database(url):
+    hub = TelemetryHub(url).start()
+    server = TelemetryServer(hub, port=0).start()
+    try:
+        host, port = server.address
+        send_readings(
+            [{"plant_id": 1, "temperature": 20 + i % 10, "humidity": 70} for i in range(2000)]
+            + [{"sensor": "water_temperature", "system": "NFT", "value": 22.5}],
+            host, port
+        )
+        deadline = time.time() + 10
+        while hub.received < 2001 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        server.stop()
+        hub.stop()
+    
+    assert hub.received == 2001
+    assert hub.stats("temperature")["count"] == 2000
+    assert hub.latest("water_temperature/NFT")[1] == 22.5
+    assert stored(url) == 2000
+    # Readings without a timestamp are stored at their arrival time
+    now = datetime.datetime.utcnow()
+    history = MeasurementStore(url).history(1, now - datetime.timedelta(minutes=5), now, "raw")
+    assert len(history) == 2000 and history["temperature"].mean() == 24.5
\ No newline at end of file
@@ -0,0 +1,105 @@
+import json
+
+import numpy as np
+import pytest
+from sqlalchemy.orm import Session
+
+from app.database import get_engine, init_schema
+from app.models import GrowingMedia, IrrigationSystem, Plant
+from app.services.performance_summary import PerformanceSummary
+from app.services.yield_model import YieldModel, get_yield_model
+
+# (variety, media, irrigation, yield) of the seeded harvests
+HARVESTS = [
+    ("Galia", 1, 1, 3.0), ("Galia", 1, 2, 3.6), ("Galia", 2, 1, 2.4),
+    ("Honeydew", 1, 1, 4.5), ("Honeydew", 2, 2, 4.0), ("Honeydew", 2, 1, 3.5),
+]
+
+
+@pytest.fixture
+def url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'melon.db'}"
+    init_schema(url)
+    with Session(get_engine(url)) as session:
+        session.add_all([GrowingMedia(name="Cocopeat"), GrowingMedia(name="Rockwool")])
+        session.add_all([IrrigationSystem(name="Drip Fertigation"), IrrigationSystem(name="NFT")])
+        session.add_all([
+            Plant(name=f"Plant #{i + 1}", variety=variety, media_id=media_id, irrigation_id=irrigation_id)
+            for i, (variety, media_id, irrigation_id, _) in enumerate(HARVESTS)
+        ])
+        session.add(Plant(name="Seedling", variety="Galia", media_id=1, irrigation_id=1))
+        session.commit()
+    return url
+
+
+def record_all(url):
+    summary = PerformanceSummary(url)
+    for plant_id, (_, _, _, harvest_yield) in enumerate(HARVESTS, start=1):
+        summary.record_harvest(plant_id, harvest_yield)
+
+
+def test_unpenalized_fit_is_ordinary_least_squares(url, tmp_path):
+    record_all(url)
+    model = YieldModel(url, path=str(tmp_path / "ols.json"), ridge=0.0)
+    model.fit()
+    
+    design = np.array([
+        [1, variety == "Galia", variety == "Honeydew", media == 1, media == 2, system == 1, system == 2]
+        for variety, media, system, _ in HARVESTS
+    ], dtype=float)
+    target = np.log([harvest_yield for *_, harvest_yield in HARVESTS])
+    expected = np.exp(design @ np.linalg.lstsq(design, target, rcond=None)[0])
+    
+    grid = model.predict_grid(["Galia", "Honeydew"], [1, 2], [1, 2])
+    predicted = [grid[["Galia", "Honeydew"].index(v), m - 1, s - 1] for v, m, s, _ in HARVESTS]
+    np.testing.assert_allclose(predicted, expected)
+
+
+def test_incremental_updates_match_a_full_refit_and_survive_reload(url):
+    record_all(url)
+    PerformanceSummary(url).record_harvest(2, 3.9)
+    
+    with Session(get_engine(url)) as session:
+        session.get(Plant, 3).media_id = 1
+        session.commit()
+    PerformanceSummary(url).refresh([3])
+    
+    incremental = get_yield_model(url)
+    refit = YieldModel(url, path=incremental.path + ".refit")
+    refit.fit()
+    args = (["Galia", "Honeydew", "Crenshaw"], [1, 2], [1, 2])
+    np.testing.assert_allclose(incremental.predict_grid(*args), refit.predict_grid(*args))
+    
+    with open(incremental.path) as f:
+        assert len(json.load(f)["observations"]) == len(HARVESTS)
+    np.testing.assert_allclose(YieldModel(url).predict_grid(*args), refit.predict_grid(*args))
+
+
+def test_each_database_keeps_its_own_fit_and_sees_other_processes_harvests(url, tmp_path):
+    other_url = f"sqlite:///{tmp_path / 'other.db'}"
+    init_schema(other_url)
+    assert get_yield_model(url).path != get_yield_model(other_url).path
+    
+    record_all(url)
+    args = (["Galia"], [1], [1])
+    # Another process loaded the fit before this one recorded a harvest
+    other_process = YieldModel(url)
+    before = other_process.predict_grid(*args)
+    PerformanceSummary(url).record_harvest(7, 6.0)
+    
+    np.testing.assert_allclose(other_process.predict_grid(*args), get_yield_model(url).predict_grid(*args))
+    assert other_process.predict_grid(*args)[0, 0, 0] > before[0, 0, 0]
+    assert np.isnan(get_yield_model(other_url).predict_grid(*args)).all()
+
+
+def test_grid_covers_every_combination(url):
+    assert get_yield_model(url).yield_grid()["predicted_yield"].isna().all()
+    
+    record_all(url)
+    grid = get_yield_model(url).yield_grid().set_index(["variety", "media", "system"])["predicted_yield"]
+    
+    assert len(grid) == 5 * 2 * 2
+    assert grid.notna().all()
+    assert grid["Honeydew", "Cocopeat", "Drip Fertigation"] > grid["Galia", "Cocopeat", "Drip Fertigation"]
+    # Varieties without harvests predict the shared baseline
+    assert grid["Crenshaw"].tolist() == pytest.approx(grid["Cantaloupe"].tolist())
\ No newline at end of file